@@ -0,0 +1,384 @@
+"""
+Acumulação incremental do Market Profile.
+
+O `ProfileAccumulator` mantém o histograma entre consultas e ingere apenas
+os candles novos ou atualizados, de modo que o custo de cada atualização é
+proporcional à quantidade de candles recebidos e não ao tamanho da janela.
+Com `janela`, os candles mais antigos que os `janela` últimos são retirados
+do histograma à medida que novos chegam, com custo proporcional aos
+candles retirados.
+"""
+
+from collections import deque
+from collections.abc import Sequence
+from typing import Any
+
+import numpy as np
+
+from .model import (
+    _binning_vetorizado,
+    _calcular_ib,
+    _janela_ib,
+    calcular_metricas,
+)
+from .profile import Profile
+from .timings import etapa
+
+#: Folga mínima, em blocos, reservada ao ampliar a grade de preços
+_FOLGA_MINIMA = 64
+
+
+class ProfileAccumulator:
+    """
+    Histograma de Market Profile atualizado incrementalmente.
+
+    Os candles devem chegar em ordem cronológica. Um candle com o mesmo
+    horário do último já ingerido é tratado como atualização do candle em
+    formação: sua contribuição anterior é removida antes de somar a nova.
+
+    Com `janela`, o histograma cobre apenas os `janela` candles mais
+    recentes, como `calcular_profile(rates[-janela:])`; sem ela, todos os
+    candles ingeridos.
+    """
+
+    def __init__(
+        self,
+        block: float,
+        by: str = "tpo",
+        ib_minutes: int = 30,
+        market_start_hour: int = 9,
+        market_start_minute: int = 0,
+        market_timezone_offset: int = -3,
+        janela: int | None = None,
+    ) -> None:
+        self.block = float(block)
+        self.by = by
+        self.ib_minutes = ib_minutes
+        self.market_start_hour = market_start_hour
+        self.market_start_minute = market_start_minute
+        self.market_timezone_offset = market_timezone_offset
+        self.janela = janela
+
+        self.rates_count = 0
+        self.ultimo_tempo: int | None = None
+
+        # Grade com folga: posição i corresponde ao bloco _origem + i;
+        # apenas [_ini, _fim) está em uso.
+        self._origem = 0
+        self._ini = 0
+        self._fim = 0
+        self._volume = np.empty(0, dtype=np.float64)
+        self._tpo = np.empty(0, dtype=np.int64)
+
+        self._ultimo_candle = None
+        # Candles na janela, em pedaços na ordem de chegada (apenas com janela)
+        self._candles: deque[np.ndarray] = deque()
+        self._ib: dict[str, float] | None = None
+        self._ib_dia: int | None = None
+
+        self._dia: int | None = None
+        self._dia_completo = False
+        self._estatisticas_dia: dict[str, float] | None = None
+
+    # ------------------------------------------------------------------
+    # Ingestão
+    # ------------------------------------------------------------------
+
+    def adicionar(self, rates) -> int:
+        """
+        Ingere candles novos ou atualizados.
+
+        Candles anteriores ao último horário já ingerido são ignorados.
+
+        Returns:
+            int: Quantidade de candles novos (sem contar a atualização do
+            candle em formação).
+        """
+        if rates is None or len(rates) == 0:
+            return 0
+
+        atualizado = False
+        if self.ultimo_tempo is not None:
+            rates = rates[rates["time"] >= self.ultimo_tempo]
+            if len(rates) == 0:
+                return 0
+
+            if int(rates[0]["time"]) == self.ultimo_tempo:
+                self._somar(self._ultimo_candle, -1)
+                self.rates_count -= 1
+                if self._candles:
+                    self._candles[-1] = self._candles[-1][:-1]
+                atualizado = True
+
+        self._somar(rates, 1)
+        self._atualizar_ib(rates)
+        self._atualizar_dia(rates)
+
+        self.rates_count += len(rates)
+        self._ultimo_candle = rates[-1:].copy()
+        self.ultimo_tempo = int(rates[-1]["time"])
+
+        if self.janela is not None:
+            self._candles.append(rates.copy())
+            if self.rates_count > self.janela:
+                self._retirar(self.rates_count - self.janela)
+
+        return len(rates) - int(atualizado)
+
+    def _retirar(self, quantidade: int) -> None:
+        """Retira do histograma os `quantidade` candles mais antigos."""
+        fora = []
+        while quantidade:
+            pedaco = self._candles[0]
+            if len(pedaco) <= quantidade:
+                fora.append(self._candles.popleft())
+                quantidade -= len(pedaco)
+            else:
+                fora.append(pedaco[:quantidade])
+                self._candles[0] = pedaco[quantidade:]
+                quantidade = 0
+
+        fora = np.concatenate(fora)
+        self._somar(fora, -1)
+        self.rates_count -= len(fora)
+        self._ajustar_faixa()
+
+        if self._ib is not None:
+            inicio, limite = _janela_ib(
+                self.ultimo_tempo,
+                self.ib_minutes,
+                self.market_start_hour,
+                self.market_start_minute,
+                self.market_timezone_offset,
+            )
+            if int(fora["time"][-1]) >= inicio:
+                # Saíram candles do IB: recalcula com os que restaram
+                self._ib = _calcular_ib(
+                    np.concatenate(self._candles),
+                    self.ib_minutes,
+                    self.market_start_hour,
+                    self.market_start_minute,
+                    self.market_timezone_offset,
+                )
+
+    def _ajustar_faixa(self) -> None:
+        """
+        Restringe a faixa em uso aos blocos ainda tocados, zerando o resíduo
+        de ponto flutuante do volume nos blocos que ficaram vazios.
+        """
+        ini = self._ini - self._origem
+        fim = self._fim - self._origem
+        tpo = self._tpo[ini:fim]
+        vazios = tpo == 0
+        self._volume[ini:fim][vazios] = 0.0
+
+        tocados = np.flatnonzero(~vazios)
+        if len(tocados) == 0:
+            self._ini = self._fim = 0
+            return
+        self._fim = self._ini + int(tocados[-1]) + 1
+        self._ini += int(tocados[0])
+
+    def _somar(self, rates, sinal: int) -> None:
+        with etapa("binning", barras=len(rates)) as medicao:
+            _, indice, peso = _binning_vetorizado(rates, self.block, self.by)
+            self.somar_blocos(indice, peso, sinal)
+            medicao.contar(blocos=len(indice))
+
+    def somar_blocos(
+        self, indice: np.ndarray, peso: np.ndarray, sinal: int = 1
+    ) -> None:
+        """
+        Soma pesos já distribuídos por índice de bloco, contando um toque
+        por elemento. Permite acumular fontes que não são candles.
+        """
+        if len(indice) == 0:
+            return
+
+        lo = int(indice.min())
+        hi = int(indice.max()) + 1
+        self._garantir_faixa(lo, hi)
+
+        pos = indice - lo
+        ini = lo - self._origem
+        volume = np.bincount(pos, weights=peso)
+        tpo = np.bincount(pos, minlength=len(volume))
+
+        self._volume[ini : ini + len(volume)] += sinal * volume
+        self._tpo[ini : ini + len(tpo)] += sinal * tpo
+
+    def _garantir_faixa(self, lo: int, hi: int) -> None:
+        """
+        Amplia a grade para conter os blocos [lo, hi), realocando com folga
+        para que ampliações sucessivas tenham custo amortizado constante.
+        """
+        ini_antigo, fim_antigo = self._ini, self._fim
+        if self._fim == self._ini:
+            self._ini, self._fim = lo, hi
+        else:
+            self._ini, self._fim = min(self._ini, lo), max(self._fim, hi)
+
+        origem = self._origem
+        capacidade = len(self._volume)
+        if origem <= self._ini and self._fim <= origem + capacidade:
+            return
+
+        folga = max(_FOLGA_MINIMA, self._fim - self._ini)
+        nova_origem = self._ini - folga
+        nova_capacidade = self._fim - self._ini + 2 * folga
+
+        volume = np.zeros(nova_capacidade, dtype=np.float64)
+        tpo = np.zeros(nova_capacidade, dtype=np.int64)
+        if fim_antigo > ini_antigo:
+            # Copia apenas a faixa em uso; fora dela a grade antiga está zerada
+            de, ate = ini_antigo - origem, fim_antigo - origem
+            para = ini_antigo - nova_origem
+            volume[para : para + ate - de] = self._volume[de:ate]
+            tpo[para : para + ate - de] = self._tpo[de:ate]
+
+        self._origem = nova_origem
+        self._volume = volume
+        self._tpo = tpo
+
+    def _atualizar_ib(self, rates) -> None:
+        """
+        Atualiza máxima e mínima do IB do dia do último candle recebido.
+
+        Como a máxima de um candle em formação só aumenta e a mínima só
+        diminui, basta combinar os valores novos com os já acumulados.
+        """
+        dia = int(rates[-1]["time"]) // 86400
+        if dia != self._ib_dia:
+            self._ib_dia = dia
+            self._ib = None
+
+        inicio, limite = _janela_ib(
+            int(rates[-1]["time"]),
+            self.ib_minutes,
+            self.market_start_hour,
+            self.market_start_minute,
+            self.market_timezone_offset,
+        )
+        tempos = rates["time"]
+        na_janela = (tempos >= inicio) & (tempos <= limite)
+        if not na_janela.any():
+            return
+
+        high = rates["high"][na_janela].max()
+        low = rates["low"][na_janela].min()
+        if self._ib is not None:
+            high = max(high, self._ib["high"])
+            low = min(low, self._ib["low"])
+
+        self._ib = {"high": high, "low": low}
+
+    def _atualizar_dia(self, rates) -> None:
+        """
+        Atualiza abertura, fechamento, máxima e mínima do dia do último
+        candle recebido.
+        """
+        tempos = rates["time"]
+        dia = int(tempos[-1]) // 86400
+        ini = int(np.searchsorted(tempos, dia * 86400, side="left"))
+
+        if dia != self._dia:
+            self._dia = dia
+            self._estatisticas_dia = None
+            # O dia só está completo se algum candle anterior a ele foi visto
+            self._dia_completo = ini > 0 or (
+                self.ultimo_tempo is not None and self.ultimo_tempo < dia * 86400
+            )
+
+        hoje = rates[ini:]
+        maxima = float(hoje["high"].max())
+        minima = float(hoje["low"].min())
+
+        anterior = self._estatisticas_dia
+        if anterior is not None:
+            maxima = max(maxima, anterior["maxima"])
+            minima = min(minima, anterior["minima"])
+
+        self._estatisticas_dia = {
+            "abertura": (
+                float(hoje["open"][0]) if anterior is None else anterior["abertura"]
+            ),
+            "fechamento": float(hoje["close"][-1]),
+            "maxima": maxima,
+            "minima": minima,
+        }
+
+    # ------------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------------
+
+    @property
+    def estatisticas_dia(self) -> dict[str, float] | None:
+        """
+        Estatísticas do dia do último candle, quando os candles ingeridos
+        cobrem o dia inteiro; caso contrário None.
+        """
+        if not self._dia_completo:
+            return None
+        return self._estatisticas_dia
+
+    @property
+    def profile(self) -> Profile:
+        """Profile atual, com arrays que são views da grade interna."""
+        if self._fim == self._ini:
+            return Profile.vazio(self.block)
+
+        ini = self._ini - self._origem
+        fim = self._fim - self._origem
+        return Profile(self._ini, self.block, self._volume[ini:fim], self._tpo[ini:fim])
+
+    def resultado(
+        self,
+        va_percent: float = 0.7,
+        criterio_hvn: str = "mult",
+        mult_hvn: float = 1.5,
+        mult_lvn: float = 0.5,
+        percentil_hvn: float = 90,
+        percentil_lvn: float = 10,
+        suavizacao_hvn: int = 5,
+        proeminencia_hvn: float = 0.1,
+        timeframe: str | int = "M1",
+        va_modo: str = "expansao",
+        va_percents: Sequence[float] = (),
+    ) -> dict[str, Any]:
+        """
+        Retorna o resultado no mesmo formato de `model.calcular_profile`.
+
+        POC, Value Area e HVN/LVN são recalculados sobre o histograma, com
+        custo proporcional à quantidade de níveis.
+        """
+        profile = self.profile
+
+        return {
+            "profile": profile,
+            "tpo": profile.tpos,
+            "total_volume": profile.total_volume,
+            "total_tpo": profile.total_tpo,
+            **calcular_metricas(
+                profile,
+                va_percent=va_percent,
+                criterio_hvn=criterio_hvn,
+                mult_hvn=mult_hvn,
+                mult_lvn=mult_lvn,
+                percentil_hvn=percentil_hvn,
+                percentil_lvn=percentil_lvn,
+                suavizacao_hvn=suavizacao_hvn,
+                proeminencia_hvn=proeminencia_hvn,
+                va_modo=va_modo,
+                va_percents=va_percents,
+            ),
+            "ib": self._ib,
+            "rates_count": self.rates_count,
+            "by": self.by,
+            "block": self.block,
+            "va_percent": va_percent,
+            "va_modo": va_modo,
+            "timeframe": timeframe,
+            "criterio_hvn": criterio_hvn,
+            "market_start_hour": self.market_start_hour,
+            "market_start_minute": self.market_start_minute,
+        }
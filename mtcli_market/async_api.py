@@ -0,0 +1,258 @@
+"""
+API assíncrona do Market Profile, para uso em aplicações asyncio.
+
+As consultas à fonte de dados são feitas em um executor de uma única thread
+(o pacote MetaTrader5 não é seguro para uso simultâneo em várias threads),
+que mantém a conexão aberta entre as consultas. O binning e as métricas
+rodam em um pool de threads ou processos. Assim, o laço de eventos nunca
+bloqueia e os profiles de vários ativos se sobrepõem: enquanto um é
+calculado, os dados do seguinte já são transferidos.
+
+Exemplo:
+    async with AsyncProfiler(max_concorrentes=4) as profiler:
+        resultados = await asyncio.gather(
+            profiler.obter_profile("WIN$N", "M1", 500, 5, "volume"),
+            profiler.obter_profile("WDO$N", "M1", 500, 0.5, "volume"),
+        )
+
+O cancelamento da tarefa interrompe a espera: etapas ainda não iniciadas
+não são executadas e o resultado de uma etapa em andamento é descartado.
+
+Um mesmo `AsyncProfiler` pode ser usado em laços de eventos sucessivos
+(várias chamadas de `asyncio.run`): o limite de concorrência é criado para
+cada laço no primeiro uso. A instância de `obter_profile_async` é encerrada
+com `aclose()`, ou usada como contexto assíncrono:
+
+    async with profiler_padrao() as profiler:
+        resultado = await profiler.obter_profile("WIN$N", "M1", 500, 5, "volume")
+"""
+
+import asyncio
+from collections.abc import Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
+from functools import partial
+from typing import Any
+import weakref
+
+import numpy as np
+
+from .conf import POOL, WORKERS
+from .controller import _calcular_com_histograma, _normalizar_parametros
+from .model import (
+    cache_histogramas,
+    histograma_em_cache,
+    obter_rates_e_estatisticas,
+    sessao_mt5,
+)
+
+
+class AsyncProfiler:
+    """
+    Executores e limite de concorrência das consultas assíncronas.
+
+    Args:
+        max_concorrentes (int): Profiles calculados ao mesmo tempo; os
+            demais aguardam sem bloquear o laço de eventos.
+        workers (int | None): Workers do pool de cálculo (None: padrão do
+            pool).
+        pool (str): "thread" ou "processo".
+    """
+
+    def __init__(
+        self,
+        max_concorrentes: int = 8,
+        workers: int | None = None,
+        pool: str = "thread",
+    ) -> None:
+        self.max_concorrentes = max_concorrentes
+        # Um semáforo por laço de eventos: asyncio.Semaphore fica preso ao
+        # laço em que é usado pela primeira vez
+        self._limites: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, asyncio.Semaphore
+        ] = weakref.WeakKeyDictionary()
+        self._dados = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mt5")
+        executor = ProcessPoolExecutor if pool == "processo" else ThreadPoolExecutor
+        self._calculo: Executor = executor(max_workers=workers)
+        self._sessao = ExitStack()
+        self._sessao_aberta = False
+        self.fechado = False
+
+    def _limite(self) -> asyncio.Semaphore:
+        """Limite de concorrência do laço de eventos em execução."""
+        loop = asyncio.get_running_loop()
+        limite = self._limites.get(loop)
+        if limite is None:
+            limite = self._limites[loop] = asyncio.Semaphore(self.max_concorrentes)
+        return limite
+
+    async def __aenter__(self) -> "AsyncProfiler":
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.fechar()
+
+    async def _na_thread_de_dados(self, funcao, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._dados, partial(self._com_sessao, funcao, *args, **kwargs)
+        )
+
+    def _com_sessao(self, funcao, *args, **kwargs):
+        # Executado na thread de dados: a conexão é aberta na primeira
+        # consulta e mantida até `fechar`
+        if not self._sessao_aberta:
+            self._sessao.enter_context(sessao_mt5())
+            self._sessao_aberta = True
+        return funcao(*args, **kwargs)
+
+    async def obter_profile(
+        self,
+        symbol: str,
+        period: str,
+        limit: int,
+        block: float,
+        by: str,
+        ib_minutes: int = 30,
+        va_percent: float = 0.7,
+        criterio_hvn: str = "mult",
+        mult_hvn: float = 1.5,
+        mult_lvn: float = 0.5,
+        percentil_hvn: float = 90,
+        percentil_lvn: float = 10,
+        suavizacao_hvn: int = 5,
+        proeminencia_hvn: float = 0.1,
+        market: str = "b3_fut",
+        va_modo: str = "expansao",
+        va_percents: Sequence[float] = (),
+        usar_cache: bool = False,
+        derivar_estatisticas: bool = False,
+        usar_memo: bool = False,
+    ) -> dict[str, Any]:
+        """
+        Equivalente assíncrono de `controller.obter_profile`.
+        """
+        (
+            by,
+            va_percent,
+            block,
+            criterio_hvn,
+            market_cfg,
+            va_modo,
+            va_percents,
+        ) = _normalizar_parametros(
+            by, va_percent, block, criterio_hvn, market, va_modo, va_percents
+        )
+
+        async with self._limite():
+            rates, estatisticas = await self._na_thread_de_dados(
+                obter_rates_e_estatisticas,
+                symbol,
+                period,
+                limit,
+                usar_cache=usar_cache,
+                derivar_estatisticas=derivar_estatisticas,
+            )
+            # Array simples (não memmap) para envio ao pool de cálculo
+            rates = np.asarray(rates)
+
+            chave = histograma = None
+            if usar_memo:
+                # O cache de histogramas também fica restrito à thread de dados
+                chave, histograma = await self._na_thread_de_dados(
+                    histograma_em_cache, symbol, period, block, by, rates
+                )
+
+            calcular = partial(
+                _calcular_com_histograma,
+                rates,
+                histograma,
+                block=block,
+                by=by,
+                ib_minutes=ib_minutes,
+                va_percent=va_percent,
+                timeframe=period,
+                criterio_hvn=criterio_hvn,
+                mult_hvn=mult_hvn,
+                mult_lvn=mult_lvn,
+                percentil_hvn=percentil_hvn,
+                percentil_lvn=percentil_lvn,
+                suavizacao_hvn=suavizacao_hvn,
+                proeminencia_hvn=proeminencia_hvn,
+                va_modo=va_modo,
+                va_percents=va_percents,
+                market_start_hour=market_cfg.get("hour", 9),
+                market_start_minute=market_cfg.get("minute", 0),
+                market_timezone_offset=market_cfg.get("utc_offset", -3),
+            )
+            loop = asyncio.get_running_loop()
+            resultado = await loop.run_in_executor(self._calculo, calcular)
+
+            if chave is not None and histograma is None:
+                await self._na_thread_de_dados(
+                    cache_histogramas().guardar, chave, resultado["profile"]
+                )
+
+        resultado["estatisticas_dia"] = estatisticas
+        return resultado
+
+    async def obter_profiles(
+        self, symbols: Sequence[str], *args, **kwargs
+    ) -> dict[str, dict[str, Any]]:
+        """
+        Calcula os profiles de vários ativos de forma concorrente.
+
+        Returns:
+            dict[str, dict]: Resultado por ativo, na ordem recebida.
+        """
+        resultados = await asyncio.gather(
+            *(self.obter_profile(symbol, *args, **kwargs) for symbol in symbols)
+        )
+        return dict(zip(symbols, resultados, strict=True))
+
+    async def fechar(self) -> None:
+        """Fecha a conexão com a fonte de dados e encerra os executores."""
+        if self._sessao_aberta:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._dados, self._sessao.close)
+            self._sessao_aberta = False
+        self._dados.shutdown(wait=False, cancel_futures=True)
+        self._calculo.shutdown(wait=False, cancel_futures=True)
+        self.fechado = True
+
+    aclose = fechar
+
+
+#: Instância usada por `obter_profile_async`; criada no primeiro uso
+_padrao: AsyncProfiler | None = None
+
+
+def profiler_padrao() -> AsyncProfiler:
+    """
+    Instância compartilhada por `obter_profile_async`, com os workers e o
+    pool da configuração (WORKERS, POOL); recriada após ser encerrada.
+    """
+    global _padrao
+    if _padrao is None or _padrao.fechado:
+        _padrao = AsyncProfiler(workers=WORKERS or None, pool=POOL)
+    return _padrao
+
+
+async def aclose() -> None:
+    """Encerra a instância de `obter_profile_async`, se houver."""
+    global _padrao
+    if _padrao is not None:
+        padrao, _padrao = _padrao, None
+        await padrao.fechar()
+
+
+async def obter_profile_async(symbol: str, *args, **kwargs) -> dict[str, Any]:
+    """
+    Calcula o Market Profile sem bloquear o laço de eventos.
+
+    Aceita os mesmos argumentos de `controller.obter_profile` e usa uma
+    instância compartilhada de `AsyncProfiler` (`profiler_padrao`), com os
+    workers e o pool da configuração (WORKERS, POOL). Encerre-a com
+    `aclose()` ao final.
+    """
+    return await profiler_padrao().obter_profile(symbol, *args, **kwargs)
@@ -0,0 +1,233 @@
+"""
+Cache persistente de rates em disco.
+
+Cada par (ativo, timeframe) é guardado em um arquivo binário com os
+registros no mesmo dtype retornado pelo MetaTrader 5, lido via memmap sem
+cópia. A cada consulta apenas os candles posteriores ao último horário em
+cache são buscados no terminal; o último candle (ainda em formação) é
+regravado no lugar.
+
+O arquivo só cresce durante as atualizações, de modo que processos que o
+estejam lendo via memmap nunca veem o arquivo encolher. A escrita é
+protegida por um arquivo de trava, permitindo execuções concorrentes.
+"""
+
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+import os
+import re
+import tempfile
+import time
+
+import numpy as np
+
+from mtcli.logger import setup_logger
+
+log = setup_logger()
+
+#: dtype dos rates retornados pelo MetaTrader 5
+RATES_DTYPE = np.dtype(
+    [
+        ("time", "<i8"),
+        ("open", "<f8"),
+        ("high", "<f8"),
+        ("low", "<f8"),
+        ("close", "<f8"),
+        ("tick_volume", "<u8"),
+        ("spread", "<i4"),
+        ("real_volume", "<u8"),
+    ]
+)
+
+_EXTENSAO = ".rates"
+
+
+@contextmanager
+def _travar(caminho: str) -> Iterator[None]:
+    """
+    Trava exclusiva entre processos baseada em um arquivo auxiliar.
+    """
+    with open(caminho, "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK desiste após ~10 s; continua aguardando
+                    continue
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class RatesCache:
+    """
+    Cache de rates por (ativo, timeframe) com política de descarte.
+
+    Args:
+        diretorio (str): Pasta dos arquivos de cache.
+        max_barras (int): Quantidade máxima de candles mantida por arquivo.
+            Ao ultrapassar o dobro desse valor o arquivo é compactado.
+        max_dias (float): Arquivos sem atualização há mais dias que isso são
+            removidos.
+    """
+
+    def __init__(self, diretorio: str, max_barras: int, max_dias: float) -> None:
+        self.diretorio = diretorio
+        self.max_barras = max_barras
+        self.max_dias = max_dias
+
+    def caminho(self, symbol: str, timeframe: int | str) -> str:
+        nome = re.sub(r"[^A-Za-z0-9_.$-]", "_", f"{symbol}_{timeframe}")
+        return os.path.join(self.diretorio, nome + _EXTENSAO)
+
+    def obter(
+        self,
+        symbol: str,
+        timeframe: int | str,
+        limit: int,
+        buscar_ultimos: Callable[[int], np.ndarray | None],
+        buscar_desde: Callable[[int], np.ndarray | None],
+    ) -> np.ndarray:
+        """
+        Retorna os últimos `limit` candles, atualizando o cache antes.
+
+        Args:
+            buscar_ultimos: Busca os últimos N candles no terminal.
+            buscar_desde: Busca os candles a partir de um timestamp
+                (inclusive) no terminal.
+
+        Returns:
+            np.ndarray: View somente leitura do memmap com até `limit`
+            candles.
+        """
+        os.makedirs(self.diretorio, exist_ok=True)
+        self._descartar_antigos()
+
+        arquivo = self.caminho(symbol, timeframe)
+
+        with _travar(arquivo + ".lock"):
+            em_cache = self._contar(arquivo)
+
+            if em_cache >= limit:
+                ultimo = self._ler(arquivo)[-1]["time"]
+                self._atualizar(arquivo, em_cache, int(ultimo), buscar_desde)
+            else:
+                rates = buscar_ultimos(limit)
+                if rates is None or len(rates) == 0:
+                    return np.empty(0, dtype=RATES_DTYPE)
+                self._regravar(arquivo, np.asarray(rates).astype(RATES_DTYPE))
+
+            self._compactar(arquivo, limit)
+            rates = self._ler(arquivo)
+
+        return rates[-limit:]
+
+    # ------------------------------------------------------------------
+    # Arquivos
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _contar(arquivo: str) -> int:
+        try:
+            return os.path.getsize(arquivo) // RATES_DTYPE.itemsize
+        except OSError:
+            return 0
+
+    def _ler(self, arquivo: str) -> np.ndarray:
+        n = self._contar(arquivo)
+        if n == 0:
+            return np.empty(0, dtype=RATES_DTYPE)
+        return np.memmap(arquivo, dtype=RATES_DTYPE, mode="r", shape=(n,))
+
+    @staticmethod
+    def _atualizar(
+        arquivo: str,
+        em_cache: int,
+        ultimo: int,
+        buscar_desde: Callable[[int], np.ndarray | None],
+    ) -> None:
+        """
+        Acrescenta os candles novos, regravando o último candle em cache.
+        """
+        novos = buscar_desde(ultimo)
+        if novos is None or len(novos) == 0:
+            return
+
+        novos = np.asarray(novos).astype(RATES_DTYPE)
+        novos = novos[novos["time"] >= ultimo]
+        if len(novos) == 0:
+            return
+
+        # Posiciona sobre o último registro se ele for reenviado
+        pos = em_cache - 1 if novos[0]["time"] == ultimo else em_cache
+
+        with open(arquivo, "r+b") as f:
+            f.seek(pos * RATES_DTYPE.itemsize)
+            f.write(novos.tobytes())
+
+    def _regravar(self, arquivo: str, rates: np.ndarray) -> bool:
+        """
+        Substitui o arquivo de forma atômica.
+
+        Returns:
+            bool: False se o arquivo estiver em uso e não puder ser
+            substituído (Windows).
+        """
+        fd, temporario = tempfile.mkstemp(dir=self.diretorio, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(rates.tobytes())
+            os.replace(temporario, arquivo)
+            return True
+        except PermissionError:
+            log.warning(f"Cache em uso, regravacao adiada: {arquivo}")
+            os.remove(temporario)
+            return False
+
+    def _compactar(self, arquivo: str, limit: int) -> None:
+        """
+        Mantém apenas os candles mais recentes quando o arquivo passa do
+        dobro do limite configurado.
+        """
+        manter = max(self.max_barras, limit)
+        if self._contar(arquivo) <= 2 * manter:
+            return
+
+        rates = np.array(self._ler(arquivo)[-manter:])
+        self._regravar(arquivo, rates)
+
+    def _descartar_antigos(self) -> None:
+        """
+        Remove arquivos de cache sem atualização há mais de `max_dias`.
+        """
+        limite = time.time() - self.max_dias * 86400
+        try:
+            nomes = os.listdir(self.diretorio)
+        except OSError:
+            return
+
+        for nome in nomes:
+            if not nome.endswith(_EXTENSAO):
+                continue
+            arquivo = os.path.join(self.diretorio, nome)
+            try:
+                if os.path.getmtime(arquivo) < limite:
+                    os.remove(arquivo)
+            except OSError:
+                # Em uso por outro processo ou já removido
+                continue
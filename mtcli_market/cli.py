@@ -1,29 +1,225 @@
 """
 Interface de linha de comando (CLI) para exibição do Market Profile.
+
+Apenas o click e a configuração são importados no carregamento do módulo; a
+camada de controle, o cálculo (numpy) e a fonte de dados são importados
+quando o comando é executado, para que a ajuda e o registro do plugin sejam
+rápidos.
 """
 
+import calendar
+import datetime
+import time
+
 import click
 
+from . import timings
 from .conf import (
+    BACKEND,
+    BARRAS_BLOCO,
     BY,
+    CACHE,
     CRITERIO_HVN,
+    DERIVAR_DIA,
+    FONTE,
+    FORMATO,
     IB,
+    JANELA_TICKS,
     LIMIT,
     MARKET,
+    MEMO,
     PERIOD,
+    POOL,
+    POOL_EXPORTACAO,
     RANGE,
+    REPLAY_DIR,
+    REPLAY_LATENCIA,
+    REPLAY_VELOCIDADE,
+    SERVIDOR,
+    SERVIDOR_PENDENTES,
+    SERVIDOR_PORTA,
     SYMBOL,
+    TIMINGS_ARQUIVO,
+    TPO_PERIODO,
+    VA_MODO,
+    WORKERS,
 )
-from .controller import obter_profile
-from .view import exibir_profile
 from .market_config import MARKETS
 
+#: Backends de dados (ver `datasource.BACKENDS`), repetidos aqui para que a
+#: ajuda do comando não importe o numpy
+BACKENDS = ("mt5", "replay")
+
+#: Formatos de saída (ver `view.FORMATOS`), pelo mesmo motivo
+FORMATOS = ("text", "json", "csv", "ndjson")
+
+#: Critérios de HVN/LVN (ver `nodes.CRITERIOS_HVN`), pelo mesmo motivo
+CRITERIOS_HVN = ("mult", "std", "percentil", "picos")
+
+
+def _ler_symbols(symbols: str | None, watchlist) -> list[str]:
+    """
+    Junta os ativos de `--symbols` (separados por vírgula) e do arquivo de
+    watchlist (um por linha; linhas vazias e iniciadas por # são ignoradas).
+    """
+    lista = []
+    if symbols:
+        lista.extend(s.strip() for s in symbols.split(","))
+    if watchlist is not None:
+        lista.extend(linha.split("#", 1)[0].strip() for linha in watchlist)
+
+    vistos = []
+    for s in lista:
+        if s and s not in vistos:
+            vistos.append(s)
+    return vistos
+
+
+def _ler_percents(valor: str | None) -> tuple[float, ...]:
+    """
+    Converte "0.5,0.9" em (0.5, 0.9), validando o intervalo (0, 1].
+    """
+    if not valor:
+        return ()
+
+    try:
+        percents = tuple(float(v) for v in valor.split(",") if v.strip())
+    except ValueError as e:
+        raise click.BadParameter("va-percents deve ser uma lista de numeros.") from e
+
+    if any(p <= 0 or p > 1 for p in percents):
+        raise click.BadParameter("va-percents deve estar no intervalo (0, 1].")
+
+    return percents
+
+
+def _ler_blocos(valor: str) -> tuple[float, ...]:
+    """
+    Converte "5,25,100" em (5.0, 25.0, 100.0), sem repetições e na ordem
+    informada.
+    """
+    try:
+        blocos = tuple(dict.fromkeys(float(v) for v in valor.split(",") if v.strip()))
+    except ValueError as e:
+        raise click.BadParameter("Bloco deve ser um numero ou lista de numeros.") from e
+
+    if not blocos or any(b <= 0 for b in blocos):
+        raise click.BadParameter("Bloco deve ser maior que zero.")
+
+    return blocos
+
+
+def _timestamp(data: datetime.datetime) -> int:
+    """Data/hora informada (horário do servidor) como timestamp."""
+    return calendar.timegm(data.timetuple())
+
+
+def _exibir_progresso(numero: int, inicio: int, candles: int, segundos: float):
+    data = datetime.datetime.utcfromtimestamp(inicio)
+    taxa = candles / segundos if segundos > 0 else float("inf")
+    click.echo(
+        f"Bloco {numero}: {data:%Y-%m-%d %H:%M} {candles} candles "
+        f"em {segundos:.3f}s ({taxa:,.0f} candles/s)",
+        err=True,
+    )
+
+
+def _iniciar_timings(exibir: bool, arquivo: str | None, contexto: dict) -> None:
+    """
+    Liga a instrumentação e agenda, para o fim do comando, a exibição do
+    resumo (stderr) e/ou a gravação em JSON lines.
+    """
+    timings.ativar()
+    inicio = time.perf_counter()
+
+    def finalizar():
+        total = time.perf_counter() - inicio
+        if exibir:
+            for linha in timings.formatar_resumo():
+                click.echo(linha, err=True)
+            click.echo(f"{'total':<14} {total * 1000:10.2f} ms", err=True)
+        if arquivo:
+            timings.gravar_jsonl(arquivo, total_segundos=total, **contexto)
+
+    click.get_current_context().call_on_close(finalizar)
+
+
+def _consultar_servidor(
+    porta: int,
+    fonte_dados: str,
+    symbols: list[str],
+    parametros: dict,
+    usar_memo: bool,
+    formato: str,
+    verbose: bool,
+) -> str | None:
+    """Saída calculada pelo servidor residente, ou None sem servidor."""
+    from .server import consultar
+
+    parametros = {k: v for k, v in parametros.items() if k != "symbol"}
+    pedido = {
+        "fonte": fonte_dados,
+        "symbols": symbols,
+        "parametros": {**parametros, "usar_memo": usar_memo},
+        "formato": formato,
+        "verbose": verbose,
+    }
+    return consultar(pedido, porta)
+
+
+def _servir(
+    porta: int,
+    fonte_dados: str,
+    backend: str,
+    replay_dir: str,
+    latencia: float,
+    velocidade: float,
+) -> None:
+    from .datasource import criar_fonte, definir_fonte
+    from .server import HOST, servir
+
+    definir_fonte(criar_fonte(backend, replay_dir, latencia, velocidade))
+    click.echo(
+        f"Servidor do Market Profile em {HOST}:{porta} (Ctrl+C encerra).", err=True
+    )
+    servir(porta, fonte_dados, SERVIDOR_PENDENTES)
+
+
+#: Formatos aceitos em --from/--to
+_FORMATOS_DATA = ["%Y-%m-%d", "%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M", "%Y-%m-%d %H:%M:%S"]
+
 
 @click.command()
 @click.version_option(package_name="mtcli-market")
 @click.option(
     "--symbol", "-s", default=SYMBOL, show_default=True, help="Codigo do ativo."
 )
+@click.option(
+    "--symbols",
+    "-ss",
+    default=None,
+    help="Varios ativos separados por virgula (ex: WIN$N,WDO$N).",
+)
+@click.option(
+    "--watchlist",
+    type=click.File("r", encoding="utf-8"),
+    default=None,
+    help="Arquivo com um ativo por linha.",
+)
+@click.option(
+    "--workers",
+    default=WORKERS,
+    show_default=True,
+    type=click.IntRange(min=0),
+    help="Workers do calculo de varios ativos (0 = padrao do pool).",
+)
+@click.option(
+    "--pool",
+    type=click.Choice(["processo", "thread"]),
+    default=POOL,
+    show_default=True,
+    help="Tipo de pool do calculo de varios ativos.",
+)
 @click.option(
     "--period",
     "-p",
@@ -42,17 +238,26 @@ from .market_config import MARKETS
 @click.option(
     "--block",
     "-k",
-    default=RANGE,
+    default=f"{RANGE:g}",
     show_default=True,
-    type=float,
-    help="Tamanho do bloco de pontos.",
+    help="Tamanho do bloco de pontos. Uma lista (ex: 5,25,100) calcula um "
+    "profile por tamanho com um unico binning; os tamanhos devem ser "
+    "multiplos do menor.",
 )
 @click.option(
     "--by",
-    type=click.Choice(["tpo", "tick", "volume"]),
+    type=click.Choice(["tpo", "tick", "volume", "letras"]),
     default=BY,
     show_default=True,
-    help="Base para o profile.",
+    help="Base para o profile (letras: TPO por periodo da ultima sessao).",
+)
+@click.option(
+    "--periodo-letras",
+    "-pt",
+    default=TPO_PERIODO,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Minutos de cada letra no profile de letras.",
 )
 @click.option(
     "--initial-balance",
@@ -70,11 +275,24 @@ from .market_config import MARKETS
     type=float,
     help="Percentual da Value Area.",
 )
+@click.option(
+    "--va-percents",
+    "-vas",
+    default=None,
+    help="Percentuais adicionais de Value Area separados por virgula (ex: 0.5,0.9).",
+)
+@click.option(
+    "--va-modo",
+    type=click.Choice(["expansao", "gulosa"]),
+    default=VA_MODO,
+    show_default=True,
+    help="Calculo da Value Area: expansao a partir do POC ou gulosa.",
+)
 @click.option(
     "--criterio-hvn",
     "-ch",
     default=CRITERIO_HVN,
-    type=click.Choice(["mult", "std", "percentil"]),
+    type=click.Choice(CRITERIOS_HVN),
     show_default=True,
     help="Criterio para calculo de HVN/LVN.",
 )
@@ -110,6 +328,24 @@ from .market_config import MARKETS
     type=float,
     help="Percentil inferior para LVN.",
 )
+@click.option(
+    "--suavizacao-hvn",
+    "-sh",
+    default=5,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Largura, em niveis, do kernel gaussiano que suaviza o volume "
+    "(criterio picos).",
+)
+@click.option(
+    "--proeminencia-hvn",
+    "-prh",
+    default=0.1,
+    show_default=True,
+    type=click.FloatRange(min=0),
+    help="Proeminencia minima de picos e vales, como fracao do maior volume "
+    "suavizado (criterio picos).",
+)
 @click.option(
     "--market",
     "-m",
@@ -118,6 +354,183 @@ from .market_config import MARKETS
     show_default=True,
     help="Mercado para timezone offset.",
 )
+@click.option(
+    "--from",
+    "data_inicio",
+    type=click.DateTime(formats=_FORMATOS_DATA),
+    default=None,
+    help="Inicio do intervalo (horario do servidor); substitui --limit.",
+)
+@click.option(
+    "--to",
+    "data_fim",
+    type=click.DateTime(formats=_FORMATOS_DATA),
+    default=None,
+    help="Fim do intervalo, exclusivo (padrao: agora). Exige --from.",
+)
+@click.option(
+    "--barras-bloco",
+    "-bb",
+    default=BARRAS_BLOCO,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Candles lidos por requisicao com --from/--to.",
+)
+@click.option(
+    "--fonte",
+    "-f",
+    type=click.Choice(["rates", "ticks"]),
+    default=FONTE,
+    show_default=True,
+    help="Fonte dos dados: candles ou ticks (by tick ou volume).",
+)
+@click.option(
+    "--janela-ticks",
+    "-jt",
+    default=JANELA_TICKS,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Minutos de ticks lidos por vez com --fonte ticks.",
+)
+@click.option(
+    "--sessoes",
+    "-se",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Exibe um profile para cada uma das ultimas N sessoes.",
+)
+@click.option(
+    "--composto",
+    is_flag=True,
+    default=False,
+    help="Com --sessoes, exibe um unico profile composto das N sessoes.",
+)
+@click.option(
+    "--desenvolvimento",
+    "-dev",
+    is_flag=True,
+    default=False,
+    help="Exibe POC, VAH e VAL apos cada candle da ultima sessao.",
+)
+@click.option(
+    "--publicar",
+    "-pub",
+    is_flag=True,
+    default=False,
+    help="Publica o profile em um arquivo mapeado em memoria, lido por outros "
+    "processos (com --watch, a cada atualizacao).",
+)
+@click.option(
+    "--publicar-arquivo",
+    default=None,
+    type=click.Path(dir_okay=False),
+    help="Arquivo da publicacao (padrao: <CACHE_DIR>/publicacao/<ativo>.mmap).",
+)
+@click.option(
+    "--watch",
+    "-w",
+    "intervalo",
+    default=None,
+    type=click.FloatRange(min=0, min_open=True),
+    metavar="INTERVALO",
+    help="Atualiza o profile dos ultimos --limit candles a cada INTERVALO "
+    "segundos (Ctrl+C encerra).",
+)
+@click.option(
+    "--backend",
+    "-bk",
+    type=click.Choice(BACKENDS),
+    default=BACKEND,
+    show_default=True,
+    help="Fonte de dados: terminal MT5 ou arquivos gravados (replay).",
+)
+@click.option(
+    "--replay-dir",
+    default=REPLAY_DIR,
+    show_default=True,
+    type=click.Path(file_okay=False),
+    help="Pasta dos arquivos <ativo>_<timeframe>.npy e <ativo>_ticks.npy.",
+)
+@click.option(
+    "--replay-latencia",
+    default=REPLAY_LATENCIA,
+    show_default=True,
+    type=click.FloatRange(min=0),
+    help="Latencia simulada, em segundos, de cada requisicao do replay.",
+)
+@click.option(
+    "--replay-velocidade",
+    default=REPLAY_VELOCIDADE,
+    show_default=True,
+    type=click.FloatRange(min=0),
+    help="Segundos de mercado liberados por segundo real (0: todos os dados).",
+)
+@click.option(
+    "--cache/--no-cache",
+    "usar_cache",
+    default=CACHE,
+    show_default=True,
+    help="Usa o cache de rates em disco, buscando no MT5 apenas candles novos.",
+)
+@click.option(
+    "--serve",
+    "servir",
+    is_flag=True,
+    default=False,
+    help="Executa o servidor residente, que mantem a conexao e os calculos "
+    "em memoria para as proximas consultas.",
+)
+@click.option(
+    "--servidor/--sem-servidor",
+    "usar_servidor",
+    default=SERVIDOR,
+    show_default=True,
+    help="Envia a consulta ao servidor residente, quando em execucao.",
+)
+@click.option(
+    "--porta",
+    default=SERVIDOR_PORTA,
+    show_default=True,
+    type=click.IntRange(1, 65535),
+    help="Porta local do servidor residente.",
+)
+@click.option(
+    "--memo/--no-memo",
+    "usar_memo",
+    default=MEMO,
+    show_default=True,
+    help="Reaproveita o histograma ja calculado para os mesmos candles, "
+    "recalculando apenas VA, HVN/LVN e IB.",
+)
+@click.option(
+    "--derivar-dia/--dia-d1",
+    "derivar_estatisticas",
+    default=DERIVAR_DIA,
+    show_default=True,
+    help="Calcula os dados do dia pelos rates intraday quando cobrem o pregao.",
+)
+@click.option(
+    "--format",
+    "-fmt",
+    "formato",
+    type=click.Choice(FORMATOS),
+    default=FORMATO,
+    show_default=True,
+    help="Formato da saida: text, json, csv (um nivel por linha) ou ndjson.",
+)
+@click.option(
+    "--timings",
+    "medir_tempos",
+    is_flag=True,
+    default=False,
+    help="Exibe tempo e contadores de cada etapa (conexao, transferencia...).",
+)
+@click.option(
+    "--timings-arquivo",
+    default=TIMINGS_ARQUIVO or None,
+    type=click.Path(dir_okay=False),
+    help="Acrescenta os tempos por etapa a um arquivo JSON lines.",
+)
 @click.option(
     "--verbose",
     "-vv",
@@ -128,31 +541,73 @@ from .market_config import MARKETS
 )
 def profile(
     symbol,
+    symbols,
+    watchlist,
+    workers,
+    pool,
     period,
     limit,
     block,
     by,
+    periodo_letras,
     initial_balance,
     va_percent,
+    va_percents,
+    va_modo,
     criterio_hvn,
     mult_hvn,
     mult_lvn,
     percentil_hvn,
     percentil_lvn,
+    suavizacao_hvn,
+    proeminencia_hvn,
     market,
+    data_inicio,
+    data_fim,
+    barras_bloco,
+    fonte,
+    janela_ticks,
+    sessoes,
+    composto,
+    desenvolvimento,
+    publicar,
+    publicar_arquivo,
+    intervalo,
+    backend,
+    replay_dir,
+    replay_latencia,
+    replay_velocidade,
+    usar_cache,
+    usar_memo,
+    servir,
+    usar_servidor,
+    porta,
+    derivar_estatisticas,
+    formato,
+    medir_tempos,
+    timings_arquivo,
     verbose,
 ):
     """
     Calcula e exibe o Market Profile de um ativo.
     """
-
     if va_percent <= 0 or va_percent > 1:
         raise click.BadParameter("va-percent deve estar no intervalo (0, 1].")
 
-    if block <= 0:
-        raise click.BadParameter("Bloco deve ser maior que zero.")
+    blocos = _ler_blocos(block)
+    block = blocos[0]
+
+    from .server import descrever_fonte
 
-    resultado = obter_profile(
+    fonte_dados = descrever_fonte(backend, replay_dir)
+
+    if servir:
+        _servir(
+            porta, fonte_dados, backend, replay_dir, replay_latencia, replay_velocidade
+        )
+        return
+
+    parametros = dict(
         symbol=symbol,
         period=period,
         limit=int(limit),
@@ -160,15 +615,561 @@ def profile(
         by=by,
         ib_minutes=initial_balance,
         va_percent=va_percent,
+        va_percents=_ler_percents(va_percents),
+        va_modo=va_modo,
+        criterio_hvn=criterio_hvn,
+        mult_hvn=mult_hvn,
+        mult_lvn=mult_lvn,
+        percentil_hvn=percentil_hvn,
+        percentil_lvn=percentil_lvn,
+        suavizacao_hvn=suavizacao_hvn,
+        proeminencia_hvn=proeminencia_hvn,
+        market=market,
+        usar_cache=usar_cache,
+        derivar_estatisticas=derivar_estatisticas,
+    )
+
+    lista = _ler_symbols(symbols, watchlist)
+
+    if len(blocos) > 1 and (
+        lista
+        or intervalo is not None
+        or sessoes is not None
+        or data_inicio is not None
+        or fonte == "ticks"
+        or by == "letras"
+    ):
+        raise click.BadParameter(
+            "Varios blocos nao podem ser combinados com --symbols, --watch, "
+            "--sessoes, --from/--to, --fonte ticks ou --by letras."
+        )
+
+    # Com --servidor, consultas simples vão ao servidor residente, se estiver
+    # em execução
+    if (
+        usar_servidor
+        and len(blocos) == 1
+        and by != "letras"
+        and fonte == "rates"
+        and data_inicio is None
+        and data_fim is None
+        and sessoes is None
+        and intervalo is None
+        and not desenvolvimento
+        and not publicar
+        and not (medir_tempos or timings_arquivo)
+    ):
+        saida = _consultar_servidor(
+            porta,
+            fonte_dados,
+            lista or [symbol],
+            parametros,
+            usar_memo,
+            formato,
+            verbose,
+        )
+        if saida is not None:
+            click.echo(saida, nl=False)
+            return
+
+    from .controller import (
+        acompanhar_profile,
+        obter_desenvolvimento,
+        obter_letras,
+        obter_profile,
+        obter_profile_blocos,
+        obter_profile_intervalo,
+        obter_profile_ticks,
+        obter_profiles,
+        obter_profiles_por_sessao,
+    )
+    from .datasource import criar_fonte, definir_fonte
+    from .view import (
+        exibir_desenvolvimento,
+        exibir_letras,
+        exibir_profile,
+        exibir_profiles,
+    )
+
+    if medir_tempos or timings_arquivo:
+        _iniciar_timings(
+            medir_tempos,
+            timings_arquivo,
+            {"symbol": symbols or symbol, "period": period, "by": by, "block": block},
+        )
+
+    definir_fonte(criar_fonte(backend, replay_dir, replay_latencia, replay_velocidade))
+
+    publicador = None
+    if publicar:
+        if (
+            lista
+            or sessoes is not None
+            or desenvolvimento
+            or by == "letras"
+            or len(blocos) > 1
+        ):
+            raise click.BadParameter(
+                "--publicar nao pode ser combinado com --symbols, --sessoes, "
+                "--desenvolvimento, --by letras ou varios blocos."
+            )
+
+        from .publisher import ProfilePublisher, caminho_publicacao
+
+        publicador = ProfilePublisher(publicar_arquivo or caminho_publicacao(symbol))
+        click.get_current_context().call_on_close(publicador.fechar)
+
+    def exibir(resultado):
+        if publicador is not None:
+            publicador.publicar(resultado, symbol)
+        exibir_profile(resultado, symbol=symbol, verbose=verbose, formato=formato)
+
+    if desenvolvimento:
+        if (
+            lista
+            or intervalo is not None
+            or sessoes is not None
+            or data_inicio is not None
+            or fonte == "ticks"
+            or by == "letras"
+            or len(blocos) > 1
+        ):
+            raise click.BadParameter(
+                "--desenvolvimento nao pode ser combinado com --symbols, --watch, "
+                "--sessoes, --from/--to, --fonte ticks, --by letras ou varios blocos."
+            )
+
+        resultado = obter_desenvolvimento(
+            symbol=symbol,
+            period=period,
+            limit=int(limit),
+            block=float(block),
+            by=by,
+            va_percent=va_percent,
+            va_modo=va_modo,
+            usar_cache=usar_cache,
+            market=market,
+        )
+        exibir_desenvolvimento(resultado, symbol=symbol, formato=formato)
+        return
+
+    if by == "letras":
+        if lista or intervalo is not None or sessoes is not None:
+            raise click.BadParameter(
+                "--by letras nao pode ser combinado com --symbols, --watch ou --sessoes."
+            )
+
+        resultado = obter_letras(
+            symbol=symbol,
+            period=period,
+            limit=int(limit),
+            block=float(block),
+            periodo_minutos=periodo_letras,
+            ib_minutes=initial_balance,
+            market=market,
+            usar_cache=usar_cache,
+        )
+        exibir_letras(resultado, symbol=symbol, formato=formato)
+        return
+
+    if data_fim is not None and data_inicio is None:
+        raise click.BadParameter("--to exige --from.")
+
+    inicio = fim = None
+    if data_inicio is not None:
+        if lista or intervalo is not None or sessoes is not None:
+            raise click.BadParameter(
+                "--from/--to nao pode ser combinado com --symbols, --watch "
+                "ou --sessoes."
+            )
+
+        inicio = _timestamp(data_inicio)
+        if data_fim is not None:
+            fim = _timestamp(data_fim)
+        if fim is not None and fim <= inicio:
+            raise click.BadParameter("--to deve ser posterior a --from.")
+
+    if inicio is not None and fonte == "rates":
+        resultado = obter_profile_intervalo(
+            symbol=symbol,
+            period=period,
+            inicio=inicio,
+            fim=fim,
+            block=float(block),
+            by=by,
+            barras_por_bloco=barras_bloco,
+            ib_minutes=initial_balance,
+            va_percent=va_percent,
+            va_percents=parametros["va_percents"],
+            va_modo=va_modo,
+            criterio_hvn=criterio_hvn,
+            mult_hvn=mult_hvn,
+            mult_lvn=mult_lvn,
+            percentil_hvn=percentil_hvn,
+            percentil_lvn=percentil_lvn,
+            suavizacao_hvn=suavizacao_hvn,
+            proeminencia_hvn=proeminencia_hvn,
+            market=market,
+            progresso=_exibir_progresso if verbose else None,
+        )
+        exibir(resultado)
+        return
+
+    if fonte == "ticks":
+        if lista or intervalo is not None or sessoes is not None:
+            raise click.BadParameter(
+                "--fonte ticks nao pode ser combinado com --symbols, --watch ou --sessoes."
+            )
+        if by not in ("tick", "volume"):
+            raise click.BadParameter("--fonte ticks exige --by tick ou volume.")
+
+        resultado = obter_profile_ticks(
+            symbol=symbol,
+            block=float(block),
+            by=by,
+            janela_minutos=janela_ticks,
+            ib_minutes=initial_balance,
+            va_percent=va_percent,
+            va_percents=parametros["va_percents"],
+            va_modo=va_modo,
+            criterio_hvn=criterio_hvn,
+            mult_hvn=mult_hvn,
+            mult_lvn=mult_lvn,
+            percentil_hvn=percentil_hvn,
+            percentil_lvn=percentil_lvn,
+            suavizacao_hvn=suavizacao_hvn,
+            proeminencia_hvn=proeminencia_hvn,
+            market=market,
+            inicio=inicio,
+            fim=fim,
+        )
+        exibir(resultado)
+        return
+
+    if composto and sessoes is None:
+        raise click.BadParameter("--composto exige --sessoes.")
+
+    if sessoes is not None:
+        if lista or intervalo is not None:
+            raise click.BadParameter(
+                "--sessoes nao pode ser combinado com --symbols ou --watch."
+            )
+
+        resultados = obter_profiles_por_sessao(
+            sessoes=sessoes, composto=composto, **parametros
+        )
+        # No texto a sessão vai no título; nos demais formatos, em campo próprio
+        exibir_profiles(
+            [
+                (f"{symbol} {r['sessao']}" if formato == "text" else symbol, r)
+                for r in resultados
+            ],
+            formato=formato,
+            verbose=verbose,
+        )
+        return
+
+    if len(blocos) > 1:
+        del parametros["block"]
+        try:
+            resultados = obter_profile_blocos(
+                blocks=blocos, usar_memo=usar_memo, **parametros
+            )
+        except ValueError as e:
+            raise click.BadParameter(str(e)) from e
+        exibir_profiles(
+            [(symbol, r) for r in resultados], formato=formato, verbose=verbose
+        )
+        return
+
+    if lista:
+        if intervalo is not None:
+            raise click.BadParameter("--watch aceita apenas um ativo.")
+
+        del parametros["symbol"]
+        resultados = obter_profiles(
+            lista,
+            workers=workers or None,
+            pool=pool,
+            usar_memo=usar_memo,
+            **parametros,
+        )
+        exibir_profiles(list(resultados.items()), formato=formato, verbose=verbose)
+        return
+
+    if intervalo is not None:
+        try:
+            for resultado in acompanhar_profile(intervalo=intervalo, **parametros):
+                exibir(resultado)
+        except KeyboardInterrupt:
+            click.echo("Acompanhamento encerrado.", err=formato != "text")
+        return
+
+    resultado = obter_profile(usar_memo=usar_memo, **parametros)
+
+    exibir(resultado)
+
+
+@click.command()
+@click.option(
+    "--symbol", "-s", default=SYMBOL, show_default=True, help="Codigo do ativo."
+)
+@click.option(
+    "--period",
+    "-p",
+    default=PERIOD,
+    show_default=True,
+    help="Timeframe dos candles.",
+)
+@click.option(
+    "--from",
+    "data_inicio",
+    type=click.DateTime(formats=_FORMATOS_DATA),
+    required=True,
+    help="Inicio do intervalo (horario do servidor).",
+)
+@click.option(
+    "--to",
+    "data_fim",
+    type=click.DateTime(formats=_FORMATOS_DATA),
+    default=None,
+    help="Fim do intervalo, exclusivo (padrao: agora).",
+)
+@click.option(
+    "--saida",
+    "-o",
+    type=click.Path(dir_okay=False),
+    required=True,
+    help="Arquivo CSV de saida, uma linha por sessao.",
+)
+@click.option(
+    "--block",
+    "-k",
+    default=RANGE,
+    show_default=True,
+    type=click.FloatRange(min=0, min_open=True),
+    help="Tamanho do bloco de pontos.",
+)
+@click.option(
+    "--by",
+    type=click.Choice(["tpo", "tick", "volume"]),
+    default=BY if BY != "letras" else "tpo",
+    show_default=True,
+    help="Base para o profile.",
+)
+@click.option(
+    "--initial-balance",
+    "-ib",
+    default=IB,
+    show_default=True,
+    type=int,
+    help="Duracao em minutos do Initial Balance.",
+)
+@click.option(
+    "--va-percent",
+    "-va",
+    default=0.7,
+    show_default=True,
+    type=click.FloatRange(min=0, max=1, min_open=True),
+    help="Percentual da Value Area.",
+)
+@click.option(
+    "--va-modo",
+    type=click.Choice(["expansao", "gulosa"]),
+    default=VA_MODO,
+    show_default=True,
+    help="Calculo da Value Area: expansao a partir do POC ou gulosa.",
+)
+@click.option(
+    "--criterio-hvn",
+    "-ch",
+    default=CRITERIO_HVN,
+    type=click.Choice(CRITERIOS_HVN),
+    show_default=True,
+    help="Criterio para calculo de HVN/LVN.",
+)
+@click.option(
+    "--mult-hvn",
+    "-mh",
+    default=1.5,
+    show_default=True,
+    type=float,
+    help="Multiplicador da media para HVN (criterio mult).",
+)
+@click.option(
+    "--mult-lvn",
+    "-ml",
+    default=0.5,
+    show_default=True,
+    type=float,
+    help="Multiplicador da media para LVN (criterio mult).",
+)
+@click.option(
+    "--percentil-hvn",
+    "-ph",
+    default=80,
+    show_default=True,
+    type=float,
+    help="Percentil superior para HVN.",
+)
+@click.option(
+    "--percentil-lvn",
+    "-pl",
+    default=20,
+    show_default=True,
+    type=float,
+    help="Percentil inferior para LVN.",
+)
+@click.option(
+    "--suavizacao-hvn",
+    "-sh",
+    default=5,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Largura do kernel de suavizacao (criterio picos).",
+)
+@click.option(
+    "--proeminencia-hvn",
+    "-prh",
+    default=0.1,
+    show_default=True,
+    type=click.FloatRange(min=0),
+    help="Proeminencia minima de picos e vales (criterio picos).",
+)
+@click.option(
+    "--market",
+    "-m",
+    type=click.Choice(sorted(MARKETS.keys())),
+    default=MARKET,
+    show_default=True,
+    help="Mercado para timezone offset.",
+)
+@click.option(
+    "--workers",
+    default=WORKERS,
+    show_default=True,
+    type=click.IntRange(min=0),
+    help="Workers do calculo (0 = um por nucleo).",
+)
+@click.option(
+    "--pool",
+    type=click.Choice(["processo", "thread"]),
+    default=POOL_EXPORTACAO,
+    show_default=True,
+    help="Tipo de pool do calculo.",
+)
+@click.option(
+    "--lote",
+    default=20,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Sessoes calculadas por tarefa do pool.",
+)
+@click.option(
+    "--barras-bloco",
+    "-bb",
+    default=BARRAS_BLOCO,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Candles lidos por requisicao.",
+)
+@click.option(
+    "--backend",
+    "-bk",
+    type=click.Choice(BACKENDS),
+    default=BACKEND,
+    show_default=True,
+    help="Fonte de dados: terminal MT5 ou arquivos gravados (replay).",
+)
+@click.option(
+    "--replay-dir",
+    default=REPLAY_DIR,
+    show_default=True,
+    type=click.Path(file_okay=False),
+    help="Pasta dos arquivos <ativo>_<timeframe>.npy e <ativo>_ticks.npy.",
+)
+def exportar(
+    symbol,
+    period,
+    data_inicio,
+    data_fim,
+    saida,
+    block,
+    by,
+    initial_balance,
+    va_percent,
+    va_modo,
+    criterio_hvn,
+    mult_hvn,
+    mult_lvn,
+    percentil_hvn,
+    percentil_lvn,
+    suavizacao_hvn,
+    proeminencia_hvn,
+    market,
+    workers,
+    pool,
+    lote,
+    barras_bloco,
+    backend,
+    replay_dir,
+):
+    """
+    Exporta POC, VA, HVN/LVN e IB de cada sessao do intervalo para um CSV.
+
+    Uma exportacao interrompida continua do ultimo checkpoint quando
+    repetida com os mesmos parametros.
+    """
+    from .controller import exportar_profiles
+    from .datasource import criar_fonte, definir_fonte
+
+    definir_fonte(criar_fonte(backend, replay_dir))
+
+    ultimo = [0.0]
+
+    def progresso(sessoes: int, sessao: str, segundos: float) -> None:
+        # No máximo uma linha por segundo
+        if segundos - ultimo[0] >= 1:
+            ultimo[0] = segundos
+            click.echo(
+                f"{sessoes} sessoes ate {sessao} ({sessoes / segundos:,.1f} sessoes/s)",
+                err=True,
+            )
+
+    resultado = exportar_profiles(
+        symbol=symbol,
+        period=period,
+        inicio=_timestamp(data_inicio),
+        fim=_timestamp(data_fim) if data_fim is not None else None,
+        arquivo=saida,
+        block=block,
+        by=by,
+        ib_minutes=initial_balance,
+        va_percent=va_percent,
         criterio_hvn=criterio_hvn,
         mult_hvn=mult_hvn,
         mult_lvn=mult_lvn,
         percentil_hvn=percentil_hvn,
         percentil_lvn=percentil_lvn,
+        suavizacao_hvn=suavizacao_hvn,
+        proeminencia_hvn=proeminencia_hvn,
         market=market,
+        va_modo=va_modo,
+        workers=workers or None,
+        pool=pool,
+        barras_por_bloco=barras_bloco,
+        sessoes_por_lote=lote,
+        progresso=progresso,
     )
 
-    exibir_profile(resultado, symbol=symbol, verbose=verbose)
+    segundos = resultado["segundos"]
+    taxa = resultado["sessoes"] / segundos if segundos > 0 else 0.0
+    retomada = " (retomada do checkpoint)" if resultado["retomada"] else ""
+    click.echo(
+        f"{resultado['sessoes']} sessoes exportadas em {segundos:.2f}s "
+        f"({taxa:,.1f} sessoes/s){retomada}; {resultado['total']} no arquivo {saida}.",
+        err=True,
+    )
 
 
 if __name__ == "__main__":
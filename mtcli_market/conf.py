@@ -14,8 +14,34 @@ Parâmetros configuráveis:
 - RANGE    : Tamanho do bloco do Market Profile
 - BY       : Base do profile (tpo, tick, volume)
 - IB       : Duração do Initial Balance em minutos
-- CRITERIO_HVN : Critério para calcular HVN e LVN(std, mult, percentil)
+- BARRAS_BLOCO : Candles lidos por requisição com --from/--to
+- FONTE    : Fonte dos dados do profile (rates, ticks)
+- JANELA_TICKS : Minutos de ticks lidos por vez com a fonte de ticks
+- TPO_PERIODO : Duração em minutos de cada letra do profile de letras
+- CRITERIO_HVN : Critério para calcular HVN e LVN(std, mult, percentil, picos)
+- FORMATO  : Formato da saída (text, json, csv, ndjson)
 - DIGITOS  : Quantidade de casas decimais na exibição
+- VA_MODO  : Cálculo da Value Area (expansao, gulosa)
+- DERIVAR_DIA : Calcula as estatísticas do dia a partir dos rates intraday
+- WORKERS  : Workers do cálculo de vários ativos (0 = padrão do pool)
+- POOL     : Tipo de pool do cálculo de vários ativos (processo, thread)
+- POOL_EXPORTACAO : Tipo de pool do cálculo das sessões no mp-export
+- BACKEND  : Fonte de dados (mt5, replay)
+- REPLAY_DIR : Pasta dos arquivos do backend replay
+- REPLAY_LATENCIA   : Latência simulada, em segundos, de cada requisição
+- REPLAY_VELOCIDADE : Segundos de mercado por segundo real no replay (0 = tudo)
+- TIMINGS_ARQUIVO : Arquivo JSON lines para gravar os tempos por etapa
+- CACHE    : Ativa o cache de rates em disco
+- CACHE_DIR: Pasta do cache de rates
+- CACHE_MAX_BARRAS : Candles mantidos por arquivo de cache
+- CACHE_MAX_DIAS   : Dias sem uso até o arquivo de cache ser removido
+- MEMO     : Guarda os histogramas calculados para reaproveitar o binning
+- MEMO_ITENS : Histogramas mantidos em memória
+- MEMO_DISCO : Também guarda os histogramas em disco, entre execuções
+- MEMO_MAX_ARQUIVOS : Histogramas mantidos em disco
+- SERVIDOR : Envia as consultas ao servidor residente, quando em execução
+- SERVIDOR_PORTA : Porta local do servidor residente
+- SERVIDOR_PENDENTES : Cálculos distintos aceitos ao mesmo tempo pelo servidor
 """
 
 import os
@@ -40,15 +66,177 @@ BY = os.getenv("BY", config["DEFAULT"].get("by", fallback="tpo"))
 #: Duração do Initial Balance em minutos
 IB = int(os.getenv("IB", str(config["DEFAULT"].getint("ib", fallback=30))))
 
+#: Candles por requisição na leitura de intervalos de datas (--from/--to)
+BARRAS_BLOCO = int(
+    os.getenv(
+        "BARRAS_BLOCO", str(config["DEFAULT"].getint("barras_bloco", fallback=50000))
+    )
+)
+
+#: Fonte dos dados do profile: "rates" (candles) ou "ticks"
+FONTE = os.getenv("FONTE", config["DEFAULT"].get("fonte", fallback="rates"))
+
+#: Minutos de ticks lidos por requisição com a fonte de ticks
+JANELA_TICKS = int(
+    os.getenv(
+        "JANELA_TICKS", str(config["DEFAULT"].getint("janela_ticks", fallback=60))
+    )
+)
+
+#: Duração em minutos de cada período (letra) do profile de letras
+TPO_PERIODO = int(
+    os.getenv("TPO_PERIODO", str(config["DEFAULT"].getint("tpo_periodo", fallback=30)))
+)
+
 #: Quantidade de casas decimais para exibição no terminal
 DIGITOS = int(
     os.getenv("DIGITOS", str(config["DEFAULT"].getint("digitos", fallback=0)))
 )
 
-#: Critério para calcular HVN e LVN: "std", "mult" ou "percentil"
+#: Formato da saída: "text", "json", "csv" ou "ndjson"
+FORMATO = os.getenv("FORMATO", config["DEFAULT"].get("formato", fallback="text"))
+
+#: Critério para calcular HVN e LVN: "std", "mult", "percentil" ou "picos"
 CRITERIO_HVN = os.getenv(
     "CRITERIO_HVN", config["DEFAULT"].get("criterio_hvn", fallback="percentil")
 )
 
+#: Cálculo da Value Area: "expansao" (a partir do POC) ou "gulosa"
+VA_MODO = os.getenv("VA_MODO", config["DEFAULT"].get("va_modo", fallback="expansao"))
+
 #: Meracado: "b3_fut", "b3_stk", "eua", "eua_summer"
 MARKET = os.getenv("MARKET", config["DEFAULT"].get("market", fallback="b3_fut"))
+
+#: Calcula abertura/fechamento/máxima/mínima do dia a partir dos rates
+#: intraday, quando cobrem o pregão, em vez de consultar o D1
+DERIVAR_DIA = os.getenv(
+    "DERIVAR_DIA", config["DEFAULT"].get("derivar_dia", fallback="nao")
+).lower() in ("1", "true", "sim", "yes")
+
+#: Quantidade de workers no cálculo de vários ativos (0 = padrão do pool)
+WORKERS = int(
+    os.getenv("WORKERS", str(config["DEFAULT"].getint("workers", fallback=0)))
+)
+
+#: Tipo de pool no cálculo de vários ativos: "processo" ou "thread"
+POOL = os.getenv("POOL", config["DEFAULT"].get("pool", fallback="thread"))
+
+#: Tipo de pool no cálculo das sessões exportadas: "processo" ou "thread"
+POOL_EXPORTACAO = os.getenv(
+    "POOL_EXPORTACAO",
+    config["DEFAULT"].get("pool_exportacao", fallback="processo"),
+)
+
+#: Fonte de dados: "mt5" (terminal) ou "replay" (arquivos gravados)
+BACKEND = os.getenv("BACKEND", config["DEFAULT"].get("backend", fallback="mt5"))
+
+#: Pasta dos arquivos do backend replay
+REPLAY_DIR = os.getenv(
+    "REPLAY_DIR",
+    config["DEFAULT"].get(
+        "replay_dir",
+        fallback=os.path.join(os.path.expanduser("~"), ".mtcli_market", "replay"),
+    ),
+)
+
+#: Latência simulada, em segundos, de cada requisição ao backend replay
+REPLAY_LATENCIA = float(
+    os.getenv(
+        "REPLAY_LATENCIA", str(config["DEFAULT"].get("replay_latencia", fallback="0"))
+    )
+)
+
+#: Segundos de mercado liberados por segundo real no replay (0 = todos)
+REPLAY_VELOCIDADE = float(
+    os.getenv(
+        "REPLAY_VELOCIDADE",
+        str(config["DEFAULT"].get("replay_velocidade", fallback="0")),
+    )
+)
+
+#: Arquivo JSON lines onde os tempos por etapa são acrescentados ("" = não grava)
+TIMINGS_ARQUIVO = os.getenv(
+    "TIMINGS_ARQUIVO", config["DEFAULT"].get("timings_arquivo", fallback="")
+)
+
+#: Ativa o cache de rates em disco
+CACHE = os.getenv("CACHE", config["DEFAULT"].get("cache", fallback="nao")).lower() in (
+    "1",
+    "true",
+    "sim",
+    "yes",
+)
+
+#: Pasta dos arquivos de cache de rates
+CACHE_DIR = os.getenv(
+    "CACHE_DIR",
+    config["DEFAULT"].get(
+        "cache_dir",
+        fallback=os.path.join(os.path.expanduser("~"), ".mtcli_market", "cache"),
+    ),
+)
+
+#: Quantidade de candles mantidos por arquivo de cache
+CACHE_MAX_BARRAS = int(
+    os.getenv(
+        "CACHE_MAX_BARRAS",
+        str(config["DEFAULT"].getint("cache_max_barras", fallback=200000)),
+    )
+)
+
+#: Dias sem atualização até um arquivo de cache ser removido
+CACHE_MAX_DIAS = float(
+    os.getenv(
+        "CACHE_MAX_DIAS", str(config["DEFAULT"].get("cache_max_dias", fallback="30"))
+    )
+)
+
+#: Guarda os histogramas calculados, recalculando apenas as métricas quando
+#: os mesmos rates são consultados com outros parâmetros
+MEMO = os.getenv("MEMO", config["DEFAULT"].get("memo", fallback="sim")).lower() in (
+    "1",
+    "true",
+    "sim",
+    "yes",
+)
+
+#: Quantidade de histogramas mantidos em memória
+MEMO_ITENS = int(
+    os.getenv("MEMO_ITENS", str(config["DEFAULT"].getint("memo_itens", fallback=32)))
+)
+
+#: Guarda os histogramas também em disco (pasta "histogramas" do cache)
+MEMO_DISCO = os.getenv(
+    "MEMO_DISCO", config["DEFAULT"].get("memo_disco", fallback="nao")
+).lower() in ("1", "true", "sim", "yes")
+
+#: Quantidade de histogramas mantidos em disco
+MEMO_MAX_ARQUIVOS = int(
+    os.getenv(
+        "MEMO_MAX_ARQUIVOS",
+        str(config["DEFAULT"].getint("memo_max_arquivos", fallback=500)),
+    )
+)
+
+#: Envia as consultas ao servidor residente (mt mp --serve), quando ele
+#: estiver em execução
+SERVIDOR = os.getenv(
+    "SERVIDOR", config["DEFAULT"].get("servidor", fallback="nao")
+).lower() in ("1", "true", "sim", "yes")
+
+#: Porta local (127.0.0.1) do servidor residente
+SERVIDOR_PORTA = int(
+    os.getenv(
+        "SERVIDOR_PORTA",
+        str(config["DEFAULT"].getint("servidor_porta", fallback=47800)),
+    )
+)
+
+#: Cálculos distintos aceitos ao mesmo tempo pelo servidor; os excedentes
+#: são recusados e calculados pelo próprio cliente
+SERVIDOR_PENDENTES = int(
+    os.getenv(
+        "SERVIDOR_PENDENTES",
+        str(config["DEFAULT"].getint("servidor_pendentes", fallback=16)),
+    )
+)
@@ -2,35 +2,58 @@
 Camada de controle do módulo Market Profile.
 """
 
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import datetime
+from functools import partial
+import time
+
+import numpy as np
+
 from mtcli.logger import setup_logger
 
+from .accumulator import ProfileAccumulator
+from .developing import calcular_desenvolvimento
+from .export import exportar_sessoes
 from .market_config import MARKETS
 from .model import (
+    _janela_ib,
+    cache_histogramas,
     calcular_profile,
+    calcular_profiles_blocos,
+    fatores_blocos,
+    histograma_em_cache,
     obter_estatisticas_do_dia,
     obter_rates,
+    obter_rates_desde,
+    obter_rates_e_estatisticas,
+    obter_rates_em_blocos,
+    obter_tempo_ultimo_tick,
+    obter_ticks_em_blocos,
+    sessao_mt5,
 )
+from .nodes import CRITERIOS_HVN
+from .sessions import inicio_sessao, profiles_por_sessao, separar_sessoes
+from .ticks import MODOS_TICKS, acumular_ticks
+from .timings import etapa
+from .tpo_letters import calcular_letras
+from .value_area import MODOS_VA
 
 log = setup_logger()
 
 
-def obter_profile(
-    symbol: str,
-    period: str,
-    limit: int,
-    block: float,
+def _normalizar_parametros(
     by: str,
-    ib_minutes: int = 30,
-    va_percent: float = 0.7,
-    criterio_hvn: str = "mult",
-    mult_hvn: float = 1.5,
-    mult_lvn: float = 0.5,
-    percentil_hvn: float = 90,
-    percentil_lvn: float = 10,
-    market: str = "b3_fut",
-):
+    va_percent: float,
+    block: float,
+    criterio_hvn: str,
+    market: str,
+    va_modo: str = "expansao",
+    va_percents: Sequence[float] = (),
+) -> tuple[str, float, float, str, dict, str, tuple[float, ...]]:
     """
-    Orquestra a obtenção e cálculo do Market Profile.
+    Valida os parâmetros do profile, substituindo valores inválidos pelos
+    padrões, e resolve a configuração do mercado.
     """
 
     # -------- validações defensivas --------
@@ -43,6 +66,12 @@ def obter_profile(
         log.warning("va_percent fora do intervalo (0,1]. Usando 0.7.")
         va_percent = 0.7
 
+    if va_modo not in MODOS_VA:
+        log.warning(f"va_modo invalido ({va_modo}). Usando 'expansao'.")
+        va_modo = "expansao"
+
+    va_percents = tuple(p for p in va_percents if 0 < p <= 1)
+
     try:
         block = float(block)
         if block <= 0:
@@ -51,7 +80,7 @@ def obter_profile(
         log.warning(f"Bloco invalido ({block}). Usando 1.0.")
         block = 1.0
 
-    if criterio_hvn not in ("mult", "std", "percentil"):
+    if criterio_hvn not in CRITERIOS_HVN:
         log.warning("criterio_hvn invalido. Usando 'mult'.")
         criterio_hvn = "mult"
 
@@ -63,14 +92,70 @@ def obter_profile(
 
     market_cfg = MARKETS.get(market, MARKETS["b3_fut"])
 
+    return by, va_percent, block, criterio_hvn, market_cfg, va_modo, va_percents
+
+
+def obter_profile(
+    symbol: str,
+    period: str,
+    limit: int,
+    block: float,
+    by: str,
+    ib_minutes: int = 30,
+    va_percent: float = 0.7,
+    criterio_hvn: str = "mult",
+    mult_hvn: float = 1.5,
+    mult_lvn: float = 0.5,
+    percentil_hvn: float = 90,
+    percentil_lvn: float = 10,
+    suavizacao_hvn: int = 5,
+    proeminencia_hvn: float = 0.1,
+    market: str = "b3_fut",
+    va_modo: str = "expansao",
+    va_percents: Sequence[float] = (),
+    usar_cache: bool = False,
+    derivar_estatisticas: bool = False,
+    usar_memo: bool = False,
+):
+    """
+    Orquestra a obtenção e cálculo do Market Profile.
+
+    Com `usar_memo`, o histograma é procurado no cache de histogramas
+    (`model.cache_histogramas`) e, se encontrado, apenas as métricas são
+    recalculadas.
+    """
+
+    (
+        by,
+        va_percent,
+        block,
+        criterio_hvn,
+        market_cfg,
+        va_modo,
+        va_percents,
+    ) = _normalizar_parametros(
+        by, va_percent, block, criterio_hvn, market, va_modo, va_percents
+    )
+
     # -------- dados --------
 
-    rates = obter_rates(symbol, period, limit)
+    rates, estatisticas = obter_rates_e_estatisticas(
+        symbol,
+        period,
+        limit,
+        usar_cache=usar_cache,
+        derivar_estatisticas=derivar_estatisticas,
+    )
+
+    chave = histograma = None
+    if usar_memo:
+        chave, histograma = histograma_em_cache(symbol, period, block, by, rates)
 
     resultado = calcular_profile(
         rates=rates,
         block=block,
         by=by,
+        histograma=histograma,
         ib_minutes=ib_minutes,
         va_percent=va_percent,
         timeframe=period,
@@ -79,6 +164,10 @@ def obter_profile(
         mult_lvn=mult_lvn,
         percentil_hvn=percentil_hvn,
         percentil_lvn=percentil_lvn,
+        suavizacao_hvn=suavizacao_hvn,
+        proeminencia_hvn=proeminencia_hvn,
+        va_modo=va_modo,
+        va_percents=va_percents,
         market_start_hour=market_cfg.get("hour", 9),
         market_start_minute=market_cfg.get("minute", 0),
         market_timezone_offset=market_cfg.get("utc_offset", -3),
@@ -87,7 +176,782 @@ def obter_profile(
     if not resultado:
         resultado = {}
 
-    estatisticas = obter_estatisticas_do_dia(symbol)
+    if chave is not None and histograma is None:
+        cache_histogramas().guardar(chave, resultado["profile"])
+
+    resultado["estatisticas_dia"] = estatisticas
+
+    return resultado
+
+
+def obter_profile_blocos(
+    symbol: str,
+    period: str,
+    limit: int,
+    blocks: Sequence[float],
+    by: str,
+    ib_minutes: int = 30,
+    va_percent: float = 0.7,
+    criterio_hvn: str = "mult",
+    mult_hvn: float = 1.5,
+    mult_lvn: float = 0.5,
+    percentil_hvn: float = 90,
+    percentil_lvn: float = 10,
+    suavizacao_hvn: int = 5,
+    proeminencia_hvn: float = 0.1,
+    market: str = "b3_fut",
+    va_modo: str = "expansao",
+    va_percents: Sequence[float] = (),
+    usar_cache: bool = False,
+    derivar_estatisticas: bool = False,
+    usar_memo: bool = False,
+) -> list[dict]:
+    """
+    Market Profile do ativo em vários tamanhos de bloco, com uma única
+    leitura dos rates e um único binning (ver `model.calcular_profiles_blocos`).
+
+    Raises:
+        ValueError: Se algum bloco não for múltiplo inteiro do menor.
+
+    Returns:
+        list[dict]: Um resultado por bloco, do menor para o maior.
+    """
+    fatores = fatores_blocos(blocks)
+
+    (
+        by,
+        va_percent,
+        fino,
+        criterio_hvn,
+        market_cfg,
+        va_modo,
+        va_percents,
+    ) = _normalizar_parametros(
+        by, va_percent, fatores[0][0], criterio_hvn, market, va_modo, va_percents
+    )
+
+    rates, estatisticas = obter_rates_e_estatisticas(
+        symbol,
+        period,
+        limit,
+        usar_cache=usar_cache,
+        derivar_estatisticas=derivar_estatisticas,
+    )
+
+    chave = histograma = None
+    if usar_memo:
+        chave, histograma = histograma_em_cache(symbol, period, fino, by, rates)
+
+    resultados = calcular_profiles_blocos(
+        rates,
+        [block for block, _ in fatores],
+        by=by,
+        histograma=histograma,
+        ib_minutes=ib_minutes,
+        va_percent=va_percent,
+        timeframe=period,
+        criterio_hvn=criterio_hvn,
+        mult_hvn=mult_hvn,
+        mult_lvn=mult_lvn,
+        percentil_hvn=percentil_hvn,
+        percentil_lvn=percentil_lvn,
+        suavizacao_hvn=suavizacao_hvn,
+        proeminencia_hvn=proeminencia_hvn,
+        va_modo=va_modo,
+        va_percents=va_percents,
+        market_start_hour=market_cfg.get("hour", 9),
+        market_start_minute=market_cfg.get("minute", 0),
+        market_timezone_offset=market_cfg.get("utc_offset", -3),
+    )
+
+    if chave is not None and histograma is None:
+        cache_histogramas().guardar(chave, resultados[0]["profile"])
+
+    for resultado in resultados:
+        resultado["estatisticas_dia"] = estatisticas
+
+    return resultados
+
+
+def obter_profile_ticks(
+    symbol: str,
+    block: float,
+    by: str,
+    janela_minutos: int = 60,
+    ib_minutes: int = 30,
+    va_percent: float = 0.7,
+    criterio_hvn: str = "mult",
+    mult_hvn: float = 1.5,
+    mult_lvn: float = 0.5,
+    percentil_hvn: float = 90,
+    percentil_lvn: float = 10,
+    suavizacao_hvn: int = 5,
+    proeminencia_hvn: float = 0.1,
+    market: str = "b3_fut",
+    va_modo: str = "expansao",
+    va_percents: Sequence[float] = (),
+    inicio: int | None = None,
+    fim: int | None = None,
+):
+    """
+    Calcula o Market Profile a partir dos ticks da sessão atual ou do
+    intervalo [inicio, fim), timestamps no horário do servidor.
+
+    Os ticks são lidos em janelas de `janela_minutos` e cada janela é
+    somada ao histograma e descartada, mantendo a memória limitada.
+    """
+
+    (
+        by,
+        va_percent,
+        block,
+        criterio_hvn,
+        market_cfg,
+        va_modo,
+        va_percents,
+    ) = _normalizar_parametros(
+        by, va_percent, block, criterio_hvn, market, va_modo, va_percents
+    )
+
+    if by not in MODOS_TICKS:
+        log.warning(f"Com ticks, 'by' deve ser tick ou volume ({by}). Usando 'tick'.")
+        by = "tick"
+
+    if janela_minutos <= 0:
+        log.warning(f"janela_minutos invalido ({janela_minutos}). Usando 60.")
+        janela_minutos = 60
+
+    pregao = dict(
+        ib_minutes=ib_minutes,
+        market_start_hour=market_cfg.get("hour", 9),
+        market_start_minute=market_cfg.get("minute", 0),
+        market_timezone_offset=market_cfg.get("utc_offset", -3),
+    )
+
+    with sessao_mt5():
+        if fim is None:
+            fim = obter_tempo_ultimo_tick(symbol) + 1
+        if inicio is None:
+            inicio, _ = _janela_ib(
+                fim,
+                ib_minutes,
+                pregao["market_start_hour"],
+                pregao["market_start_minute"],
+                pregao["market_timezone_offset"],
+            )
+
+        # Apenas negócios têm volume; para contagem usa todos os ticks
+        blocos = obter_ticks_em_blocos(
+            symbol,
+            inicio,
+            fim,
+            janela_segundos=janela_minutos * 60,
+            so_negocios=by == "volume",
+        )
+        acumulador = acumular_ticks(blocos, block, by, **pregao)
+
+        estatisticas = obter_estatisticas_do_dia(symbol)
+
+    resultado = acumulador.resultado(
+        va_percent=va_percent,
+        criterio_hvn=criterio_hvn,
+        mult_hvn=mult_hvn,
+        mult_lvn=mult_lvn,
+        percentil_hvn=percentil_hvn,
+        percentil_lvn=percentil_lvn,
+        suavizacao_hvn=suavizacao_hvn,
+        proeminencia_hvn=proeminencia_hvn,
+        timeframe="ticks",
+        va_modo=va_modo,
+        va_percents=va_percents,
+    )
     resultado["estatisticas_dia"] = estatisticas
 
     return resultado
+
+
+def obter_profile_intervalo(
+    symbol: str,
+    period: str,
+    inicio: int,
+    fim: int | None,
+    block: float,
+    by: str,
+    barras_por_bloco: int = 50000,
+    ib_minutes: int = 30,
+    va_percent: float = 0.7,
+    criterio_hvn: str = "mult",
+    mult_hvn: float = 1.5,
+    mult_lvn: float = 0.5,
+    percentil_hvn: float = 90,
+    percentil_lvn: float = 10,
+    suavizacao_hvn: int = 5,
+    proeminencia_hvn: float = 0.1,
+    market: str = "b3_fut",
+    va_modo: str = "expansao",
+    va_percents: Sequence[float] = (),
+    progresso=None,
+):
+    """
+    Calcula o Market Profile dos candles entre `inicio` (inclusive) e `fim`
+    (exclusivo), timestamps no horário do servidor. Sem `fim`, vai até o
+    último tick do ativo.
+
+    Os candles são lidos em blocos de até `barras_por_bloco` e somados ao
+    histograma um bloco por vez.
+
+    Args:
+        progresso (Callable | None): Chamado após cada bloco com
+            (numero, inicio_do_bloco, candles, segundos).
+    """
+
+    (
+        by,
+        va_percent,
+        block,
+        criterio_hvn,
+        market_cfg,
+        va_modo,
+        va_percents,
+    ) = _normalizar_parametros(
+        by, va_percent, block, criterio_hvn, market, va_modo, va_percents
+    )
+
+    acumulador = ProfileAccumulator(
+        block=block,
+        by=by,
+        ib_minutes=ib_minutes,
+        market_start_hour=market_cfg.get("hour", 9),
+        market_start_minute=market_cfg.get("minute", 0),
+        market_timezone_offset=market_cfg.get("utc_offset", -3),
+    )
+
+    with sessao_mt5():
+        if fim is None:
+            fim = obter_tempo_ultimo_tick(symbol) + 1
+
+        blocos = obter_rates_em_blocos(symbol, period, inicio, fim, barras_por_bloco)
+        numero = 0
+        antes = time.perf_counter()
+        for rates in blocos:
+            acumulador.adicionar(rates)
+            agora = time.perf_counter()
+            numero += 1
+            if progresso is not None:
+                progresso(numero, int(rates["time"][0]), len(rates), agora - antes)
+            antes = agora
+
+    resultado = acumulador.resultado(
+        va_percent=va_percent,
+        criterio_hvn=criterio_hvn,
+        mult_hvn=mult_hvn,
+        mult_lvn=mult_lvn,
+        percentil_hvn=percentil_hvn,
+        percentil_lvn=percentil_lvn,
+        suavizacao_hvn=suavizacao_hvn,
+        proeminencia_hvn=proeminencia_hvn,
+        timeframe=period,
+        va_modo=va_modo,
+        va_percents=va_percents,
+    )
+    # Dados do último dia do intervalo, quando os candles o cobrem
+    resultado["estatisticas_dia"] = acumulador.estatisticas_dia
+
+    return resultado
+
+
+def _calcular_com_histograma(rates, histograma, **parametros):
+    # Função de módulo para poder ser enviada aos workers do pool de processos
+    return calcular_profile(rates, histograma=histograma, **parametros)
+
+
+def obter_profiles(
+    symbols: list[str],
+    period: str,
+    limit: int,
+    block: float,
+    by: str,
+    ib_minutes: int = 30,
+    va_percent: float = 0.7,
+    criterio_hvn: str = "mult",
+    mult_hvn: float = 1.5,
+    mult_lvn: float = 0.5,
+    percentil_hvn: float = 90,
+    percentil_lvn: float = 10,
+    suavizacao_hvn: int = 5,
+    proeminencia_hvn: float = 0.1,
+    market: str = "b3_fut",
+    va_modo: str = "expansao",
+    va_percents: Sequence[float] = (),
+    usar_cache: bool = False,
+    derivar_estatisticas: bool = False,
+    workers: int | None = None,
+    pool: str = "thread",
+    usar_memo: bool = False,
+) -> dict[str, dict]:
+    """
+    Calcula o Market Profile de vários ativos em uma única execução.
+
+    Todos os dados são obtidos dentro de uma só conexão com o MT5; o cálculo
+    dos profiles é distribuído em um pool de processos ou threads.
+
+    Args:
+        workers (int | None): Quantidade de workers do pool. Com 1, o
+            cálculo é feito no próprio processo. None usa o padrão do pool.
+        pool (str): "thread" ou "processo".
+        usar_memo (bool): Reaproveita os histogramas em cache; os workers
+            recebem o histograma pronto e calculam apenas as métricas.
+
+    Returns:
+        dict[str, dict]: Resultado por ativo, na ordem recebida.
+    """
+
+    (
+        by,
+        va_percent,
+        block,
+        criterio_hvn,
+        market_cfg,
+        va_modo,
+        va_percents,
+    ) = _normalizar_parametros(
+        by, va_percent, block, criterio_hvn, market, va_modo, va_percents
+    )
+
+    dados = {}
+    with sessao_mt5():
+        for symbol in symbols:
+            dados[symbol] = obter_rates_e_estatisticas(
+                symbol,
+                period,
+                limit,
+                usar_cache=usar_cache,
+                derivar_estatisticas=derivar_estatisticas,
+            )
+
+    calcular = partial(
+        _calcular_com_histograma,
+        block=block,
+        by=by,
+        ib_minutes=ib_minutes,
+        va_percent=va_percent,
+        timeframe=period,
+        criterio_hvn=criterio_hvn,
+        mult_hvn=mult_hvn,
+        mult_lvn=mult_lvn,
+        percentil_hvn=percentil_hvn,
+        percentil_lvn=percentil_lvn,
+        suavizacao_hvn=suavizacao_hvn,
+        proeminencia_hvn=proeminencia_hvn,
+        va_modo=va_modo,
+        va_percents=va_percents,
+        market_start_hour=market_cfg.get("hour", 9),
+        market_start_minute=market_cfg.get("minute", 0),
+        market_timezone_offset=market_cfg.get("utc_offset", -3),
+    )
+
+    # Arrays simples (não memmap) para envio aos workers
+    lista_rates = [np.asarray(rates) for rates, _ in dados.values()]
+
+    chaves = [None] * len(dados)
+    histogramas = [None] * len(dados)
+    if usar_memo:
+        for i, (symbol, rates) in enumerate(zip(dados, lista_rates, strict=True)):
+            chaves[i], histogramas[i] = histograma_em_cache(
+                symbol, period, block, by, rates
+            )
+
+    # Etapas medidas dentro de outros processos não chegam aqui; o tempo
+    # total do cálculo é registrado nesta etapa
+    with etapa("calculo", ativos=len(symbols)):
+        if workers == 1 or len(symbols) <= 1:
+            calculados = list(map(calcular, lista_rates, histogramas))
+        else:
+            executor = ProcessPoolExecutor if pool == "processo" else ThreadPoolExecutor
+            with executor(max_workers=workers) as ex:
+                calculados = list(ex.map(calcular, lista_rates, histogramas))
+
+    resultados = {}
+    for symbol, resultado, chave, histograma in zip(
+        dados, calculados, chaves, histogramas, strict=True
+    ):
+        if chave is not None and histograma is None:
+            cache_histogramas().guardar(chave, resultado["profile"])
+        resultado["estatisticas_dia"] = dados[symbol][1]
+        resultados[symbol] = resultado
+
+    return resultados
+
+
+def obter_profiles_por_sessao(
+    symbol: str,
+    period: str,
+    limit: int,
+    block: float,
+    by: str,
+    sessoes: int,
+    composto: bool = False,
+    ib_minutes: int = 30,
+    va_percent: float = 0.7,
+    criterio_hvn: str = "mult",
+    mult_hvn: float = 1.5,
+    mult_lvn: float = 0.5,
+    percentil_hvn: float = 90,
+    percentil_lvn: float = 10,
+    suavizacao_hvn: int = 5,
+    proeminencia_hvn: float = 0.1,
+    market: str = "b3_fut",
+    va_modo: str = "expansao",
+    va_percents: Sequence[float] = (),
+    usar_cache: bool = False,
+    derivar_estatisticas: bool = False,
+) -> list[dict]:
+    """
+    Calcula o Market Profile de cada uma das últimas `sessoes` sessões
+    presentes nos rates, ou o profile composto delas.
+
+    Todas as sessões são montadas em uma única passada sobre os rates; o
+    composto é a soma dos histogramas das sessões.
+
+    Returns:
+        list[dict]: Um resultado por sessão (da mais antiga à mais recente),
+        ou um único resultado com `composto`. Cada resultado traz a chave
+        `sessao` com a data (ou o intervalo de datas).
+    """
+
+    (
+        by,
+        va_percent,
+        block,
+        criterio_hvn,
+        market_cfg,
+        va_modo,
+        va_percents,
+    ) = _normalizar_parametros(
+        by, va_percent, block, criterio_hvn, market, va_modo, va_percents
+    )
+
+    rates, estatisticas = obter_rates_e_estatisticas(
+        symbol,
+        period,
+        limit,
+        usar_cache=usar_cache,
+        derivar_estatisticas=derivar_estatisticas,
+    )
+    if len(rates) == 0:
+        return []
+
+    rates = np.asarray(rates)
+    inicio = inicio_sessao(
+        market_cfg.get("hour", 9),
+        market_cfg.get("minute", 0),
+        market_cfg.get("utc_offset", -3),
+        referencia=int(rates["time"][0]),
+    )
+    por_sessao = profiles_por_sessao(rates, block, by, inicio)
+    total = len(por_sessao)
+    primeira = max(total - max(int(sessoes), 1), 0)
+    limites = np.append(por_sessao.inicios, len(rates))
+
+    if composto:
+        rotulo = f"{por_sessao.data(primeira)} a {por_sessao.data(total - 1)}"
+        selecao = [(rotulo, por_sessao.composto(primeira), primeira, total)]
+    else:
+        selecao = [
+            (str(por_sessao.data(i)), por_sessao.sessao(i), i, i + 1)
+            for i in range(primeira, total)
+        ]
+
+    resultados = []
+    for rotulo, histograma, ini, fim in selecao:
+        resultado = calcular_profile(
+            rates=rates[limites[ini] : limites[fim]],
+            block=block,
+            by=by,
+            ib_minutes=ib_minutes,
+            va_percent=va_percent,
+            timeframe=period,
+            criterio_hvn=criterio_hvn,
+            mult_hvn=mult_hvn,
+            mult_lvn=mult_lvn,
+            percentil_hvn=percentil_hvn,
+            percentil_lvn=percentil_lvn,
+            suavizacao_hvn=suavizacao_hvn,
+            proeminencia_hvn=proeminencia_hvn,
+            va_modo=va_modo,
+            va_percents=va_percents,
+            market_start_hour=market_cfg.get("hour", 9),
+            market_start_minute=market_cfg.get("minute", 0),
+            market_timezone_offset=market_cfg.get("utc_offset", -3),
+            histograma=histograma,
+        )
+        resultado["sessao"] = rotulo
+        # Os dados do dia só se aplicam à sessão mais recente
+        resultado["estatisticas_dia"] = estatisticas if fim == total else None
+        resultados.append(resultado)
+
+    return resultados
+
+
+def obter_letras(
+    symbol: str,
+    period: str,
+    limit: int,
+    block: float,
+    periodo_minutos: int = 30,
+    ib_minutes: int = 30,
+    market: str = "b3_fut",
+    usar_cache: bool = False,
+) -> dict:
+    """
+    Obtém os rates e calcula o profile de letras (TPO por período) da
+    sessão mais recente.
+    """
+
+    _, _, block, _, market_cfg, _, _ = _normalizar_parametros(
+        "tpo", 0.7, block, "mult", market
+    )
+
+    if periodo_minutos <= 0:
+        log.warning(f"periodo_minutos invalido ({periodo_minutos}). Usando 30.")
+        periodo_minutos = 30
+
+    rates = obter_rates(symbol, period, limit, usar_cache=usar_cache)
+
+    return calcular_letras(
+        rates,
+        block,
+        periodo_minutos=periodo_minutos,
+        ib_minutes=ib_minutes,
+        market_start_hour=market_cfg.get("hour", 9),
+        market_start_minute=market_cfg.get("minute", 0),
+        market_timezone_offset=market_cfg.get("utc_offset", -3),
+    )
+
+
+def obter_desenvolvimento(
+    symbol: str,
+    period: str,
+    limit: int,
+    block: float,
+    by: str,
+    va_percent: float = 0.7,
+    va_modo: str = "expansao",
+    usar_cache: bool = False,
+    market: str = "b3_fut",
+) -> dict:
+    """
+    Obtém os rates e calcula POC, VAH e VAL após cada candle da sessão mais
+    recente (profile em desenvolvimento).
+
+    Returns:
+        dict: `sessao`, parâmetros usados e `serie`, array estruturado de
+        `developing.calcular_desenvolvimento` (vazio sem rates).
+    """
+
+    by, va_percent, block, _, market_cfg, va_modo, _ = _normalizar_parametros(
+        by, va_percent, block, "mult", market, va_modo
+    )
+
+    rates = np.asarray(obter_rates(symbol, period, limit, usar_cache=usar_cache))
+
+    sessao = None
+    if len(rates):
+        inicio = inicio_sessao(
+            market_cfg.get("hour", 9),
+            market_cfg.get("minute", 0),
+            market_cfg.get("utc_offset", -3),
+            referencia=int(rates["time"][0]),
+        )
+        _, inicios = separar_sessoes(rates["time"], inicio)
+        rates = rates[inicios[-1] :]
+        sessao = str(datetime.datetime.utcfromtimestamp(int(rates["time"][-1])).date())
+
+    with etapa("calculo"):
+        serie = calcular_desenvolvimento(rates, block, by, va_percent, va_modo)
+
+    return {
+        "sessao": sessao,
+        "timeframe": period,
+        "by": by,
+        "block": block,
+        "va_percent": va_percent,
+        "va_modo": va_modo,
+        "serie": serie,
+    }
+
+
+def exportar_profiles(
+    symbol: str,
+    period: str,
+    inicio: int,
+    fim: int | None,
+    arquivo: str,
+    block: float,
+    by: str,
+    ib_minutes: int = 30,
+    va_percent: float = 0.7,
+    criterio_hvn: str = "mult",
+    mult_hvn: float = 1.5,
+    mult_lvn: float = 0.5,
+    percentil_hvn: float = 90,
+    percentil_lvn: float = 10,
+    suavizacao_hvn: int = 5,
+    proeminencia_hvn: float = 0.1,
+    market: str = "b3_fut",
+    va_modo: str = "expansao",
+    workers: int | None = None,
+    pool: str = "processo",
+    barras_por_bloco: int = 50000,
+    sessoes_por_lote: int = 20,
+    progresso=None,
+) -> dict:
+    """
+    Exporta os níveis (POC, VA, HVN/LVN, IB) de cada sessão do intervalo
+    para um CSV, com o cálculo distribuído em um pool e retomada por
+    checkpoint (ver `export.exportar_sessoes`).
+    """
+
+    (
+        by,
+        va_percent,
+        block,
+        criterio_hvn,
+        market_cfg,
+        va_modo,
+        _,
+    ) = _normalizar_parametros(by, va_percent, block, criterio_hvn, market, va_modo)
+
+    parametros = dict(
+        block=block,
+        by=by,
+        ib_minutes=ib_minutes,
+        va_percent=va_percent,
+        timeframe=period,
+        criterio_hvn=criterio_hvn,
+        mult_hvn=mult_hvn,
+        mult_lvn=mult_lvn,
+        percentil_hvn=percentil_hvn,
+        percentil_lvn=percentil_lvn,
+        suavizacao_hvn=suavizacao_hvn,
+        proeminencia_hvn=proeminencia_hvn,
+        va_modo=va_modo,
+        market_start_hour=market_cfg.get("hour", 9),
+        market_start_minute=market_cfg.get("minute", 0),
+        market_timezone_offset=market_cfg.get("utc_offset", -3),
+    )
+
+    return exportar_sessoes(
+        symbol,
+        period,
+        inicio,
+        fim,
+        arquivo,
+        parametros,
+        workers=workers,
+        pool=pool,
+        barras_por_bloco=barras_por_bloco,
+        sessoes_por_lote=sessoes_por_lote,
+        progresso=progresso,
+    )
+
+
+def acompanhar_profile(
+    symbol: str,
+    period: str,
+    limit: int,
+    block: float,
+    by: str,
+    intervalo: float,
+    ib_minutes: int = 30,
+    va_percent: float = 0.7,
+    criterio_hvn: str = "mult",
+    mult_hvn: float = 1.5,
+    mult_lvn: float = 0.5,
+    percentil_hvn: float = 90,
+    percentil_lvn: float = 10,
+    suavizacao_hvn: int = 5,
+    proeminencia_hvn: float = 0.1,
+    market: str = "b3_fut",
+    va_modo: str = "expansao",
+    va_percents: Sequence[float] = (),
+    usar_cache: bool = False,
+    derivar_estatisticas: bool = False,
+):
+    """
+    Gera o Market Profile continuamente, a cada `intervalo` segundos.
+
+    A primeira consulta obtém `limit` candles; as seguintes buscam apenas os
+    candles a partir do último horário visto, atualizando o candle em
+    formação no lugar e retirando os que saem da janela dos `limit` mais
+    recentes, de modo que o resultado é o mesmo da consulta sem `--watch`.
+
+    A conexão com a fonte de dados fica aberta entre as consultas; se uma
+    delas não trouxer candles, a conexão é refeita no intervalo seguinte.
+    """
+
+    (
+        by,
+        va_percent,
+        block,
+        criterio_hvn,
+        market_cfg,
+        va_modo,
+        va_percents,
+    ) = _normalizar_parametros(
+        by, va_percent, block, criterio_hvn, market, va_modo, va_percents
+    )
+
+    acumulador = ProfileAccumulator(
+        block=block,
+        by=by,
+        ib_minutes=ib_minutes,
+        market_start_hour=market_cfg.get("hour", 9),
+        market_start_minute=market_cfg.get("minute", 0),
+        market_timezone_offset=market_cfg.get("utc_offset", -3),
+        janela=limit,
+    )
+
+    while True:
+        # Uma conexão durante todo o acompanhamento, refeita se uma consulta
+        # falhar
+        with sessao_mt5():
+            while True:
+                if acumulador.ultimo_tempo is None:
+                    rates = obter_rates(symbol, period, limit, usar_cache=usar_cache)
+                else:
+                    rates = obter_rates_desde(symbol, period, acumulador.ultimo_tempo)
+
+                # Com a conexão ativa, a consulta traz ao menos o último candle
+                if rates is None or len(rates) == 0:
+                    log.warning("Consulta sem candles; reconectando a fonte de dados.")
+                    break
+
+                acumulador.adicionar(rates)
+
+                estatisticas = (
+                    acumulador.estatisticas_dia if derivar_estatisticas else None
+                )
+                if estatisticas is None:
+                    estatisticas = obter_estatisticas_do_dia(symbol)
+
+                resultado = acumulador.resultado(
+                    va_percent=va_percent,
+                    criterio_hvn=criterio_hvn,
+                    mult_hvn=mult_hvn,
+                    mult_lvn=mult_lvn,
+                    percentil_hvn=percentil_hvn,
+                    percentil_lvn=percentil_lvn,
+                    suavizacao_hvn=suavizacao_hvn,
+                    proeminencia_hvn=proeminencia_hvn,
+                    timeframe=period,
+                    va_modo=va_modo,
+                    va_percents=va_percents,
+                )
+                resultado["estatisticas_dia"] = estatisticas
+
+                yield resultado
+
+                time.sleep(intervalo)
+
+        time.sleep(intervalo)
@@ -0,0 +1,314 @@
+"""
+Fontes de dados do Market Profile.
+
+O modelo obtém rates e ticks de uma `DataSource`, com a mesma interface das
+funções do pacote MetaTrader5. Duas implementações estão disponíveis:
+
+- mt5: terminal MetaTrader 5; o pacote é importado apenas ao conectar.
+- replay: arquivos gravados localmente (`<ativo>_<timeframe>.npy` e
+  `<ativo>_ticks.npy`), com latência simulada por requisição e, opcionalmente,
+  um relógio acelerado que libera os dados aos poucos, como em um pregão
+  ao vivo.
+
+Os códigos de timeframe e de cópia de ticks são os do MetaTrader 5,
+mantidos aqui para que o restante do pacote não dependa dele.
+"""
+
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager
+import os
+import re
+import time
+
+import numpy as np
+
+#: Códigos de timeframe do MetaTrader 5
+TIMEFRAMES = {
+    "M1": 1,
+    "M2": 2,
+    "M3": 3,
+    "M4": 4,
+    "M5": 5,
+    "M6": 6,
+    "M10": 10,
+    "M12": 12,
+    "M15": 15,
+    "M20": 20,
+    "M30": 30,
+    "H1": 16385,
+    "H2": 16386,
+    "H3": 16387,
+    "H4": 16388,
+    "H6": 16390,
+    "H8": 16392,
+    "H12": 16396,
+    "D1": 16408,
+    "W1": 32769,
+    "MN1": 49153,
+}
+
+#: Flags de `copy_ticks_range`
+COPY_TICKS_ALL = -1
+COPY_TICKS_INFO = 1
+COPY_TICKS_TRADE = 2
+
+#: Flags de tick com último negócio ou volume (TICK_FLAG_LAST | TICK_FLAG_VOLUME)
+_TICK_FLAG_NEGOCIO = 8 | 16
+
+BACKENDS = ("mt5", "replay")
+
+
+class DataSource(ABC):
+    """
+    Interface das fontes de rates e ticks.
+
+    Os métodos seguem as funções homônimas do MetaTrader5 e retornam None
+    quando não há dados.
+    """
+
+    #: Nome do backend
+    nome = ""
+
+    #: Se os rates desta fonte podem ser guardados no cache em disco
+    usa_cache = True
+
+    @abstractmethod
+    def conexao(self) -> AbstractContextManager:
+        """Contexto em que as consultas podem ser feitas."""
+
+    @abstractmethod
+    def copy_rates_from_pos(self, symbol: str, timeframe: int, pos: int, count: int):
+        """Últimos `count` candles, deslocados `pos` candles do atual."""
+
+    @abstractmethod
+    def copy_rates_range(self, symbol: str, timeframe: int, de: int, ate: int):
+        """Candles com horário em [de, ate]."""
+
+    @abstractmethod
+    def copy_ticks_range(self, symbol: str, de: int, ate: int, flags: int):
+        """Ticks com horário em [de, ate]."""
+
+    @abstractmethod
+    def tempo_ultimo_tick(self, symbol: str) -> int | None:
+        """Horário do último tick do ativo."""
+
+
+class MT5DataSource(DataSource):
+    """Terminal MetaTrader 5."""
+
+    nome = "mt5"
+
+    @staticmethod
+    def _mt5():
+        import MetaTrader5
+
+        return MetaTrader5
+
+    def conexao(self) -> AbstractContextManager:
+        from mtcli.mt5_context import mt5_conexao
+
+        return mt5_conexao()
+
+    def copy_rates_from_pos(self, symbol, timeframe, pos, count):
+        return self._mt5().copy_rates_from_pos(symbol, timeframe, pos, count)
+
+    def copy_rates_range(self, symbol, timeframe, de, ate):
+        return self._mt5().copy_rates_range(symbol, timeframe, de, ate)
+
+    def copy_ticks_range(self, symbol, de, ate, flags):
+        return self._mt5().copy_ticks_range(symbol, de, ate, flags)
+
+    def tempo_ultimo_tick(self, symbol):
+        tick = self._mt5().symbol_info_tick(symbol)
+        if tick is None or not tick.time:
+            return None
+        return int(tick.time)
+
+
+def _nome_timeframe(timeframe: int) -> str:
+    for nome, codigo in TIMEFRAMES.items():
+        if codigo == timeframe:
+            return nome
+    return str(timeframe)
+
+
+def arquivo_replay(diretorio: str, symbol: str, timeframe: int | None = None) -> str:
+    """
+    Caminho do arquivo de replay dos rates do timeframe ou, sem timeframe,
+    dos ticks do ativo.
+    """
+    sufixo = "ticks" if timeframe is None else _nome_timeframe(timeframe)
+    nome = re.sub(r"[^A-Za-z0-9_.$-]", "_", f"{symbol}_{sufixo}")
+    return os.path.join(diretorio, nome + ".npy")
+
+
+def gravar_replay(
+    diretorio: str, symbol: str, dados: np.ndarray, timeframe: int | None = None
+) -> str:
+    """
+    Grava rates (com `timeframe`) ou ticks (sem) para uso no replay.
+
+    Returns:
+        str: Caminho do arquivo gravado.
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    caminho = arquivo_replay(diretorio, symbol, timeframe)
+    np.save(caminho, np.asarray(dados))
+    return caminho
+
+
+class ReplayDataSource(DataSource):
+    """
+    Rates e ticks gravados em arquivos `.npy`.
+
+    Args:
+        diretorio (str): Pasta dos arquivos (ver `arquivo_replay`).
+        latencia (float): Segundos de espera simulada em cada requisição.
+        velocidade (float): Com valor positivo, os dados são liberados por
+            um relógio simulado que avança `velocidade` segundos de mercado
+            por segundo real; com zero, todos os dados ficam disponíveis.
+        inicio (int | None): Horário de mercado em que o relógio simulado
+            começa. Padrão: primeiro registro do último dia gravado.
+    """
+
+    nome = "replay"
+    usa_cache = False
+
+    def __init__(
+        self,
+        diretorio: str,
+        latencia: float = 0.0,
+        velocidade: float = 0.0,
+        inicio: int | None = None,
+    ) -> None:
+        self.diretorio = diretorio
+        self.latencia = latencia
+        self.velocidade = velocidade
+        self.inicio = inicio
+        self._arquivos: dict[str, np.ndarray | None] = {}
+        self._relogio: tuple[int, float] | None = None
+
+    @contextmanager
+    def conexao(self) -> Iterator[None]:
+        yield
+
+    def _carregar(self, caminho: str) -> np.ndarray | None:
+        if caminho not in self._arquivos:
+            try:
+                self._arquivos[caminho] = np.load(caminho, mmap_mode="r")
+            except OSError:
+                self._arquivos[caminho] = None
+        return self._arquivos[caminho]
+
+    def _agora(self, tempos: np.ndarray) -> int | None:
+        """Horário de mercado do relógio simulado (None sem relógio)."""
+        if self.velocidade <= 0:
+            return None
+        if self._relogio is None:
+            base = self.inicio
+            if base is None and len(tempos):
+                # Primeiro registro do último dia gravado
+                dia = int(tempos[-1]) // 86400 * 86400
+                base = int(tempos[np.searchsorted(tempos, dia, side="left")])
+            if base is None:
+                return None
+            self._relogio = (base, time.monotonic())
+        base, t0 = self._relogio
+        return int(base + (time.monotonic() - t0) * self.velocidade)
+
+    def _disponiveis(self, dados: np.ndarray | None) -> np.ndarray | None:
+        """Registros já liberados pelo relógio simulado, após a latência."""
+        if self.latencia > 0:
+            time.sleep(self.latencia)
+        if dados is None:
+            return None
+        agora = self._agora(dados["time"])
+        if agora is None:
+            return dados
+        return dados[: np.searchsorted(dados["time"], agora, side="right")]
+
+    def _faixa(self, dados: np.ndarray | None, de: int, ate: int):
+        dados = self._disponiveis(dados)
+        if dados is None:
+            return None
+        tempos = dados["time"]
+        ini = np.searchsorted(tempos, int(de), side="left")
+        fim = np.searchsorted(tempos, int(ate), side="right")
+        return np.array(dados[ini:fim])
+
+    def copy_rates_from_pos(self, symbol, timeframe, pos, count):
+        rates = self._disponiveis(
+            self._carregar(arquivo_replay(self.diretorio, symbol, timeframe))
+        )
+        if rates is None:
+            return None
+        fim = max(len(rates) - int(pos), 0)
+        return np.array(rates[max(fim - int(count), 0) : fim])
+
+    def copy_rates_range(self, symbol, timeframe, de, ate):
+        caminho = arquivo_replay(self.diretorio, symbol, timeframe)
+        return self._faixa(self._carregar(caminho), de, ate)
+
+    def copy_ticks_range(self, symbol, de, ate, flags):
+        caminho = arquivo_replay(self.diretorio, symbol)
+        ticks = self._faixa(self._carregar(caminho), de, ate)
+        if ticks is None or flags != COPY_TICKS_TRADE:
+            return ticks
+        if "flags" in ticks.dtype.names:
+            return ticks[(ticks["flags"] & _TICK_FLAG_NEGOCIO) != 0]
+        return ticks[ticks["last"] > 0]
+
+    def tempo_ultimo_tick(self, symbol):
+        ticks = self._disponiveis(
+            self._carregar(arquivo_replay(self.diretorio, symbol))
+        )
+        if ticks is not None and len(ticks):
+            return int(ticks["time"][-1])
+
+        # Sem ticks gravados, usa o último candle de qualquer timeframe
+        ultimos = []
+        for codigo in TIMEFRAMES.values():
+            caminho = arquivo_replay(self.diretorio, symbol, codigo)
+            if not os.path.exists(caminho):
+                continue
+            rates = self._disponiveis(self._carregar(caminho))
+            if rates is not None and len(rates):
+                ultimos.append(int(rates["time"][-1]))
+        return max(ultimos) if ultimos else None
+
+
+def criar_fonte(
+    backend: str,
+    replay_dir: str | None = None,
+    latencia: float = 0.0,
+    velocidade: float = 0.0,
+) -> DataSource:
+    """Cria a fonte de dados do backend informado."""
+    if backend == "mt5":
+        return MT5DataSource()
+    if backend == "replay":
+        if not replay_dir:
+            raise ValueError("O backend replay exige a pasta dos arquivos.")
+        return ReplayDataSource(replay_dir, latencia=latencia, velocidade=velocidade)
+    raise ValueError(f"Backend invalido ({backend}). Use: {', '.join(BACKENDS)}.")
+
+
+#: Fonte em uso; criada a partir da configuração no primeiro acesso
+_fonte: DataSource | None = None
+
+
+def obter_fonte() -> DataSource:
+    """Fonte de dados em uso."""
+    global _fonte
+    if _fonte is None:
+        from .conf import BACKEND, REPLAY_DIR, REPLAY_LATENCIA, REPLAY_VELOCIDADE
+
+        _fonte = criar_fonte(BACKEND, REPLAY_DIR, REPLAY_LATENCIA, REPLAY_VELOCIDADE)
+    return _fonte
+
+
+def definir_fonte(fonte: DataSource | None) -> None:
+    """Substitui a fonte em uso; None volta à fonte da configuração."""
+    global _fonte
+    _fonte = fonte
@@ -0,0 +1,124 @@
+"""
+Profile em desenvolvimento: POC, VAH e VAL candle a candle.
+
+Os candles são distribuídos nos blocos uma única vez (`_binning_vetorizado`)
+e somados a um histograma sobre a grade de preços de todo o período, um
+candle por vez. Como o volume de cada nível só cresce, o POC é mantido
+comparando apenas os níveis tocados pelo candle com o maior volume até
+então, e o volume total é somado a partir dos níveis de cada candle.
+
+A Value Area é recalculada a cada candle a partir desse POC, sobre a faixa
+de preços já negociada, com o mesmo algoritmo de `value_area`. Na expansão,
+qualquer candle pode inverter uma comparação entre os pares acima e abaixo
+da área, inclusive as primeiras a partir do POC; por isso a área do candle
+anterior não é reaproveitada. Em vez disso, `value_area._expansao` calcula
+todos os passos em poucas operações vetorizadas, e o custo de cada candle
+em Python é constante (O(níveis) em numpy).
+
+O resultado de cada candle é o de `model.calcular_profile` sobre os candles
+até ele, sem refazer o binning de cada prefixo, a menos do arredondamento
+do alvo da Value Area, cujo total é somado em outra ordem.
+"""
+
+import numpy as np
+
+from .model import _binning_vetorizado
+from .profile import Profile
+from .value_area import _expansao, calcular_value_areas
+
+#: Uma linha por candle: horário, POC, VAH e VAL (NaN antes do primeiro nível)
+DTYPE_DESENVOLVIMENTO = np.dtype(
+    [("time", "<i8"), ("poc", "<f8"), ("vah", "<f8"), ("val", "<f8")]
+)
+
+
+def calcular_desenvolvimento(
+    rates,
+    block: float,
+    by: str = "tpo",
+    va_percent: float = 0.7,
+    va_modo: str = "expansao",
+) -> np.ndarray:
+    """
+    Calcula POC, VAH e VAL após cada candle.
+
+    Returns:
+        np.ndarray: Array estruturado `DTYPE_DESENVOLVIMENTO`, um registro
+        por candle.
+    """
+    n = len(rates)
+    serie = np.zeros(n, dtype=DTYPE_DESENVOLVIMENTO)
+    if n == 0:
+        return serie
+    serie["time"] = rates["time"]
+    for campo in ("poc", "vah", "val"):
+        serie[campo] = np.nan
+
+    barra, indice, peso = _binning_vetorizado(rates, block, by)
+    if len(indice) == 0:
+        return serie
+
+    base = int(indice.min())
+    largura = int(indice.max()) - base + 1
+    posicao = indice - base
+    # Pares (candle, bloco) do candle i em limites[i]:limites[i + 1]
+    limites = np.searchsorted(barra, np.arange(n + 1), side="left")
+
+    volume = np.zeros(largura, dtype=np.float64)
+    tpo = np.zeros(largura, dtype=np.int64)
+    precos = np.round((np.arange(largura) + base) * block, 8)
+
+    col_poc, col_vah, col_val = serie["poc"], serie["vah"], serie["val"]
+
+    ini = fim = None  # faixa já negociada, [ini, fim)
+    poc = -1
+    maior = -np.inf
+    total = 0.0
+
+    for i in range(n):
+        a, b = limites[i], limites[i + 1]
+        if a == b:
+            # Candle sem blocos (preços inválidos): repete a linha anterior
+            if i:
+                col_poc[i], col_vah[i], col_val[i] = (
+                    col_poc[i - 1],
+                    col_vah[i - 1],
+                    col_val[i - 1],
+                )
+            continue
+
+        # Blocos do candle, do mais alto para o mais baixo
+        pos = posicao[a:b]
+        volume[pos] += peso[a:b]
+        tpo[pos] += 1
+        total += float(peso[a:b].sum())
+
+        topo, fundo = int(pos[0]), int(pos[-1])
+        ini = fundo if ini is None else min(ini, fundo)
+        fim = topo + 1 if fim is None else max(fim, topo + 1)
+
+        # Empate no maior volume: o preço mais alto (argmax do primeiro)
+        k = int(np.argmax(volume[pos]))
+        valor = volume[pos[k]]
+        if valor > maior or (valor == maior and pos[k] > poc):
+            maior = valor
+            poc = int(pos[k])
+
+        faixa = volume[ini:fim]
+        alvo = total * va_percent
+
+        if va_modo == "expansao":
+            lo, hi = _expansao(faixa, poc - ini, [alvo])[0]
+            tocados = np.flatnonzero(tpo[ini + lo : ini + hi + 1]) + ini + lo
+            vah, val = precos[tocados[-1]], precos[tocados[0]]
+        else:
+            parcial = Profile(base + ini, block, faixa, tpo[ini:fim])
+            vah, val, _ = calcular_value_areas(parcial, [va_percent], va_modo)[
+                va_percent
+            ]
+
+        col_poc[i] = precos[poc]
+        col_vah[i] = vah
+        col_val[i] = val
+
+    return serie
@@ -0,0 +1,308 @@
+"""
+Exportação em lote dos níveis do Market Profile, uma sessão por linha.
+
+Os candles de [inicio, fim) são lidos em blocos (`obter_rates_em_blocos`),
+divididos em sessões do mercado (`sessions.separar_sessoes`) e agrupados em lotes de
+sessões completas; uma sessão que continua no bloco seguinte é juntada a
+ele antes da divisão. Cada lote é calculado com `calcular_profile` em um
+pool de processos (ou threads), enquanto a leitura dos blocos seguintes
+continua na thread principal, e as linhas são gravadas no CSV na ordem das
+sessões.
+
+A cada `INTERVALO_CHECKPOINT` segundos, após gravar um lote, um arquivo de
+checkpoint (`<arquivo>.checkpoint`) registra o pedido, o tamanho do CSV e o
+início da sessão em que a leitura deve recomeçar. Uma exportação interrompida e repetida
+com os mesmos parâmetros descarta o que foi gravado após o último
+checkpoint e continua dali; o checkpoint é removido ao final.
+"""
+
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import csv
+import datetime
+import io
+import json
+import os
+import tempfile
+import time
+from typing import Any
+
+import numpy as np
+
+from mtcli.logger import setup_logger
+
+from .model import (
+    calcular_profile,
+    obter_rates_em_blocos,
+    obter_tempo_ultimo_tick,
+    sessao_mt5,
+)
+from .sessions import inicio_sessao, separar_sessoes
+
+log = setup_logger()
+
+#: Colunas do CSV exportado; HVNs e LVNs são separados por espaço
+COLUNAS = (
+    "symbol",
+    "sessao",
+    "candles",
+    "total_volume",
+    "poc",
+    "vah",
+    "val",
+    "hvn",
+    "lvn",
+    "ib_high",
+    "ib_low",
+)
+
+_EXTENSAO_CHECKPOINT = ".checkpoint"
+
+#: Segundos mínimos entre checkpoints (cada um grava o CSV no disco com fsync)
+INTERVALO_CHECKPOINT = 1.0
+
+
+def _numero(v):
+    return "" if v is None else float(v)
+
+
+def calcular_linhas(
+    symbol: str, rates: np.ndarray, inicios: np.ndarray, parametros: dict
+) -> list[list]:
+    """
+    Linhas do CSV das sessões de um lote (executada nos workers).
+
+    Args:
+        rates: Candles das sessões do lote.
+        inicios: Índice do primeiro candle de cada sessão em `rates`.
+        parametros: Argumentos de `calcular_profile`.
+    """
+    limites = np.append(inicios, len(rates))
+    linhas = []
+    for ini, fim in zip(limites[:-1], limites[1:], strict=True):
+        sessao = rates[ini:fim]
+        resultado = calcular_profile(sessao, **parametros)
+        ib = resultado.get("ib") or {}
+        # Data da sessão: a do último candle, como em `sessions`
+        dia = datetime.datetime.utcfromtimestamp(int(sessao["time"][-1])).date()
+        linhas.append(
+            [
+                symbol,
+                str(dia),
+                len(sessao),
+                _numero(resultado.get("total_volume")),
+                _numero(resultado.get("poc")),
+                _numero(resultado.get("vah")),
+                _numero(resultado.get("val")),
+                " ".join(f"{float(p):g}" for p in resultado.get("hvn", [])),
+                " ".join(f"{float(p):g}" for p in resultado.get("lvn", [])),
+                _numero(ib.get("high")),
+                _numero(ib.get("low")),
+            ]
+        )
+    return linhas
+
+
+def lotes_de_sessoes(blocos, sessoes_por_lote: int, inicio: int = 0):
+    """
+    Agrupa os blocos de candles em lotes de até `sessoes_por_lote` sessões
+    completas, iniciadas `inicio` segundos após 00:00 (ver
+    `sessions.inicio_sessao`).
+
+    Yields:
+        tuple: (rates, inicios) de cada lote, com `inicios` relativo a
+        `rates`.
+    """
+    pendente = None
+    for rates in blocos:
+        rates = np.asarray(rates)
+        if pendente is not None:
+            rates = np.concatenate((pendente, rates))
+
+        _, inicios = separar_sessoes(rates["time"], inicio)
+        # A última sessão pode continuar no próximo bloco
+        completas = len(inicios) - 1
+        for k in range(0, completas, sessoes_por_lote):
+            j = min(k + sessoes_por_lote, completas)
+            yield rates[inicios[k] : inicios[j]], inicios[k:j] - inicios[k]
+        pendente = rates[inicios[-1] :]
+
+    if pendente is not None and len(pendente):
+        yield pendente, np.zeros(1, dtype=np.int64)
+
+
+def _ler_checkpoint(caminho: str) -> dict | None:
+    try:
+        with open(caminho, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _gravar_checkpoint(caminho: str, estado: dict) -> None:
+    diretorio = os.path.dirname(os.path.abspath(caminho))
+    fd, temporario = tempfile.mkstemp(dir=diretorio, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(estado, f)
+        os.replace(temporario, caminho)
+    except OSError:
+        os.remove(temporario)
+        raise
+
+
+def exportar_sessoes(
+    symbol: str,
+    period: str,
+    inicio: int,
+    fim: int | None,
+    arquivo: str,
+    parametros: dict[str, Any],
+    workers: int | None = None,
+    pool: str = "processo",
+    barras_por_bloco: int = 50000,
+    sessoes_por_lote: int = 20,
+    progresso: Callable[[int, str, float], None] | None = None,
+) -> dict[str, Any]:
+    """
+    Exporta para `arquivo` (CSV) os níveis de cada sessão entre `inicio` e
+    `fim` (timestamps no horário do servidor; sem `fim`, até o último tick).
+
+    Args:
+        parametros: Argumentos de `calcular_profile` (bloco, by, VA...).
+        workers (int | None): Workers do pool; com 1, calcula no próprio
+            processo. None usa o padrão do pool.
+        pool (str): "processo" ou "thread".
+        sessoes_por_lote (int): Sessões enviadas a cada tarefa do pool.
+        progresso (Callable | None): Chamado após cada lote gravado com
+            (sessoes, ultima_sessao, segundos) da execução atual.
+
+    Returns:
+        dict: `sessoes` exportadas nesta execução, `total` no arquivo,
+        `segundos` e `retomada` (se continuou um checkpoint).
+    """
+    caminho_checkpoint = arquivo + _EXTENSAO_CHECKPOINT
+    # Normalizado como no JSON do checkpoint (tuplas viram listas)
+    pedido = json.loads(
+        json.dumps(
+            {
+                "symbol": symbol,
+                "period": period,
+                "inicio": int(inicio),
+                "fim": fim,
+                "parametros": parametros,
+            }
+        )
+    )
+
+    estado = _ler_checkpoint(caminho_checkpoint)
+    retomada = (
+        estado is not None
+        and estado.get("pedido") == pedido
+        and os.path.exists(arquivo)
+        and os.path.getsize(arquivo) >= estado["bytes"]
+    )
+    if retomada:
+        de = estado["proximo"]
+        total = estado["sessoes"]
+        saida = open(arquivo, "r+b")
+        # Linhas gravadas após o último checkpoint são descartadas
+        saida.truncate(estado["bytes"])
+        saida.seek(estado["bytes"])
+    else:
+        if estado is not None:
+            log.warning("Checkpoint de outro pedido ignorado; exportando do inicio.")
+        de = int(inicio)
+        total = 0
+        saida = open(arquivo, "wb")
+        saida.write((",".join(COLUNAS) + "\n").encode())
+
+    abertura = inicio_sessao(
+        parametros.get("market_start_hour", 9),
+        parametros.get("market_start_minute", 0),
+        parametros.get("market_timezone_offset", -3),
+        referencia=int(inicio),
+    )
+
+    workers = None if workers == 0 else workers
+    executor: Executor | None = None
+    if workers != 1:
+        classe = ProcessPoolExecutor if pool == "processo" else ThreadPoolExecutor
+        executor = classe(max_workers=workers)
+    # Lotes em andamento: o suficiente para manter todos os workers ocupados
+    limite = 2 * (workers or os.cpu_count() or 1)
+
+    sessoes = 0
+    antes = ultimo_checkpoint = time.perf_counter()
+
+    def gravar(linhas: list[list], proximo: int) -> None:
+        nonlocal sessoes, total, ultimo_checkpoint
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(linhas)
+        saida.write(buffer.getvalue().encode())
+        sessoes += len(linhas)
+        total += len(linhas)
+
+        agora = time.perf_counter()
+        if agora - ultimo_checkpoint >= INTERVALO_CHECKPOINT:
+            ultimo_checkpoint = agora
+            saida.flush()
+            os.fsync(saida.fileno())
+            _gravar_checkpoint(
+                caminho_checkpoint,
+                {
+                    "pedido": pedido,
+                    "proximo": proximo,
+                    "bytes": saida.tell(),
+                    "sessoes": total,
+                },
+            )
+        if progresso is not None and linhas:
+            progresso(sessoes, linhas[-1][1], agora - antes)
+
+    try:
+        with sessao_mt5():
+            if fim is None:
+                fim = obter_tempo_ultimo_tick(symbol) + 1
+
+            pendentes = deque()
+            blocos = obter_rates_em_blocos(symbol, period, de, fim, barras_por_bloco)
+            lotes = lotes_de_sessoes(blocos, sessoes_por_lote, abertura)
+            for rates, inicios in lotes:
+                # A leitura recomeça no início da sessão seguinte à última do lote
+                ultima = (int(rates["time"][inicios[-1]]) - abertura) // 86400
+                proximo = (ultima + 1) * 86400 + abertura
+
+                if executor is None:
+                    gravar(calcular_linhas(symbol, rates, inicios, parametros), proximo)
+                    continue
+
+                futuro = executor.submit(
+                    calcular_linhas, symbol, rates, inicios, parametros
+                )
+                pendentes.append((futuro, proximo))
+                while len(pendentes) >= limite:
+                    futuro, proximo = pendentes.popleft()
+                    gravar(futuro.result(), proximo)
+
+            while pendentes:
+                futuro, proximo = pendentes.popleft()
+                gravar(futuro.result(), proximo)
+    finally:
+        saida.close()
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    # Exportação concluída: não há o que retomar
+    try:
+        os.remove(caminho_checkpoint)
+    except OSError:
+        pass
+
+    return {
+        "sessoes": sessoes,
+        "total": total,
+        "segundos": time.perf_counter() - antes,
+        "retomada": retomada,
+    }
@@ -0,0 +1,180 @@
+"""
+Cache de histogramas do Market Profile.
+
+O histograma (volume e TPO por bloco) depende apenas dos rates, do bloco e
+do modo `by`; Value Area, HVN/LVN e IB são recalculados a partir dele em
+poucos milissegundos. Guardar o histograma permite repetir a consulta com
+outro `--va-percent`, `--criterio-hvn`, `--mult-*` ou `--percentil-*` sem
+refazer o binning.
+
+A chave é (ativo, timeframe, bloco, by, horário do último candle, quantidade
+de candles), acrescida de um resumo do último candle: enquanto ele está em
+formação, máxima, mínima e volume mudam sem alterar o horário.
+
+Os histogramas ficam em memória, com descarte do menos usado (LRU), e,
+opcionalmente, em arquivos `.npz` em disco, que sobrevivem entre execuções
+do `mt mp`. Em disco, os arquivos menos usados são removidos ao passar do
+limite configurado.
+"""
+
+from collections import OrderedDict
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+from mtcli.logger import setup_logger
+
+from .profile import Profile
+
+log = setup_logger()
+
+_EXTENSAO = ".npz"
+
+
+def chave_histograma(
+    symbol: str, timeframe: str | int, block: float, by: str, rates
+) -> tuple | None:
+    """
+    Chave do histograma dos rates informados (None sem rates).
+    """
+    if rates is None or len(rates) == 0:
+        return None
+    ultimo = np.ascontiguousarray(rates[-1:])
+    resumo = hashlib.blake2b(ultimo.tobytes(), digest_size=8).hexdigest()
+    return (
+        symbol,
+        str(timeframe),
+        float(block),
+        by,
+        int(rates["time"][-1]),
+        len(rates),
+        resumo,
+    )
+
+
+class HistogramCache:
+    """
+    Histogramas por chave, em memória (LRU) e opcionalmente em disco.
+
+    Args:
+        max_itens (int): Histogramas mantidos em memória.
+        diretorio (str | None): Pasta dos arquivos `.npz`; None não usa disco.
+        max_arquivos (int): Arquivos mantidos em disco.
+    """
+
+    def __init__(
+        self, max_itens: int, diretorio: str | None = None, max_arquivos: int = 200
+    ) -> None:
+        self.max_itens = max_itens
+        self.diretorio = diretorio
+        self.max_arquivos = max_arquivos
+        self._memoria: OrderedDict[tuple, Profile] = OrderedDict()
+
+    def caminho(self, chave: tuple) -> str:
+        nome = hashlib.sha1(repr(chave).encode()).hexdigest()
+        return os.path.join(self.diretorio, nome + _EXTENSAO)
+
+    def obter(self, chave: tuple | None) -> Profile | None:
+        """Histograma da chave, ou None se não estiver em cache."""
+        if chave is None:
+            return None
+
+        profile = self._memoria.get(chave)
+        if profile is not None:
+            self._memoria.move_to_end(chave)
+            return profile
+
+        if self.diretorio is None:
+            return None
+
+        profile = self._ler(chave)
+        if profile is not None:
+            self._guardar_memoria(chave, profile)
+        return profile
+
+    def guardar(self, chave: tuple | None, profile: Profile) -> None:
+        """Guarda o histograma em memória e, se configurado, em disco."""
+        if chave is None:
+            return
+        self._guardar_memoria(chave, profile)
+        if self.diretorio is not None:
+            try:
+                self._gravar(chave, profile)
+            except OSError as e:
+                log.warning(f"Cache de histogramas indisponivel ({e}).")
+
+    def limpar(self) -> None:
+        """Esvazia o cache em memória."""
+        self._memoria.clear()
+
+    def _guardar_memoria(self, chave: tuple, profile: Profile) -> None:
+        self._memoria[chave] = profile
+        self._memoria.move_to_end(chave)
+        while len(self._memoria) > self.max_itens:
+            self._memoria.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Arquivos
+    # ------------------------------------------------------------------
+
+    def _ler(self, chave: tuple) -> Profile | None:
+        arquivo = self.caminho(chave)
+        try:
+            with np.load(arquivo) as dados:
+                if str(dados["chave"]) != repr(chave):
+                    return None
+                profile = Profile(
+                    int(dados["base"]),
+                    float(dados["block"]),
+                    dados["volume"],
+                    dados["tpo"],
+                )
+            # O horário de modificação marca o último uso (descarte LRU)
+            os.utime(arquivo)
+        except (OSError, KeyError, ValueError):
+            return None
+        return profile
+
+    def _gravar(self, chave: tuple, profile: Profile) -> None:
+        os.makedirs(self.diretorio, exist_ok=True)
+        fd, temporario = tempfile.mkstemp(dir=self.diretorio, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(
+                    f,
+                    chave=np.array(repr(chave)),
+                    base=np.array(profile.base),
+                    block=np.array(profile.block),
+                    volume=np.asarray(profile.volume),
+                    tpo=np.asarray(profile.tpo),
+                )
+            os.replace(temporario, self.caminho(chave))
+        except OSError:
+            os.remove(temporario)
+            raise
+        self._descartar_excedentes()
+
+    def _descartar_excedentes(self) -> None:
+        """Remove os arquivos menos usados além de `max_arquivos`."""
+        arquivos = []
+        for nome in os.listdir(self.diretorio):
+            if not nome.endswith(_EXTENSAO):
+                continue
+            arquivo = os.path.join(self.diretorio, nome)
+            try:
+                arquivos.append((os.path.getmtime(arquivo), arquivo))
+            except OSError:
+                continue
+
+        if len(arquivos) <= self.max_arquivos:
+            return
+
+        arquivos.sort()
+        for _, arquivo in arquivos[: len(arquivos) - self.max_arquivos]:
+            try:
+                os.remove(arquivo)
+            except OSError:
+                # Em uso por outro processo ou já removido
+                continue
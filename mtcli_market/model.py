@@ -3,57 +3,51 @@ Camada de modelo responsável pelo acesso aos dados e cálculos
 do Market Profile.
 
 Este módulo:
-- Conecta ao MetaTrader 5
+- Conecta ao MetaTrader 5 (uma conexão por sessão de consultas)
 - Obtém rates
 - Calcula TPO, volume, POC, Value Area (VAH/VAL)
 - Identifica HVN, LVN
 - Calcula o Initial Balance (IB)
 """
 
-from collections import OrderedDict, defaultdict
+from collections.abc import Iterator, Sequence
+from contextlib import ExitStack, contextmanager
 import datetime
-from math import ceil, floor
+import os
+import time
 from typing import Any
 
-import MetaTrader5 as mt5
+import numpy as np
 
 from mtcli.logger import setup_logger
-from mtcli.mt5_context import mt5_conexao
+
+from .cache import RatesCache
+from .conf import (
+    CACHE_DIR,
+    CACHE_MAX_BARRAS,
+    CACHE_MAX_DIAS,
+    MEMO_DISCO,
+    MEMO_ITENS,
+    MEMO_MAX_ARQUIVOS,
+)
+from .datasource import COPY_TICKS_ALL, COPY_TICKS_TRADE, TIMEFRAMES, obter_fonte
+from .histogram_cache import HistogramCache, chave_histograma
+from .nodes import detectar_nos
+from .profile import Profile
+from .resample import base_nativa, reamostrar, reamostrar_blocos, segundos_customizado
+from .timings import etapa
+from .value_area import calcular_value_areas
 
 log = setup_logger()
 
 
 def _mapear_timeframe(timeframe: str | int) -> int:
-    mapping = {
-        "M1": mt5.TIMEFRAME_M1,
-        "M2": mt5.TIMEFRAME_M2,
-        "M3": mt5.TIMEFRAME_M3,
-        "M4": mt5.TIMEFRAME_M4,
-        "M5": mt5.TIMEFRAME_M5,
-        "M6": mt5.TIMEFRAME_M6,
-        "M10": mt5.TIMEFRAME_M10,
-        "M12": mt5.TIMEFRAME_M12,
-        "M15": mt5.TIMEFRAME_M15,
-        "M20": mt5.TIMEFRAME_M20,
-        "M30": mt5.TIMEFRAME_M30,
-        "H1": mt5.TIMEFRAME_H1,
-        "H2": mt5.TIMEFRAME_H2,
-        "H3": mt5.TIMEFRAME_H3,
-        "H4": mt5.TIMEFRAME_H4,
-        "H6": mt5.TIMEFRAME_H6,
-        "H8": mt5.TIMEFRAME_H8,
-        "H12": mt5.TIMEFRAME_H12,
-        "D1": mt5.TIMEFRAME_D1,
-        "W1": mt5.TIMEFRAME_W1,
-        "MN1": mt5.TIMEFRAME_MN1,
-    }
-
     if isinstance(timeframe, int):
         minutos = timeframe
     else:
         tf_str = str(timeframe).upper().strip()
-        if tf_str in mapping:
-            return mapping[tf_str]
+        if tf_str in TIMEFRAMES:
+            return TIMEFRAMES[tf_str]
 
         minutos = 1
         if tf_str.endswith("M"):
@@ -64,38 +58,337 @@ def _mapear_timeframe(timeframe: str | int) -> int:
             minutos = int(tf_str[:-1] or 1) * 1440
 
     if minutos <= 1:
-        return mt5.TIMEFRAME_M1
+        return TIMEFRAMES["M1"]
     elif minutos <= 5:
-        return mt5.TIMEFRAME_M5
+        return TIMEFRAMES["M5"]
     elif minutos <= 15:
-        return mt5.TIMEFRAME_M15
+        return TIMEFRAMES["M15"]
     elif minutos <= 30:
-        return mt5.TIMEFRAME_M30
+        return TIMEFRAMES["M30"]
     elif minutos <= 60:
-        return mt5.TIMEFRAME_H1
+        return TIMEFRAMES["H1"]
     elif minutos <= 240:
-        return mt5.TIMEFRAME_H4
+        return TIMEFRAMES["H4"]
+    else:
+        return TIMEFRAMES["D1"]
+
+
+def _segundos_timeframe(tf: int) -> int:
+    """
+    Duração aproximada, em segundos, de um candle do timeframe do MT5.
+
+    Os códigos de minutos valem a própria quantidade de minutos; os de horas
+    têm o bit 0x4000 e os de semana e mês, o bit 0x8000.
+    """
+    if tf < 0x4000:
+        return tf * 60
+    if tf < 0x8000:
+        return (tf - 0x4000) * 3600
+    if tf == TIMEFRAMES["W1"]:
+        return 7 * 86400
+    return 31 * 86400
+
+
+def _resolver_timeframe(timeframe: str | int) -> tuple[int, int | None]:
+    """
+    Timeframe nativo a buscar na fonte de dados e, para um timeframe
+    customizado sem equivalente nativo (ex: 45m), a duração em segundos dos
+    candles a montar localmente (ver `resample`).
+    """
+    segundos = segundos_customizado(timeframe)
+    if segundos is None:
+        return _mapear_timeframe(timeframe), None
+
+    tf, duracao = base_nativa(segundos)
+    return tf, (None if duracao == segundos else segundos)
+
+
+#: Profundidade de aninhamento de `sessao_mt5` (0 = sem conexão aberta)
+_sessoes_abertas = 0
+
+
+@contextmanager
+def sessao_mt5() -> Iterator[None]:
+    """
+    Mantém uma única conexão com a fonte de dados (`datasource`) durante o
+    bloco.
+
+    Consultas feitas dentro do bloco (inclusive sessões aninhadas)
+    reutilizam a conexão já aberta em vez de abrir outra.
+    """
+    global _sessoes_abertas
+
+    if _sessoes_abertas:
+        _sessoes_abertas += 1
+        try:
+            yield
+        finally:
+            _sessoes_abertas -= 1
+        return
+
+    with ExitStack() as conexao:
+        with etapa("conexao"):
+            conexao.enter_context(obter_fonte().conexao())
+        _sessoes_abertas = 1
+        try:
+            yield
+        finally:
+            _sessoes_abertas = 0
+
+
+def obter_rates(
+    symbol: str, timeframe: str | int, limit: int, usar_cache: bool = False
+):
+    """
+    Obtém os últimos `limit` candles do ativo.
+
+    Com `usar_cache`, os candles vêm do cache em disco (`cache.RatesCache`)
+    e apenas os candles novos são buscados no terminal.
+
+    Timeframes customizados são montados a partir do timeframe nativo que
+    os divide; um candle a mais cobre o primeiro grupo incompleto.
+    """
+    tf, segundos = _resolver_timeframe(timeframe)
+    fonte = obter_fonte()
+
+    desejados = limit
+    if segundos is not None:
+        limit = (limit + 1) * (segundos // _segundos_timeframe(tf))
+
+    with sessao_mt5(), etapa("transferencia") as medicao:
+        rates = None
+        if usar_cache and fonte.usa_cache:
+            try:
+                rates = _cache_rates().obter(
+                    symbol,
+                    tf,
+                    limit,
+                    buscar_ultimos=lambda n: fonte.copy_rates_from_pos(
+                        symbol, tf, 0, n
+                    ),
+                    buscar_desde=lambda ts: _copiar_rates_desde(symbol, tf, ts),
+                )
+            except OSError as e:
+                log.warning(f"Cache de rates indisponivel ({e}). Buscando no MT5.")
+
+        if rates is None and segundos is not None:
+            rates = _serie_base(symbol, tf, limit)
+        elif rates is None:
+            rates = fonte.copy_rates_from_pos(symbol, tf, 0, limit)
+
+        medicao.contar(barras=0 if rates is None else len(rates))
+
+    if rates is None or len(rates) == 0:
+        log.warning(f"Nenhum rate retornado para {symbol} no timeframe {timeframe}")
+        return []
+
+    if segundos is not None:
+        with etapa("reamostragem"):
+            rates = reamostrar(rates, segundos)[-desejados:]
+
+    return rates
+
+
+def _copiar_rates_desde(symbol: str, tf: int, desde: int):
+    # Folga de um dia no fim cobre servidores com horário adiantado em
+    # relação ao UTC.
+    fim = int(time.time()) + 86400
+    with etapa("transferencia") as medicao:
+        rates = obter_fonte().copy_rates_range(symbol, tf, int(desde), fim)
+        medicao.contar(barras=0 if rates is None else len(rates))
+    return rates
+
+
+#: Séries nativas dos timeframes customizados: (ativo, tf) -> (fonte, rates)
+_series_base: dict[tuple[str, int], tuple[object, np.ndarray]] = {}
+
+
+def _serie_base(symbol: str, tf: int, limit: int):
+    """
+    Últimos `limit` candles do timeframe nativo de um timeframe customizado,
+    guardados no processo por (ativo, timeframe nativo).
+
+    Períodos com a mesma base (ex: `45m` e `75m`, de M15) e consultas
+    repetidas (servidor, `--watch`) buscam na fonte apenas os candles a
+    partir do último guardado, mesmo sem o cache em disco (`--cache`).
+    """
+    fonte = obter_fonte()
+    guardada = _series_base.get((symbol, tf))
+    if guardada is not None and guardada[0] is fonte and len(guardada[1]) >= limit:
+        serie = guardada[1]
+        ultimo = int(serie["time"][-1])
+        novos = _copiar_rates_desde(symbol, tf, ultimo)
+        novos = np.asarray(novos if novos is not None else serie[:0])
+        novos = novos[novos["time"] >= ultimo]
+        if len(novos):
+            # O último candle guardado (em formação) é substituído
+            serie = np.concatenate((serie[serie["time"] < ultimo], novos))
     else:
-        return mt5.TIMEFRAME_D1
+        serie = fonte.copy_rates_from_pos(symbol, tf, 0, limit)
+        if serie is None or len(serie) == 0:
+            return serie
+        serie = np.asarray(serie)
+
+    _series_base[(symbol, tf)] = (fonte, serie[-max(limit, CACHE_MAX_BARRAS) :])
+    return serie[-limit:]
+
+
+def _cache_rates() -> RatesCache:
+    return RatesCache(CACHE_DIR, CACHE_MAX_BARRAS, CACHE_MAX_DIAS)
 
 
-def obter_rates(symbol: str, timeframe: str | int, limit: int):
-    tf = _mapear_timeframe(timeframe)
+#: Cache de histogramas do processo; criado no primeiro uso
+_histogramas: HistogramCache | None = None
 
-    with mt5_conexao():
-        rates = mt5.copy_rates_from_pos(symbol, tf, 0, limit)
+
+def cache_histogramas() -> HistogramCache:
+    """Cache de histogramas compartilhado pelas consultas do processo."""
+    global _histogramas
+    if _histogramas is None:
+        diretorio = os.path.join(CACHE_DIR, "histogramas") if MEMO_DISCO else None
+        _histogramas = HistogramCache(MEMO_ITENS, diretorio, MEMO_MAX_ARQUIVOS)
+    return _histogramas
+
+
+def histograma_em_cache(
+    symbol: str, timeframe: str | int, block: float, by: str, rates
+) -> tuple[tuple | None, Profile | None]:
+    """
+    Procura o histograma dos rates no cache.
+
+    Returns:
+        tuple: (chave, histograma); o histograma é None quando não está em
+        cache e deve ser guardado com a chave após o cálculo.
+    """
+    chave = chave_histograma(symbol, timeframe, block, by, rates)
+    with etapa("histograma_cache") as medicao:
+        histograma = cache_histogramas().obter(chave)
+        medicao.contar(acertos=histograma is not None)
+    return chave, histograma
+
+
+def obter_rates_desde(symbol: str, timeframe: str | int, desde: int):
+    """
+    Obtém os rates com horário a partir de `desde` (inclusive).
+
+    O candle de horário igual a `desde` é retornado novamente para que um
+    candle ainda em formação possa ser atualizado.
+    """
+    tf, segundos = _resolver_timeframe(timeframe)
+
+    with sessao_mt5():
+        rates = _copiar_rates_desde(symbol, tf, desde)
 
     if rates is None or len(rates) == 0:
-        log.warning(f"Nenhum rate retornado para {symbol} no timeframe {timeframe}")
         return []
 
+    if segundos is not None:
+        # `desde` é o início de um candle customizado: o grupo é remontado
+        with etapa("reamostragem"):
+            rates = reamostrar(rates, segundos)
+
     return rates
 
 
+def obter_rates_em_blocos(
+    symbol: str,
+    timeframe: str | int,
+    inicio: int,
+    fim: int,
+    barras_por_bloco: int = 50000,
+) -> Iterator[np.ndarray]:
+    """
+    Lê os rates de [inicio, fim) com `copy_rates_range`, em blocos de
+    tempo que comportam até `barras_por_bloco` candles.
+
+    Cada bloco é entregue ao consumidor antes da leitura do próximo, de modo
+    que a memória depende do tamanho do bloco e não do intervalo. Em
+    timeframes customizados, `barras_por_bloco` conta os candles nativos
+    lidos.
+    """
+    tf, segundos = _resolver_timeframe(timeframe)
+    blocos = _ler_rates_em_blocos(symbol, tf, inicio, fim, barras_por_bloco)
+    if segundos is None:
+        yield from blocos
+    else:
+        yield from reamostrar_blocos(blocos, segundos)
+
+
+def _ler_rates_em_blocos(
+    symbol: str, tf: int, inicio: int, fim: int, barras_por_bloco: int
+) -> Iterator[np.ndarray]:
+    passo = max(int(barras_por_bloco), 1) * _segundos_timeframe(tf)
+
+    with sessao_mt5():
+        de = int(inicio)
+        while de < fim:
+            ate = min(de + passo, int(fim))
+            with etapa("transferencia") as medicao:
+                rates = obter_fonte().copy_rates_range(symbol, tf, de, ate)
+                medicao.contar(barras=0 if rates is None else len(rates))
+
+            if rates is not None and len(rates):
+                # copy_rates_range inclui o candle de horário igual a `ate`
+                rates = rates[(rates["time"] >= de) & (rates["time"] < ate)]
+                if len(rates):
+                    yield rates
+
+            de = ate
+
+
+def obter_ticks_em_blocos(
+    symbol: str,
+    inicio: int,
+    fim: int,
+    janela_segundos: int = 3600,
+    so_negocios: bool = False,
+) -> Iterator[np.ndarray]:
+    """
+    Lê os ticks de [inicio, fim) em janelas de `janela_segundos`.
+
+    Cada janela é obtida com `copy_ticks_range` e entregue ao consumidor
+    antes da leitura da próxima, de modo que apenas uma janela fica em
+    memória por vez. Ticks repetidos na fronteira entre janelas são
+    descartados pelo `time_msc`.
+
+    Args:
+        so_negocios (bool): Lê apenas ticks de negócio (COPY_TICKS_TRADE).
+    """
+    flags = COPY_TICKS_TRADE if so_negocios else COPY_TICKS_ALL
+
+    with sessao_mt5():
+        de = int(inicio)
+        while de < fim:
+            ate = min(de + int(janela_segundos), int(fim))
+            with etapa("transferencia") as medicao:
+                ticks = obter_fonte().copy_ticks_range(symbol, de, ate, flags)
+                medicao.contar(ticks=0 if ticks is None else len(ticks))
+
+            if ticks is not None and len(ticks):
+                msc = ticks["time_msc"]
+                ticks = ticks[(msc >= de * 1000) & (msc < ate * 1000)]
+                if len(ticks):
+                    yield ticks
+
+            de = ate
+
+
+def obter_tempo_ultimo_tick(symbol: str) -> int:
+    """
+    Horário (do servidor) do último tick do ativo; usa o relógio local se o
+    terminal não informar.
+    """
+    with sessao_mt5():
+        tempo = obter_fonte().tempo_ultimo_tick(symbol)
+    if not tempo:
+        return int(time.time())
+    return int(tempo)
+
+
 def obter_estatisticas_do_dia(symbol: str):
     rates = obter_rates(symbol, "D1", 1)
 
-    if not rates:
+    if len(rates) == 0:
         return None
 
     r = rates[0]
@@ -108,95 +401,269 @@ def obter_estatisticas_do_dia(symbol: str):
     }
 
 
-def _range_blocks(low: float, high: float, block: float) -> list[float]:
-    if block <= 0:
-        return []
+def estatisticas_de_rates(rates) -> dict[str, float] | None:
+    """
+    Calcula abertura, fechamento, máxima e mínima do dia do último candle a
+    partir dos próprios rates intraday.
 
-    low_b = floor(low / block) * block
-    high_b = ceil(high / block) * block
+    Só há resultado quando os rates cobrem o dia inteiro, isto é, quando
+    começam em um dia anterior ao do último candle.
+    """
+    if rates is None or len(rates) == 0:
+        return None
 
-    blocks = []
-    b = high_b
-    while b >= low_b:
-        blocks.append(round(b, 8))
-        b -= block
+    tempos = rates["time"]
+    inicio_dia = (int(tempos[-1]) // 86400) * 86400
+    ini = int(np.searchsorted(tempos, inicio_dia, side="left"))
+    if ini == 0:
+        return None
 
-    return blocks
+    dia = rates[ini:]
+    return {
+        "abertura": float(dia["open"][0]),
+        "fechamento": float(dia["close"][-1]),
+        "maxima": float(dia["high"].max()),
+        "minima": float(dia["low"].min()),
+    }
 
 
-def _distribuir_volume_uniforme(
-    volume: float, blocks: list[float]
-) -> dict[float, float]:
-    if not blocks:
-        return {}
+def obter_rates_e_estatisticas(
+    symbol: str,
+    timeframe: str | int,
+    limit: int,
+    usar_cache: bool = False,
+    derivar_estatisticas: bool = False,
+):
+    """
+    Obtém os rates e as estatísticas do dia em uma única conexão.
 
-    per = volume / len(blocks)
-    return {b: per for b in blocks}
+    Com `derivar_estatisticas`, as estatísticas do dia são calculadas dos
+    próprios rates quando eles cobrem o dia inteiro, dispensando a consulta
+    ao D1.
 
+    Returns:
+        tuple: (rates, estatisticas_dia)
+    """
+    with sessao_mt5():
+        rates = obter_rates(symbol, timeframe, limit, usar_cache=usar_cache)
 
-def _distribuir_volume_por_overlap(
-    low: float, high: float, block: float
-) -> dict[float, float]:
-    blocks = _range_blocks(low, high, block)
-    if not blocks:
-        return {}
+        estatisticas = estatisticas_de_rates(rates) if derivar_estatisticas else None
+        if estatisticas is None:
+            estatisticas = obter_estatisticas_do_dia(symbol)
 
-    dist = {}
-    for b in blocks:
-        block_low = b - block
-        block_high = b
+    return rates, estatisticas
 
-        overlap_low = max(low, block_low)
-        overlap_high = min(high, block_high)
-        overlap = max(0.0, overlap_high - overlap_low)
 
-        dist[b] = overlap
+def _colunas(rates) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Extrai as colunas de preço e volume dos rates como arrays float64.
 
-    total = sum(dist.values())
-    if total <= 0:
-        return _distribuir_volume_uniforme(1.0, blocks)
+    Na ausência de `tick_volume` o volume de ticks é zero e, na ausência de
+    `real_volume`, o volume real assume o volume de ticks.
+    """
+    nomes = rates.dtype.names or ()
 
-    return {b: dist[b] / total for b in dist}
+    low = np.asarray(rates["low"], dtype=np.float64)
+    high = np.asarray(rates["high"], dtype=np.float64)
 
+    if "tick_volume" in nomes:
+        tick_vol = np.asarray(rates["tick_volume"], dtype=np.float64)
+    else:
+        tick_vol = np.zeros(len(low), dtype=np.float64)
+
+    if "real_volume" in nomes:
+        real_vol = np.asarray(rates["real_volume"], dtype=np.float64)
+    else:
+        real_vol = tick_vol
+
+    return low, high, tick_vol, real_vol
+
+
+def _binning_vetorizado(
+    rates, block: float, by: str
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Distribui todos os candles pelos blocos de preço de uma só vez.
+
+    Cada candle ocupa os blocos de `floor(low / block)` até `ceil(high / block)`
+    (índices inteiros; o preço do bloco é `indice * block`, seu limite
+    superior). Os pares (candle, bloco) são gerados em ordem de candle e, dentro
+    do candle, do bloco mais alto para o mais baixo.
+
+    No modo tpo cada bloco recebe peso 1. Nos modos tick e volume o volume do
+    candle é repartido proporcionalmente à sobreposição entre o range do candle
+    e o bloco; candles sem range repartem o volume igualmente.
+
+    Returns:
+        tuple: (barra, indice, peso) com um elemento por par (candle, bloco).
+    """
+    low, high, tick_vol, real_vol = _colunas(rates)
+
+    idx_low = np.floor(low / block).astype(np.int64)
+    idx_high = np.ceil(high / block).astype(np.int64)
+    n_blocos = np.maximum(idx_high - idx_low + 1, 0)
+
+    total = int(n_blocos.sum())
+    barra = np.repeat(np.arange(len(low)), n_blocos)
+    inicio = np.cumsum(n_blocos) - n_blocos
+    indice = idx_high[barra] - (np.arange(total) - inicio[barra])
+
+    if by == "tpo":
+        return barra, indice, np.ones(total, dtype=np.float64)
+
+    if by not in ("tick", "volume"):
+        vazio = np.empty(0, dtype=np.int64)
+        return vazio, vazio, np.empty(0, dtype=np.float64)
+
+    topo = indice * block
+    overlap = np.minimum(high[barra], topo) - np.maximum(low[barra], topo - block)
+    overlap = np.maximum(overlap, 0.0)
+
+    soma = np.bincount(barra, weights=overlap, minlength=len(low))
+    uniforme = soma <= 0
+    fracao = np.where(
+        uniforme[barra],
+        1.0 / np.maximum(n_blocos, 1)[barra],
+        overlap / np.where(uniforme, 1.0, soma)[barra],
+    )
+
+    volume = tick_vol if by == "tick" else real_vol
+    return barra, indice, fracao * volume[barra]
+
+
+def _acumular_blocos(
+    indice: np.ndarray, peso: np.ndarray
+) -> tuple[int, np.ndarray, np.ndarray]:
+    """
+    Soma os pesos e conta os toques por bloco com `np.bincount`.
+
+    Returns:
+        tuple: (base, volume, tpo), onde a posição `i` dos arrays corresponde
+        ao bloco de índice `base + i`.
+    """
+    if len(indice) == 0:
+        return 0, np.empty(0, dtype=np.float64), np.empty(0, dtype=np.int64)
 
-def _calcular_hvn_lvn_por_criterio(
-    profile_map: dict[float, float],
-    criterio: str = "mult",
+    base = int(indice.min())
+    pos = indice - base
+
+    volume = np.bincount(pos, weights=peso)
+    tpo = np.bincount(pos, minlength=len(volume))
+
+    return base, volume, tpo
+
+
+def calcular_metricas(
+    profile: Profile,
+    va_percent: float = 0.7,
+    criterio_hvn: str = "mult",
     mult_hvn: float = 1.5,
     mult_lvn: float = 0.5,
     percentil_hvn: float = 90,
     percentil_lvn: float = 10,
-):
-    if not profile_map:
-        return [], []
+    suavizacao_hvn: int = 5,
+    proeminencia_hvn: float = 0.1,
+    va_modo: str = "expansao",
+    va_percents: Sequence[float] = (),
+) -> dict[str, Any]:
+    """
+    Calcula POC, Value Area e HVN/LVN a partir de um histograma pronto.
+
+    O custo depende apenas da quantidade de níveis do profile, não da
+    quantidade de candles que o originaram. Os percentuais de `va_percents`
+    são calculados na mesma passada que `va_percent` e retornados em
+    `value_areas`, do menor para o maior.
+    """
+    # ===== VALUE AREA =====
+    percents = sorted({va_percent, *va_percents})
+    with etapa("value_area", niveis=len(profile)):
+        areas = calcular_value_areas(profile, percents, modo=va_modo)
+    vah, val, va_prices = areas[va_percent]
+
+    # ===== HVN / LVN COM CRITÉRIO SELECIONÁVEL =====
+    with etapa("hvn_lvn", niveis=len(profile)):
+        hvn, lvn = detectar_nos(
+            profile,
+            criterio=criterio_hvn,
+            mult_hvn=mult_hvn,
+            mult_lvn=mult_lvn,
+            percentil_hvn=percentil_hvn,
+            percentil_lvn=percentil_lvn,
+            suavizacao=suavizacao_hvn,
+            proeminencia=proeminencia_hvn,
+        )
+
+    return {
+        "poc": profile.poc,
+        "vah": vah,
+        "val": val,
+        "va_prices": va_prices,
+        "value_areas": [
+            {"percent": p, "vah": areas[p][0], "val": areas[p][1]} for p in percents
+        ],
+        "hvn": hvn,
+        "lvn": lvn,
+    }
+
+
+def _janela_ib(
+    last_ts: int,
+    ib_minutes: int,
+    market_start_hour: int,
+    market_start_minute: int,
+    market_timezone_offset: int,
+) -> tuple[int, int]:
+    """
+    Retorna os timestamps de início e fim do Initial Balance do dia do
+    candle informado.
+    """
+    # Data do candle (sempre em UTC no MT5)
+    d0_utc = datetime.datetime.utcfromtimestamp(last_ts).date()
+
+    # Horário local do início do pregão
+    inicio_pregao_local = datetime.datetime(
+        d0_utc.year, d0_utc.month, d0_utc.day, market_start_hour, market_start_minute
+    )
 
-    volumes = list(profile_map.values())
-    media = sum(volumes) / len(volumes)
+    # Converte horário local → UTC
+    inicio_pregao_utc = inicio_pregao_local + datetime.timedelta(
+        hours=market_timezone_offset
+    )
 
-    if criterio == "std":
-        variancia = sum((v - media) ** 2 for v in volumes) / len(volumes)
-        desvio = variancia**0.5
-        limite_hvn = media + desvio
-        limite_lvn = max(0.0, media - desvio)
+    inicio_pregao_ts = int(inicio_pregao_utc.timestamp())
+    return inicio_pregao_ts, inicio_pregao_ts + ib_minutes * 60
 
-    elif criterio == "mult":
-        limite_hvn = media * mult_hvn
-        limite_lvn = max(0.0, media * mult_lvn)
 
-    elif criterio == "percentil":
-        vols_ord = sorted(volumes)
-        idx_hvn = int(len(vols_ord) * (percentil_hvn / 100))
-        idx_lvn = int(len(vols_ord) * (percentil_lvn / 100))
-        limite_hvn = vols_ord[min(idx_hvn, len(vols_ord) - 1)]
-        limite_lvn = vols_ord[max(idx_lvn, 0)]
+def _calcular_ib(
+    rates,
+    ib_minutes: int,
+    market_start_hour: int,
+    market_start_minute: int,
+    market_timezone_offset: int,
+) -> dict[str, float] | None:
+    """
+    Calcula máxima e mínima do Initial Balance do dia do último candle.
+    """
+    # ===== INITIAL BALANCE (UTC-AWARE) =====
+    inicio_pregao_ts, limite_ts = _janela_ib(
+        int(rates[-1]["time"]),
+        ib_minutes,
+        market_start_hour,
+        market_start_minute,
+        market_timezone_offset,
+    )
 
-    else:
-        raise ValueError("Critério HVN/LVN inválido. Use: mult, std ou percentil.")
+    # Filtra candles dentro da janela do IB (UTC)
+    tempos = rates["time"]
+    na_janela = (tempos >= inicio_pregao_ts) & (tempos <= limite_ts)
 
-    hvn = [p for p, v in profile_map.items() if v >= limite_hvn]
-    lvn = [p for p, v in profile_map.items() if v <= limite_lvn]
+    if not na_janela.any():
+        return None
 
-    return hvn, lvn
+    return {
+        "high": rates["high"][na_janela].max(),
+        "low": rates["low"][na_janela].min(),
+    }
 
 
 def calcular_profile(
@@ -211,20 +678,33 @@ def calcular_profile(
     mult_lvn: float = 0.5,
     percentil_hvn: float = 90,
     percentil_lvn: float = 10,
+    suavizacao_hvn: int = 5,
+    proeminencia_hvn: float = 0.1,
     market_start_hour: int = 9,  # Hora de início do pregão
     market_start_minute: int = 0,  # Minuto de início do pregão
     market_timezone_offset: int = -3,  # ✅ NOVO (UTC offset)
+    va_modo: str = "expansao",
+    va_percents: Sequence[float] = (),
+    histograma: Profile | None = None,
 ) -> dict[str, Any]:
+    """
+    Calcula o Market Profile dos rates.
+
+    Se `histograma` for informado, ele é usado como o profile já calculado
+    desses rates e apenas as métricas (POC, VA, HVN/LVN, IB) são obtidas.
+    """
     if rates is None or len(rates) == 0:
+        vazio = Profile.vazio(block)
         return {
-            "profile": {},
-            "tpo": {},
+            "profile": vazio,
+            "tpo": vazio.tpos,
             "total_volume": 0,
             "total_tpo": 0,
             "poc": None,
             "vah": None,
             "val": None,
             "va_prices": [],
+            "value_areas": [],
             "hvn": [],
             "lvn": [],
             "ib": None,
@@ -235,124 +715,118 @@ def calcular_profile(
             "timeframe": timeframe,
         }
 
-    profile = defaultdict(float)
-    tpo = defaultdict(int)
-
-    for r in rates:
-        low = float(r["low"])
-        high = float(r["high"])
-
-        tick_vol = float(r["tick_volume"]) if "tick_volume" in r.dtype.names else 0.0
-        real_vol = (
-            float(r["real_volume"]) if "real_volume" in r.dtype.names else tick_vol
-        )
-
-        blocks = _range_blocks(low, high, block)
-
-        if by == "tpo":
-            for b in blocks:
-                tpo[b] += 1
-                profile[b] += 1
-
-        elif by == "tick":
-            weights = _distribuir_volume_por_overlap(low, high, block)
-            for b, w in weights.items():
-                profile[b] += w * tick_vol
-                tpo[b] += 1
-
-        elif by == "volume":
-            weights = _distribuir_volume_por_overlap(low, high, block)
-            for b, w in weights.items():
-                profile[b] += w * real_vol
-                tpo[b] += 1
-
-    ordered_profile = OrderedDict(
-        sorted(profile.items(), key=lambda x: x[0], reverse=True)
-    )
-    ordered_tpo = OrderedDict(sorted(tpo.items(), key=lambda x: x[0], reverse=True))
-
-    total_volume = sum(ordered_profile.values())
-    total_tpo = sum(ordered_tpo.values())
-
-    poc = (
-        max(ordered_profile.items(), key=lambda x: x[1])[0] if ordered_profile else None
-    )
-
-    # ===== VALUE AREA =====
-    def calcular_value_area(profile_map: dict[float, float], percent: float):
-        target = sum(profile_map.values()) * percent
-        itens = sorted(profile_map.items(), key=lambda x: x[1], reverse=True)
-
-        acum = 0
-        escolhidos = []
-
-        for price, vol in itens:
-            escolhidos.append(price)
-            acum += vol
-            if acum >= target:
-                break
-
-        return max(escolhidos), min(escolhidos), escolhidos
-
-    vah, val, va_prices = calcular_value_area(dict(ordered_profile), va_percent)
+    if histograma is None:
+        with etapa("binning", barras=len(rates)) as medicao:
+            _, indice, peso = _binning_vetorizado(rates, block, by)
+            base, volume, contagem = _acumular_blocos(indice, peso)
+            profile = Profile(base, block, volume, contagem)
+            medicao.contar(blocos=len(indice), niveis=len(profile))
+    else:
+        profile = histograma
 
-    # ===== HVN / LVN COM CRITÉRIO SELECIONÁVEL =====
-    hvn, lvn = _calcular_hvn_lvn_por_criterio(
-        dict(ordered_profile),
-        criterio=criterio_hvn,
+    metricas = calcular_metricas(
+        profile,
+        va_percent=va_percent,
+        criterio_hvn=criterio_hvn,
         mult_hvn=mult_hvn,
         mult_lvn=mult_lvn,
         percentil_hvn=percentil_hvn,
         percentil_lvn=percentil_lvn,
+        suavizacao_hvn=suavizacao_hvn,
+        proeminencia_hvn=proeminencia_hvn,
+        va_modo=va_modo,
+        va_percents=va_percents,
     )
 
-    # ===== INITIAL BALANCE (UTC-AWARE) =====
-
-    # Data do último candle (sempre em UTC no MT5)
-    last_ts = rates[-1]["time"]
-    d0_utc = datetime.datetime.utcfromtimestamp(last_ts).date()
-
-    # Horário local do início do pregão
-    inicio_pregao_local = datetime.datetime(
-        d0_utc.year, d0_utc.month, d0_utc.day, market_start_hour, market_start_minute
-    )
-
-    # Converte horário local → UTC
-    inicio_pregao_utc = inicio_pregao_local + datetime.timedelta(
-        hours=market_timezone_offset
+    ib = _calcular_ib(
+        rates,
+        ib_minutes,
+        market_start_hour,
+        market_start_minute,
+        market_timezone_offset,
     )
 
-    inicio_pregao_ts = int(inicio_pregao_utc.timestamp())
-    limite_ts = inicio_pregao_ts + ib_minutes * 60
-
-    # Filtra candles dentro da janela do IB (UTC)
-    ib_rates = [r for r in rates if inicio_pregao_ts <= r["time"] <= limite_ts]
-
-    if ib_rates:
-        ib_high = max(r["high"] for r in ib_rates)
-        ib_low = min(r["low"] for r in ib_rates)
-        ib = {"high": ib_high, "low": ib_low}
-    else:
-        ib = None
-
     return {
-        "profile": ordered_profile,
-        "tpo": ordered_tpo,
-        "total_volume": total_volume,
-        "total_tpo": total_tpo,
-        "poc": poc,
-        "vah": vah,
-        "val": val,
-        "va_prices": va_prices,
-        "hvn": hvn,
-        "lvn": lvn,
+        "profile": profile,
+        "tpo": profile.tpos,
+        "total_volume": profile.total_volume,
+        "total_tpo": profile.total_tpo,
+        **metricas,
         "ib": ib,
         "rates_count": len(rates),
         "by": by,
         "block": block,
         "va_percent": va_percent,
+        "va_modo": va_modo,
         "timeframe": timeframe,
         "criterio_hvn": criterio_hvn,
         "market_start_hour": market_start_hour,
         "market_start_minute": market_start_minute,
     }
+
+
+def fatores_blocos(blocks: Sequence[float]) -> list[tuple[float, int]]:
+    """
+    Ordena os tamanhos de bloco e calcula o múltiplo de cada um em relação
+    ao menor.
+
+    Raises:
+        ValueError: Se algum bloco não for múltiplo inteiro do menor.
+
+    Returns:
+        list: Pares (bloco, fator), do menor para o maior bloco.
+    """
+    blocos = sorted({float(b) for b in blocks})
+    if not blocos or blocos[0] <= 0:
+        raise ValueError("Informe ao menos um bloco maior que zero.")
+
+    fino = blocos[0]
+    fatores = []
+    for block in blocos:
+        fator = round(block / fino)
+        if abs(block / fino - fator) > 1e-9:
+            raise ValueError(
+                f"O bloco {block:g} nao e multiplo do menor bloco ({fino:g})."
+            )
+        fatores.append((block, fator))
+    return fatores
+
+
+def calcular_profiles_blocos(
+    rates,
+    blocks: Sequence[float],
+    by: str = "tpo",
+    histograma: Profile | None = None,
+    **parametros,
+) -> list[dict[str, Any]]:
+    """
+    Calcula o Market Profile dos rates em vários tamanhos de bloco com um
+    único binning.
+
+    O binning é feito com o menor bloco (ou `histograma`, já calculado com
+    ele); os demais tamanhos somam níveis adjacentes do histograma fino
+    (`Profile.reagrupar`) e têm POC, VA, HVN/LVN e IB próprios. Os blocos
+    devem ser múltiplos inteiros do menor.
+
+    Args:
+        **parametros: Demais argumentos de `calcular_profile`.
+
+    Returns:
+        list[dict]: Um resultado por bloco, do menor para o maior.
+    """
+    fatores = fatores_blocos(blocks)
+    fino = fatores[0][0]
+
+    resultado_fino = calcular_profile(
+        rates, block=fino, by=by, histograma=histograma, **parametros
+    )
+    resultados = [resultado_fino]
+
+    for block, fator in fatores[1:]:
+        with etapa("reagrupamento", niveis=len(resultado_fino["profile"])):
+            grosso = resultado_fino["profile"].reagrupar(fator)
+        resultados.append(
+            calcular_profile(rates, block=block, by=by, histograma=grosso, **parametros)
+        )
+
+    return resultados
@@ -0,0 +1,185 @@
+"""
+Detecção de HVN e LVN sobre os arrays do profile.
+
+Critérios por limite global, calculados sobre os níveis negociados:
+
+- mult: média multiplicada por `mult_hvn` / `mult_lvn`.
+- std: média mais/menos um desvio padrão.
+- percentil: valores nas posições dos percentis `percentil_hvn` /
+  `percentil_lvn`, obtidos por seleção (`np.partition`, tempo linear) em vez
+  de ordenação completa.
+
+Critério por forma (picos): o volume da grade de preços, na ordem dos preços,
+é suavizado por um kernel gaussiano de `suavizacao` níveis. HVNs são os
+máximos locais e LVNs os mínimos locais da curva suavizada, mantidos apenas
+os de proeminência (altura em relação ao vale ou pico que os separa de um
+ponto mais extremo, como em `scipy.signal.peak_prominences`) de pelo menos
+`proeminencia` vezes o maior volume suavizado. Ao contrário dos limites
+globais, que marcam platôs inteiros, cada nó é um único nível.
+
+Os preços são retornados do mais alto para o mais baixo, como no mapeamento
+do `Profile`.
+"""
+
+import numpy as np
+
+from .profile import Profile
+
+#: Critérios de HVN/LVN suportados
+CRITERIOS_HVN = ("mult", "std", "percentil", "picos")
+
+
+def _limites(
+    volumes: np.ndarray,
+    criterio: str,
+    mult_hvn: float,
+    mult_lvn: float,
+    percentil_hvn: float,
+    percentil_lvn: float,
+) -> tuple[float, float]:
+    """Limites (hvn, lvn) dos critérios globais."""
+    if criterio == "std":
+        media = volumes.mean()
+        desvio = volumes.std()
+        return media + desvio, max(0.0, media - desvio)
+
+    if criterio == "mult":
+        media = volumes.mean()
+        return media * mult_hvn, max(0.0, media * mult_lvn)
+
+    if criterio == "percentil":
+        n = len(volumes)
+        idx_hvn = min(int(n * (percentil_hvn / 100)), n - 1)
+        idx_lvn = max(int(n * (percentil_lvn / 100)), 0)
+        selecionados = np.partition(volumes, sorted({idx_hvn, idx_lvn}))
+        return selecionados[idx_hvn], selecionados[idx_lvn]
+
+    raise ValueError(f"Critério HVN/LVN inválido. Use: {', '.join(CRITERIOS_HVN)}.")
+
+
+def suavizar(volumes: np.ndarray, suavizacao: int) -> np.ndarray:
+    """
+    Convolução com um kernel gaussiano de `suavizacao` níveis (desvio de um
+    quarto da largura); com 1 ou menos, retorna os volumes inalterados.
+    """
+    largura = int(suavizacao)
+    if largura <= 1 or len(volumes) == 0:
+        return np.asarray(volumes, dtype=np.float64)
+
+    raio = largura // 2
+    x = np.arange(-raio, raio + 1, dtype=np.float64)
+    kernel = np.exp(-0.5 * (x / max(largura / 4, 0.5)) ** 2)
+    kernel /= kernel.sum()
+
+    # Bordas repetidas evitam que a suavização crie vales nas extremidades
+    estendido = np.pad(np.asarray(volumes, dtype=np.float64), raio, mode="edge")
+    return np.convolve(estendido, kernel, mode="valid")
+
+
+def maximos_locais(curva: np.ndarray) -> np.ndarray:
+    """
+    Posições dos máximos locais, exceto nas extremidades; em um platô, a
+    posição central.
+    """
+    diferenca = np.diff(curva)
+    mudancas = np.flatnonzero(diferenca)
+    if len(mudancas) < 2:
+        return np.empty(0, dtype=np.int64)
+
+    sobe = diferenca[mudancas[:-1]] > 0
+    desce = diferenca[mudancas[1:]] < 0
+    j = np.flatnonzero(sobe & desce)
+    # Platô de mudancas[j] + 1 até mudancas[j + 1]
+    return (mudancas[j] + 1 + mudancas[j + 1]) // 2
+
+
+def proeminencias(curva: np.ndarray, picos: np.ndarray) -> np.ndarray:
+    """
+    Proeminência de cada pico: altura acima do maior entre os mínimos que o
+    separam, à esquerda e à direita, do ponto mais alto mais próximo (ou da
+    extremidade da curva).
+    """
+    if len(picos) == 0:
+        return np.empty(0, dtype=np.float64)
+
+    # Mínimo da curva entre picos consecutivos (e até as extremidades)
+    limites = np.concatenate(([0], picos, [len(curva) - 1]))
+    trechos = np.minimum.reduceat(curva, limites[:-1])
+    # trechos[k]: mínimo de limites[k] até limites[k + 1] - 1
+    minimo_antes = np.minimum(trechos[:-1], curva[picos])
+    minimo_depois = np.append(trechos[1:-1], min(trechos[-1], curva[-1]))
+
+    alturas = curva[picos]
+    base_esquerda = _bases(alturas, minimo_antes)
+    base_direita = _bases(alturas[::-1], minimo_depois[::-1])[::-1]
+    return alturas - np.maximum(base_esquerda, base_direita)
+
+
+def _bases(alturas: np.ndarray, minimo_antes: np.ndarray) -> np.ndarray:
+    """
+    Para cada pico, o mínimo da curva desde o pico anterior mais alto (ou o
+    início) até ele, com uma pilha monotônica sobre os picos.
+    """
+    bases = np.empty(len(alturas), dtype=np.float64)
+    pilha: list[tuple[float, float]] = []
+    for k, (altura, minimo) in enumerate(
+        zip(alturas.tolist(), minimo_antes.tolist(), strict=True)
+    ):
+        while pilha and pilha[-1][0] <= altura:
+            minimo = min(minimo, pilha.pop()[1])
+        bases[k] = minimo
+        pilha.append((altura, minimo))
+    return bases
+
+
+def _nos_por_picos(
+    profile: Profile, suavizacao: int, proeminencia: float
+) -> tuple[np.ndarray, np.ndarray]:
+    curva = suavizar(profile.volume, suavizacao)
+    if len(curva) < 3:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    minimo = proeminencia * float(curva.max())
+
+    picos = maximos_locais(curva)
+    picos = picos[proeminencias(curva, picos) >= minimo]
+
+    vales = maximos_locais(-curva)
+    vales = vales[proeminencias(-curva, vales) >= minimo]
+
+    # Apenas níveis negociados aparecem no profile
+    return picos[profile.tpo[picos] > 0], vales[profile.tpo[vales] > 0]
+
+
+def detectar_nos(
+    profile: Profile,
+    criterio: str = "mult",
+    mult_hvn: float = 1.5,
+    mult_lvn: float = 0.5,
+    percentil_hvn: float = 90,
+    percentil_lvn: float = 10,
+    suavizacao: int = 5,
+    proeminencia: float = 0.1,
+) -> tuple[list[float], list[float]]:
+    """
+    Calcula os HVNs e LVNs do profile.
+
+    Returns:
+        tuple: (hvn, lvn), listas de preços do mais alto para o mais baixo.
+    """
+    if not len(profile):
+        return [], []
+
+    if criterio == "picos":
+        hvn, lvn = _nos_por_picos(profile, suavizacao, proeminencia)
+    else:
+        tocados = profile.tocados
+        volumes = profile.volume[tocados]
+        limite_hvn, limite_lvn = _limites(
+            volumes, criterio, mult_hvn, mult_lvn, percentil_hvn, percentil_lvn
+        )
+        hvn = tocados[volumes >= limite_hvn]
+        lvn = tocados[volumes <= limite_lvn]
+
+    precos = profile.precos
+    return precos[hvn[::-1]].tolist(), precos[lvn[::-1]].tolist()
@@ -7,15 +7,76 @@ execute o Market Profile via:
 
     mt mp
 
-ou conforme alias configurado.
+ou conforme alias configurado, e o comando `mp-export`, de exportação em
+lote dos níveis de cada sessão.
+
+O comando é registrado de forma preguiçosa: o módulo `.cli` (e, com ele,
+a configuração) só é importado quando `mp` é executado ou tem a ajuda
+exibida, sem custo na inicialização do `mt` para outros comandos.
 """
 
-from .cli import profile
+from collections.abc import Callable
+
+import click
+
+#: Ajuda curta exibida na listagem de comandos do `mt`
+_AJUDA_CURTA = "Calcula e exibe o Market Profile de um ativo."
+
+#: Ajuda curta do comando de exportação
+_AJUDA_EXPORTAR = "Exporta os niveis do Market Profile de cada sessao para CSV."
+
+
+class _ComandoPreguicoso(click.Command):
+    """
+    Comando do click que só importa o comando real quando usado.
+
+    A listagem de comandos usa apenas o nome e a ajuda curta; análise dos
+    argumentos, execução e ajuda completa são delegadas ao comando real.
+    """
+
+    def __init__(
+        self, name: str, importar: Callable[[], click.Command], short_help: str
+    ) -> None:
+        super().__init__(name, short_help=short_help, help=short_help)
+        self._importar = importar
+        self._comando: click.Command | None = None
+
+    def _real(self) -> click.Command:
+        if self._comando is None:
+            self._comando = self._importar()
+        return self._comando
+
+    def make_context(self, info_name, args, parent=None, **extra):
+        return self._real().make_context(info_name, args, parent=parent, **extra)
+
+    def invoke(self, ctx):
+        return self._real().invoke(ctx)
+
+    def get_params(self, ctx):
+        return self._real().get_params(ctx)
+
+    def get_help(self, ctx):
+        return self._real().get_help(ctx)
+
+    def get_usage(self, ctx):
+        return self._real().get_usage(ctx)
+
+
+def _importar_profile() -> click.Command:
+    from .cli import profile
+
+    return profile
+
+
+def _importar_exportar() -> click.Command:
+    from .cli import exportar
+
+    return exportar
 
 
 def register(cli):
     """
-    Registra o comando de Market Profile na CLI principal do mtcli.
+    Registra os comandos de Market Profile na CLI principal do mtcli.
 
     Args:
         cli: Objeto principal da aplicação mtcli responsável
@@ -24,4 +85,10 @@ def register(cli):
     Returns:
         None
     """
-    cli.add_command(profile, name="mp")
+    cli.add_command(
+        _ComandoPreguicoso("mp", _importar_profile, _AJUDA_CURTA), name="mp"
+    )
+    cli.add_command(
+        _ComandoPreguicoso("mp-export", _importar_exportar, _AJUDA_EXPORTAR),
+        name="mp-export",
+    )
@@ -0,0 +1,212 @@
+"""
+Estrutura compacta do Market Profile em grade inteira de preços.
+
+O histograma é guardado em arrays numpy contíguos indexados pelo
+deslocamento inteiro do bloco em relação a um índice base. O preço de cada
+posição é obtido por `(base + i) * block`, evitando dicionários com chaves
+float, ordenações repetidas e cópias.
+
+Para manter compatibilidade com a camada de visualização, `Profile` se
+comporta como um mapeamento preço → volume ordenado do preço mais alto para
+o mais baixo.
+"""
+
+from collections.abc import Iterator, Mapping
+
+import numpy as np
+
+
+class Profile(Mapping):
+    """
+    Histograma de volume e TPO por bloco de preço.
+
+    Apenas os blocos tocados por algum candle (tpo > 0) aparecem como chaves
+    do mapeamento; blocos intermediários sem negociação ficam zerados nos
+    arrays, mas não são expostos.
+
+    Attributes:
+        base (int): Índice inteiro do bloco na posição 0 dos arrays.
+        block (float): Tamanho do bloco de preço.
+        volume (np.ndarray): Volume (ou contagem de TPOs) por posição.
+        tpo (np.ndarray): Quantidade de candles que tocaram cada posição.
+    """
+
+    __slots__ = ("base", "block", "volume", "tpo")
+
+    def __init__(
+        self, base: int, block: float, volume: np.ndarray, tpo: np.ndarray
+    ) -> None:
+        self.base = int(base)
+        self.block = float(block)
+        self.volume = volume
+        self.tpo = tpo
+
+    @classmethod
+    def vazio(cls, block: float) -> "Profile":
+        """Cria um profile sem nenhum bloco."""
+        return cls(0, block, np.empty(0, dtype=np.float64), np.empty(0, dtype=np.int64))
+
+    # ------------------------------------------------------------------
+    # Grade de preços
+    # ------------------------------------------------------------------
+
+    def preco(self, posicao: int) -> float:
+        """Retorna o preço do bloco na posição informada."""
+        return round((self.base + int(posicao)) * self.block, 8)
+
+    def posicao(self, preco: float) -> int:
+        """Retorna a posição do bloco correspondente ao preço informado."""
+        return int(round(preco / self.block)) - self.base
+
+    @property
+    def precos(self) -> np.ndarray:
+        """Preços de todas as posições da grade, em ordem crescente."""
+        return np.round((np.arange(len(self.volume)) + self.base) * self.block, 8)
+
+    @property
+    def tocados(self) -> np.ndarray:
+        """Posições com pelo menos um toque, em ordem crescente."""
+        return np.flatnonzero(self.tpo)
+
+    def fatia(self, preco_min: float, preco_max: float) -> "Profile":
+        """
+        Restringe o profile à faixa de preços [preco_min, preco_max].
+
+        Os arrays do resultado são views dos originais, sem cópia.
+        """
+        n = len(self.volume)
+        ini = min(max(self.posicao(preco_min), 0), n)
+        fim = min(max(self.posicao(preco_max) + 1, ini), n)
+        return Profile(
+            self.base + ini, self.block, self.volume[ini:fim], self.tpo[ini:fim]
+        )
+
+    def reagrupar(self, fator: int) -> "Profile":
+        """
+        Profile com blocos `fator` vezes maiores, somando níveis adjacentes.
+
+        O bloco grosso de índice J cobre os blocos finos de índice i com
+        `ceil(i / fator) == J`, isto é, a mesma faixa ((J - 1) * B, J * B]
+        do binning direto com o bloco B. Diferenças em relação ao binning
+        direto:
+
+        - TPOs são a soma dos TPOs dos blocos finos: um candle que toca
+          vários blocos finos do mesmo bloco grosso conta uma vez para cada
+          um (no modo tpo, isso vale também para o volume).
+        - Nos modos tick e volume, o volume de cada nível coincide, exceto o
+          de candles sem range (high == low) entre dois blocos grossos, que
+          o binning direto divide entre eles.
+        - O bloco sem sobreposição logo abaixo da mínima de cada candle, que
+          o binning direto marca como tocado, não aparece.
+
+        O custo é proporcional à quantidade de níveis, não de candles.
+        """
+        fator = int(fator)
+        if fator < 1:
+            raise ValueError("O fator de reagrupamento deve ser positivo.")
+        if fator == 1:
+            return self
+
+        block = self.block * fator
+        if not len(self.volume):
+            return Profile.vazio(block)
+
+        # Divisão inteira arredondada para cima (vale para índices negativos)
+        grosso = -(-(np.arange(len(self.volume)) + self.base) // fator)
+        base = int(grosso[0])
+        pos = grosso - base
+        volume = np.bincount(pos, weights=self.volume)
+        tpo = np.bincount(pos, weights=self.tpo).astype(np.int64)
+        return Profile(base, block, volume, tpo)
+
+    # ------------------------------------------------------------------
+    # Totais e POC
+    # ------------------------------------------------------------------
+
+    @property
+    def total_volume(self) -> float:
+        return float(self.volume.sum())
+
+    @property
+    def total_tpo(self) -> int:
+        return int(self.tpo.sum())
+
+    @property
+    def poc(self) -> float | None:
+        """
+        Preço de maior volume; em caso de empate, o mais alto.
+        """
+        if not len(self):
+            return None
+        pos = len(self.volume) - 1 - int(np.argmax(self.volume[::-1]))
+        return self.preco(pos)
+
+    # ------------------------------------------------------------------
+    # Interface de mapeamento (preço → volume, do mais alto ao mais baixo)
+    # ------------------------------------------------------------------
+
+    def __getitem__(self, preco: float) -> float:
+        pos = self.posicao(preco)
+        if 0 <= pos < len(self.tpo) and self.tpo[pos] > 0:
+            return float(self.volume[pos])
+        raise KeyError(preco)
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.tpo))
+
+    def keys(self) -> list[float]:
+        return self.precos[self.tocados[::-1]].tolist()
+
+    def values(self) -> list[float]:
+        return self.volume[self.tocados[::-1]].tolist()
+
+    def items(self) -> list[tuple[float, float]]:
+        pos = self.tocados[::-1]
+        return list(
+            zip(self.precos[pos].tolist(), self.volume[pos].tolist(), strict=True)
+        )
+
+    @property
+    def tpos(self) -> "MapaTpo":
+        """Mapeamento preço → quantidade de TPOs sobre os mesmos arrays."""
+        return MapaTpo(self)
+
+    def __repr__(self) -> str:
+        return f"Profile(base={self.base}, block={self.block}, niveis={len(self)})"
+
+
+class MapaTpo(Mapping):
+    """
+    Visão preço → TPO de um `Profile`, na mesma ordem do mapeamento de volume.
+    """
+
+    __slots__ = ("_profile",)
+
+    def __init__(self, profile: Profile) -> None:
+        self._profile = profile
+
+    def __getitem__(self, preco: float) -> int:
+        p = self._profile
+        pos = p.posicao(preco)
+        if 0 <= pos < len(p.tpo) and p.tpo[pos] > 0:
+            return int(p.tpo[pos])
+        raise KeyError(preco)
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self._profile.keys())
+
+    def __len__(self) -> int:
+        return len(self._profile)
+
+    def keys(self) -> list[float]:
+        return self._profile.keys()
+
+    def values(self) -> list[int]:
+        p = self._profile
+        return p.tpo[p.tocados[::-1]].tolist()
+
+    def items(self) -> list[tuple[float, int]]:
+        return list(zip(self.keys(), self.values(), strict=True))
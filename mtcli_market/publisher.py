@@ -0,0 +1,549 @@
+"""
+Publicação do profile em memória compartilhada (arquivo mapeado em memória).
+
+Com `mt mp --publicar`, o processo que consulta o terminal grava o profile
+mais recente em um arquivo mapeado (`mmap`); outros processos (estratégia,
+monitor de risco, painel) leem os arrays diretamente do mapeamento, sem
+consultar o MT5 e sem serialização.
+
+Layout (versão 2), little-endian:
+
+- Cabeçalho de 256 bytes (`CABECALHO`): identificação `MTMP`, versão,
+  contador de atualizações `seq`, capacidade dos arrays, quantidade de
+  níveis e de HVN/LVN, grade (`base`, `block`), POC, VAH, VAL, IB, volume
+  total, quantidade de candles, horário da publicação, ativo e geração do
+  arquivo que o substituiu (`proximo`).
+- `precos`, `volume` (float64) e `tpo` (int64), com `capacidade` posições
+  cada, na ordem crescente da grade de preços; apenas as `n` primeiras são
+  válidas.
+- `hvn` e `lvn` (float64), com `max_nos` posições cada, do preço mais alto
+  para o mais baixo.
+
+Níveis ausentes (VA ou IB de um profile vazio) são gravados como NaN.
+
+Consistência (seqlock): antes de gravar, o publicador torna `seq` ímpar e,
+ao terminar, par. O leitor lê `seq`, os dados e `seq` novamente; se o valor
+mudou ou era ímpar, a leitura é repetida. Com `copiar=False`, os arrays
+retornados são views do mapeamento e a leitura só é válida se
+`ProfileReader.valido` confirmar, após o uso, que não houve nova
+publicação.
+
+Um arquivo mapeado nunca é substituído nem redimensionado (no Windows, isso
+falha enquanto outro processo o mapeia). O publicador reiniciado reaproveita
+o arquivo atual no lugar: `seq` continua do valor anterior e o cabeçalho é
+zerado. Quando um profile não cabe na capacidade do arquivo, o publicador
+cria a geração seguinte (`<caminho>.<geracao>`), maior, e grava o número
+dela em `proximo` no arquivo anterior e no arquivo do caminho, marcando o
+anterior como substituído; os leitores abertos seguem `proximo` na leitura
+seguinte, e os novos leitores partem do caminho. Gerações antigas são
+removidas assim que nenhum leitor as mapeia.
+
+Exemplo:
+    with ProfileReader(caminho_publicacao("WIN$N")) as leitor:
+        atual = leitor.ler()
+        print(atual["poc"], atual["vah"], atual["val"])
+"""
+
+import glob
+import math
+import mmap
+import os
+import re
+import tempfile
+import time
+from typing import Any
+
+import numpy as np
+
+from mtcli.logger import setup_logger
+
+from .conf import CACHE_DIR
+
+log = setup_logger()
+
+#: Identificação e versão do layout
+MAGICO = b"MTMP"
+VERSAO = 2
+
+#: Tamanho reservado ao cabeçalho, em bytes
+TAMANHO_CABECALHO = 256
+
+#: Campos do cabeçalho
+CABECALHO = np.dtype(
+    [
+        ("magico", "S4"),
+        ("versao", "<u4"),
+        ("seq", "<u8"),
+        ("substituido", "<u4"),
+        ("capacidade", "<u4"),
+        ("max_nos", "<u4"),
+        ("n", "<u4"),
+        ("n_hvn", "<u4"),
+        ("n_lvn", "<u4"),
+        ("base", "<i8"),
+        ("block", "<f8"),
+        ("poc", "<f8"),
+        ("vah", "<f8"),
+        ("val", "<f8"),
+        ("ib_high", "<f8"),
+        ("ib_low", "<f8"),
+        ("total_volume", "<f8"),
+        ("rates_count", "<i8"),
+        ("publicado", "<f8"),
+        ("symbol", "S32"),
+        ("proximo", "<u4"),
+    ],
+    align=True,
+)
+
+
+def caminho_publicacao(symbol: str, diretorio: str | None = None) -> str:
+    """
+    Arquivo de publicação padrão do ativo (sem `diretorio`, a pasta
+    `publicacao` em CACHE_DIR).
+    """
+    if diretorio is None:
+        diretorio = os.path.join(CACHE_DIR, "publicacao")
+    nome = re.sub(r"[^A-Za-z0-9_.$-]", "_", symbol)
+    return os.path.join(diretorio, nome + ".mmap")
+
+
+def _caminho_geracao(caminho: str, geracao: int) -> str:
+    """Arquivo de uma geração da publicação (a geração 0 é o próprio caminho)."""
+    return caminho if geracao == 0 else f"{caminho}.{geracao}"
+
+
+def _tamanho(capacidade: int, max_nos: int) -> int:
+    return TAMANHO_CABECALHO + 24 * capacidade + 16 * max_nos
+
+
+def _vistas(mm, capacidade: int, max_nos: int) -> dict[str, np.ndarray]:
+    """Cabeçalho e arrays como views do mapeamento."""
+    vistas = {"cabecalho": np.ndarray((), dtype=CABECALHO, buffer=mm)}
+    deslocamento = TAMANHO_CABECALHO
+    for nome, dtype, tamanho in (
+        ("precos", np.float64, capacidade),
+        ("volume", np.float64, capacidade),
+        ("tpo", np.int64, capacidade),
+        ("hvn", np.float64, max_nos),
+        ("lvn", np.float64, max_nos),
+    ):
+        vistas[nome] = np.ndarray(tamanho, dtype=dtype, buffer=mm, offset=deslocamento)
+        deslocamento += tamanho * 8
+    return vistas
+
+
+def _validar(mm: mmap.mmap) -> tuple[int, int]:
+    """
+    Confere identificação, versão e tamanho do arquivo mapeado.
+
+    Returns:
+        tuple: (capacidade, max_nos).
+    """
+    if len(mm) < TAMANHO_CABECALHO:
+        raise ValueError("Arquivo de publicacao invalido.")
+    cabecalho = np.frombuffer(mm, dtype=CABECALHO, count=1)[0]
+    capacidade = int(cabecalho["capacidade"])
+    max_nos = int(cabecalho["max_nos"])
+    if (
+        bytes(cabecalho["magico"]) != MAGICO
+        or cabecalho["versao"] != VERSAO
+        or len(mm) < _tamanho(capacidade, max_nos)
+    ):
+        raise ValueError("Arquivo de publicacao invalido.")
+    return capacidade, max_nos
+
+
+def _float(v) -> float:
+    return math.nan if v is None else float(v)
+
+
+def _liberar(mm: mmap.mmap) -> None:
+    """Fecha o mapeamento, ou deixa para o coletor se ainda houver views."""
+    try:
+        mm.close()
+    except BufferError:
+        pass
+
+
+def _mapear(caminho: str) -> tuple[mmap.mmap, int, int] | None:
+    """
+    Mapeia um arquivo de publicação para escrita.
+
+    Returns:
+        tuple | None: (mapeamento, capacidade, max_nos); None se o arquivo
+        não existir ou não tiver o layout esperado.
+    """
+    try:
+        with open(caminho, "r+b") as f:
+            mm = mmap.mmap(f.fileno(), 0)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        capacidade, max_nos = _validar(mm)
+    except ValueError:
+        mm.close()
+        return None
+    return mm, capacidade, max_nos
+
+
+def _remover(caminho: str) -> None:
+    """Remove uma geração antiga, a menos que um leitor ainda a mapeie."""
+    try:
+        os.remove(caminho)
+    except FileNotFoundError:
+        pass
+    except PermissionError:
+        log.warning(f"Publicacao em uso, remocao adiada: {caminho}")
+
+
+class ProfilePublisher:
+    """
+    Grava o profile mais recente em um arquivo mapeado em memória.
+
+    Args:
+        caminho (str): Arquivo de publicação.
+        capacidade (int): Níveis de preço mínimos do arquivo.
+        max_nos (int): HVNs e LVNs mínimos do arquivo.
+    """
+
+    def __init__(self, caminho: str, capacidade: int = 4096, max_nos: int = 256):
+        self.caminho = caminho
+        self._mm: mmap.mmap | None = None
+        # Arquivo do caminho (geração 0): indica aos novos leitores a atual
+        self._raiz: mmap.mmap | None = None
+        self._vistas_raiz: dict[str, np.ndarray] = {}
+        self.geracao = 0
+
+        if not self._assumir_anterior(capacidade, max_nos):
+            diretorio = os.path.dirname(os.path.abspath(caminho))
+            os.makedirs(diretorio, exist_ok=True)
+            if not self._criar(caminho, capacidade, max_nos, seq=1):
+                raise PermissionError(f"Publicacao em uso: {caminho}")
+            self._raiz, self.capacidade, self.max_nos = _mapear(caminho)
+            self._mm = self._raiz
+            self._vistas = self._vistas_raiz = _vistas(
+                self._raiz, self.capacidade, self.max_nos
+            )
+        self._remover_geracoes_antigas()
+
+    def _assumir_anterior(self, capacidade: int, max_nos: int) -> bool:
+        """
+        Reaproveita, no lugar, a publicação anterior no mesmo caminho, para
+        que os leitores abertos continuem no mesmo arquivo.
+
+        Returns:
+            bool: False se não houver publicação válida no caminho.
+        """
+        raiz = _mapear(self.caminho)
+        if raiz is None:
+            return False
+        self._raiz = raiz[0]
+        self._vistas_raiz = _vistas(*raiz)
+        self._mm, self.capacidade, self.max_nos = raiz
+        self._vistas = self._vistas_raiz
+
+        geracao = int(self._vistas_raiz["cabecalho"]["proximo"])
+        atual = _mapear(_caminho_geracao(self.caminho, geracao)) if geracao else None
+        if atual is not None:
+            self._mm, self.capacidade, self.max_nos = atual
+            self._vistas = _vistas(*atual)
+            self.geracao = geracao
+
+        cabecalho = self._vistas["cabecalho"]
+        if cabecalho["substituido"]:
+            # Geração indicada ausente: volta a publicar no próprio caminho
+            cabecalho["substituido"] = 0
+            cabecalho["proximo"] = 0
+
+        if capacidade > self.capacidade or max_nos > self.max_nos:
+            self._crescer(max(capacidade, self.capacidade), max(max_nos, self.max_nos))
+        else:
+            # Zera a publicação anterior, com `seq` ímpar durante a escrita
+            if cabecalho["seq"] % 2 == 0:
+                cabecalho["seq"] += 1
+            for campo in ("n", "n_hvn", "n_lvn", "base", "rates_count"):
+                cabecalho[campo] = 0
+            for campo in ("block", "total_volume", "publicado"):
+                cabecalho[campo] = 0.0
+            for campo in ("poc", "vah", "val", "ib_high", "ib_low"):
+                cabecalho[campo] = math.nan
+        # Par: até a primeira publicação, os leitores veem um profile vazio
+        self._vistas["cabecalho"]["seq"] += 1
+        return True
+
+    @staticmethod
+    def _criar(caminho: str, capacidade: int, max_nos: int, seq: int) -> bool:
+        """
+        Cria um arquivo de publicação vazio em `caminho`.
+
+        Returns:
+            bool: False se já houver no caminho um arquivo em uso que não
+            possa ser substituído (Windows).
+        """
+        cabecalho = np.zeros((), dtype=CABECALHO)
+        cabecalho["magico"] = MAGICO
+        cabecalho["versao"] = VERSAO
+        cabecalho["capacidade"] = capacidade
+        cabecalho["max_nos"] = max_nos
+        cabecalho["seq"] = seq
+        for campo in ("poc", "vah", "val", "ib_high", "ib_low"):
+            cabecalho[campo] = math.nan
+
+        diretorio = os.path.dirname(os.path.abspath(caminho))
+        fd, temporario = tempfile.mkstemp(dir=diretorio, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(cabecalho.tobytes().ljust(TAMANHO_CABECALHO, b"\0"))
+                f.truncate(_tamanho(capacidade, max_nos))
+            os.replace(temporario, caminho)
+            return True
+        except PermissionError:
+            log.warning(f"Publicacao em uso, arquivo nao substituido: {caminho}")
+            os.remove(temporario)
+            return False
+        except OSError:
+            os.remove(temporario)
+            raise
+
+    def _crescer(self, capacidade: int, max_nos: int) -> None:
+        """Passa a publicar na geração seguinte, com a capacidade informada."""
+        # `seq` continua do arquivo atual, ímpar até a primeira publicação
+        seq = (int(self._vistas["cabecalho"]["seq"]) + 1) | 1
+        geracao = self.geracao + 1
+        while not self._criar(
+            _caminho_geracao(self.caminho, geracao), capacidade, max_nos, seq
+        ):
+            geracao += 1
+        novo = _mapear(_caminho_geracao(self.caminho, geracao))
+        if novo is None:
+            raise OSError(f"Falha ao mapear a publicacao: {self.caminho}")
+
+        # Leitores do arquivo atual e novos leitores passam para o novo
+        self._vistas["cabecalho"]["proximo"] = geracao
+        self._vistas["cabecalho"]["substituido"] = 1
+        self._vistas_raiz["cabecalho"]["proximo"] = geracao
+        self._vistas_raiz["cabecalho"]["substituido"] = 1
+
+        anterior = self.geracao
+        if self._mm is not self._raiz:
+            self._vistas = {}
+            _liberar(self._mm)
+        self._mm, self.capacidade, self.max_nos = novo
+        self._vistas = _vistas(*novo)
+        self.geracao = geracao
+        if anterior:
+            _remover(_caminho_geracao(self.caminho, anterior))
+
+    def _remover_geracoes_antigas(self) -> None:
+        for arquivo in glob.glob(glob.escape(self.caminho) + ".*"):
+            sufixo = arquivo[len(self.caminho) + 1 :]
+            if sufixo.isdigit() and int(sufixo) != self.geracao:
+                _remover(arquivo)
+
+    def publicar(self, resultado: dict[str, Any], symbol: str) -> int:
+        """
+        Publica o resultado de `calcular_profile`.
+
+        Returns:
+            int: Valor de `seq` após a publicação.
+        """
+        profile = resultado["profile"]
+        hvn = resultado.get("hvn", [])
+        lvn = resultado.get("lvn", [])
+        n = len(profile.volume)
+
+        if n > self.capacidade or max(len(hvn), len(lvn)) > self.max_nos:
+            capacidade, max_nos = self.capacidade, self.max_nos
+            while capacidade < n:
+                capacidade *= 2
+            while max_nos < max(len(hvn), len(lvn)):
+                max_nos *= 2
+            self._crescer(capacidade, max_nos)
+
+        v = self._vistas
+        cabecalho = v["cabecalho"]
+        ib = resultado.get("ib") or {}
+
+        if cabecalho["seq"] % 2 == 0:
+            cabecalho["seq"] += 1  # ímpar: gravação em andamento
+        cabecalho["n"] = n
+        cabecalho["n_hvn"] = len(hvn)
+        cabecalho["n_lvn"] = len(lvn)
+        cabecalho["base"] = profile.base
+        cabecalho["block"] = profile.block
+        cabecalho["poc"] = _float(resultado.get("poc"))
+        cabecalho["vah"] = _float(resultado.get("vah"))
+        cabecalho["val"] = _float(resultado.get("val"))
+        cabecalho["ib_high"] = _float(ib.get("high"))
+        cabecalho["ib_low"] = _float(ib.get("low"))
+        cabecalho["total_volume"] = _float(resultado.get("total_volume"))
+        cabecalho["rates_count"] = int(resultado.get("rates_count") or 0)
+        cabecalho["publicado"] = time.time()
+        cabecalho["symbol"] = symbol.encode()[:32]
+        v["precos"][:n] = profile.precos
+        v["volume"][:n] = profile.volume
+        v["tpo"][:n] = profile.tpo
+        v["hvn"][: len(hvn)] = hvn
+        v["lvn"][: len(lvn)] = lvn
+        cabecalho["seq"] += 1  # par: dados consistentes
+
+        return int(cabecalho["seq"])
+
+    def fechar(self) -> None:
+        """Desfaz o mapeamento; o arquivo permanece com a última publicação."""
+        self._vistas = self._vistas_raiz = {}
+        for mm in {id(m): m for m in (self._mm, self._raiz) if m is not None}.values():
+            _liberar(mm)
+        self._mm = self._raiz = None
+
+    def __enter__(self) -> "ProfilePublisher":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.fechar()
+
+
+class ProfileReader:
+    """
+    Lê o profile publicado por `ProfilePublisher` em outro processo.
+
+    Args:
+        caminho (str): Arquivo de publicação.
+
+    Raises:
+        ValueError: Se o arquivo não tiver o layout esperado.
+    """
+
+    def __init__(self, caminho: str) -> None:
+        self.caminho = caminho
+        self._mm: mmap.mmap | None = None
+        self._abrir()
+
+    def _abrir(self) -> None:
+        """Mapeia a geração atual, indicada em `proximo` no caminho."""
+        # Views já entregues com copiar=False mantêm o mapeamento anterior
+        self.fechar()
+
+        mm, capacidade, max_nos = self._mapear(self.caminho)
+        cabecalho = np.frombuffer(mm, dtype=CABECALHO, count=1)[0]
+        geracao = int(cabecalho["proximo"])
+        if cabecalho["substituido"] and geracao:
+            try:
+                atual = self._mapear(_caminho_geracao(self.caminho, geracao))
+            except (OSError, ValueError):
+                # Geração já substituída e removida: a próxima leitura tenta
+                # de novo a partir do caminho
+                pass
+            else:
+                del cabecalho
+                _liberar(mm)
+                mm, capacidade, max_nos = atual
+
+        self._mm = mm
+        self._vistas = _vistas(mm, capacidade, max_nos)
+
+    @staticmethod
+    def _mapear(caminho: str) -> tuple[mmap.mmap, int, int]:
+        with open(caminho, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            capacidade, max_nos = _validar(mm)
+        except ValueError:
+            mm.close()
+            raise ValueError(f"Arquivo de publicacao invalido: {caminho}") from None
+        return mm, capacidade, max_nos
+
+    def ler(self, copiar: bool = True, tentativas: int = 10000) -> dict[str, Any]:
+        """
+        Lê a publicação mais recente.
+
+        Args:
+            copiar (bool): Com False, `precos`, `volume`, `tpo`, `hvn` e
+                `lvn` são views do mapeamento; confirme com `valido` após o
+                uso.
+            tentativas (int): Leituras tentadas enquanto o publicador grava.
+
+        Raises:
+            TimeoutError: Se nenhuma leitura consistente for obtida.
+        """
+        for _ in range(tentativas):
+            cabecalho = self._vistas["cabecalho"]
+            if cabecalho["substituido"]:
+                self._abrir()
+                continue
+
+            seq = int(cabecalho["seq"])
+            if seq % 2:
+                time.sleep(0)
+                continue
+
+            # Cópia do cabeçalho: os escalares não mudam após a validação
+            campos = cabecalho.copy()
+            n, n_hvn, n_lvn = (
+                int(campos["n"]),
+                int(campos["n_hvn"]),
+                int(campos["n_lvn"]),
+            )
+            arrays = {
+                "precos": self._vistas["precos"][:n],
+                "volume": self._vistas["volume"][:n],
+                "tpo": self._vistas["tpo"][:n],
+                "hvn": self._vistas["hvn"][:n_hvn],
+                "lvn": self._vistas["lvn"][:n_lvn],
+            }
+            if copiar:
+                arrays = {nome: a.copy() for nome, a in arrays.items()}
+
+            if int(cabecalho["seq"]) != seq:
+                continue
+
+            return _instantaneo(seq, campos, arrays)
+
+        raise TimeoutError(f"Publicacao em gravacao continua: {self.caminho}")
+
+    def valido(self, instantaneo: dict[str, Any]) -> bool:
+        """Se não houve publicação desde a leitura do instantâneo."""
+        cabecalho = self._vistas["cabecalho"]
+        if cabecalho["substituido"]:
+            return False
+        return int(cabecalho["seq"]) == instantaneo["seq"]
+
+    def fechar(self) -> None:
+        if self._mm is not None:
+            self._vistas = {}
+            _liberar(self._mm)
+            self._mm = None
+
+    def __enter__(self) -> "ProfileReader":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.fechar()
+
+
+def _instantaneo(seq: int, campos: np.ndarray, arrays: dict) -> dict[str, Any]:
+    def nivel(campo: str) -> float | None:
+        v = float(campos[campo])
+        return None if math.isnan(v) else v
+
+    ib = None
+    if nivel("ib_high") is not None:
+        ib = {"high": nivel("ib_high"), "low": nivel("ib_low")}
+
+    return {
+        "seq": seq,
+        "symbol": bytes(campos["symbol"]).decode(),
+        "publicado": float(campos["publicado"]),
+        "rates_count": int(campos["rates_count"]),
+        "base": int(campos["base"]),
+        "block": float(campos["block"]),
+        "total_volume": float(campos["total_volume"]),
+        "poc": nivel("poc"),
+        "vah": nivel("vah"),
+        "val": nivel("val"),
+        "ib": ib,
+        **arrays,
+    }
@@ -0,0 +1,148 @@
+"""
+Timeframes customizados montados localmente a partir de um timeframe nativo.
+
+Um período como `45m`, `90m` ou `3d`, sem equivalente no MetaTrader 5, é
+montado a partir do maior timeframe nativo cuja duração o divide (`45m` a
+partir de M15, `90m` de M30, `3d` de D1). Os candles nativos são agrupados
+pelo início do candle customizado a que pertencem, com `reduceat` sobre a
+coluna `time`: abertura do primeiro, fechamento do último, máxima e mínima
+do grupo e volumes somados.
+
+Períodos menores que um dia são alinhados à meia-noite (horário do
+servidor): os candles de `45m` começam em 00:00, 00:45, ... e o último do
+dia termina à meia-noite mesmo quando o período não divide o dia. Períodos
+de um dia ou mais são alinhados a múltiplos do período desde 1970-01-01.
+
+Como o timeframe nativo é o que vai ao terminal, ao cache de rates e ao
+replay, vários períodos com a mesma base (ex: `45m` e `75m`, ambos de M15)
+compartilham os mesmos dados em cache.
+"""
+
+import re
+
+import numpy as np
+
+from .datasource import TIMEFRAMES
+
+_DIA = 86400
+
+#: Segundos por unidade dos timeframes customizados
+_UNIDADES = {"M": 60, "H": 3600, "D": _DIA}
+
+#: Campos somados ao agrupar os candles
+_SOMADOS = ("tick_volume", "real_volume")
+
+
+def _segundos_nativo(codigo: int) -> int:
+    # Códigos de minutos valem a própria quantidade; os de horas têm 0x4000
+    return codigo * 60 if codigo < 0x4000 else (codigo - 0x4000) * 3600
+
+
+#: Timeframes nativos de até um dia, do maior para o menor: (código, segundos)
+_NATIVOS = sorted(
+    (
+        (codigo, _segundos_nativo(codigo))
+        for nome, codigo in TIMEFRAMES.items()
+        if nome not in ("W1", "MN1")
+    ),
+    key=lambda item: item[1],
+    reverse=True,
+)
+
+
+def segundos_customizado(timeframe: str | int) -> int | None:
+    """
+    Duração, em segundos, de um timeframe customizado (ex: 2m, 45m, 2h,
+    3d); None para os nomes nativos (M1, H4...) e valores não reconhecidos.
+    """
+    if isinstance(timeframe, int):
+        return None
+    tf = str(timeframe).upper().strip()
+    if tf in TIMEFRAMES:
+        return None
+    m = re.fullmatch(r"(\d*)([MHD])", tf)
+    if m is None:
+        return None
+    segundos = int(m.group(1) or 1) * _UNIDADES[m.group(2)]
+    return segundos or None
+
+
+def base_nativa(segundos: int) -> tuple[int, int]:
+    """
+    Maior timeframe nativo cuja duração divide `segundos`.
+
+    Returns:
+        tuple: (código do timeframe, duração em segundos); quando a duração
+        é igual a `segundos`, o período é nativo e não há o que montar.
+    """
+    for codigo, duracao in _NATIVOS:
+        if duracao <= segundos and segundos % duracao == 0:
+            return codigo, duracao
+    return TIMEFRAMES["M1"], 60
+
+
+def inicio_do_candle(tempos: np.ndarray, segundos: int) -> np.ndarray:
+    """Início do candle customizado de cada horário."""
+    tempos = np.asarray(tempos, dtype=np.int64)
+    if segundos < _DIA:
+        return tempos - (tempos % _DIA) % segundos
+    return tempos - tempos % segundos
+
+
+def reamostrar(rates: np.ndarray, segundos: int) -> np.ndarray:
+    """
+    Agrupa os rates (ordenados por `time`) em candles de `segundos`.
+
+    Campos sem regra própria (ex: spread) ficam com o valor do último candle
+    de cada grupo.
+    """
+    rates = np.asarray(rates)
+    if len(rates) == 0:
+        return rates[:0].copy()
+
+    inicios = inicio_do_candle(rates["time"], segundos)
+    cortes = np.flatnonzero(np.diff(inicios)) + 1
+    primeiros = np.concatenate(([0], cortes))
+    ultimos = np.append(cortes - 1, len(rates) - 1)
+
+    saida = np.empty(len(primeiros), dtype=rates.dtype)
+    for campo in rates.dtype.names:
+        coluna = rates[campo]
+        if campo == "time":
+            saida[campo] = inicios[primeiros]
+        elif campo == "open":
+            saida[campo] = coluna[primeiros]
+        elif campo == "high":
+            saida[campo] = np.maximum.reduceat(coluna, primeiros)
+        elif campo == "low":
+            saida[campo] = np.minimum.reduceat(coluna, primeiros)
+        elif campo in _SOMADOS:
+            saida[campo] = np.add.reduceat(coluna, primeiros)
+        else:
+            saida[campo] = coluna[ultimos]
+    return saida
+
+
+def reamostrar_blocos(blocos, segundos: int):
+    """
+    Reamostra uma sequência de blocos de rates consecutivos.
+
+    O último candle customizado de cada bloco pode continuar no próximo;
+    seus candles nativos são guardados e juntados ao bloco seguinte.
+    """
+    pendente = None
+    for rates in blocos:
+        rates = np.asarray(rates)
+        if len(rates) == 0:
+            continue
+        if pendente is not None:
+            rates = np.concatenate((pendente, rates))
+
+        inicios = inicio_do_candle(rates["time"], segundos)
+        corte = int(np.searchsorted(inicios, inicios[-1], side="left"))
+        if corte:
+            yield reamostrar(rates[:corte], segundos)
+        pendente = rates[corte:]
+
+    if pendente is not None and len(pendente):
+        yield reamostrar(pendente, segundos)
@@ -0,0 +1,191 @@
+"""
+Servidor residente do Market Profile.
+
+`mt mp --serve` mantém um processo com a conexão ao terminal aberta, o cache
+de histogramas em memória e o cálculo já importado, atendendo pedidos em
+uma porta TCP local. Com `--servidor` (ou `SERVIDOR=sim`), o `mt mp` envia
+o pedido ao servidor quando ele está em execução e, caso contrário (ou se o
+servidor recusar o pedido), calcula no próprio processo.
+
+Protocolo: uma linha JSON por pedido e uma por resposta, na mesma conexão.
+O pedido traz a identificação do protocolo (`PROTOCOLO`), os ativos, os
+parâmetros de `controller.obter_profile`, o formato de saída e a fonte de
+dados do cliente; a resposta traz a mesma identificação e a saída pronta
+(`{"saida": ...}`) ou o motivo da recusa (`{"erro": ...}`). Uma resposta
+sem a identificação, de outro programa na mesma porta, é descartada.
+
+O pacote MetaTrader5 não é seguro para uso simultâneo em várias threads;
+os cálculos são feitos um por vez, em uma única thread. Pedidos idênticos
+recebidos enquanto um deles está pendente compartilham o mesmo cálculo, e a
+fila é limitada a `max_pendentes` cálculos distintos (os excedentes são
+recusados e o cliente calcula por conta própria).
+
+Este módulo não importa o cálculo nem o numpy no carregamento, para que o
+cliente continue leve.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+import json
+import socket
+import socketserver
+import threading
+from typing import Any
+
+#: Endereço em que o servidor escuta (apenas conexões locais)
+HOST = "127.0.0.1"
+
+#: Identificação do protocolo, conferida no pedido e na resposta
+PROTOCOLO = "mtcli-market/1"
+
+
+def descrever_fonte(backend: str, replay_dir: str | None = None) -> str:
+    """Identificação da fonte de dados, comparada entre cliente e servidor."""
+    return f"replay:{replay_dir}" if backend == "replay" else backend
+
+
+def consultar(
+    pedido: dict[str, Any],
+    porta: int,
+    timeout_conexao: float = 0.2,
+    timeout_resposta: float | None = 300.0,
+) -> str | None:
+    """
+    Envia o pedido ao servidor local.
+
+    Returns:
+        str | None: Saída pronta, ou None se o servidor não estiver em
+        execução, recusar o pedido ou não responder com o mesmo protocolo.
+    """
+    pedido = {**pedido, "protocolo": PROTOCOLO}
+    try:
+        with socket.create_connection((HOST, porta), timeout=timeout_conexao) as s:
+            s.settimeout(timeout_resposta)
+            s.sendall(json.dumps(pedido).encode() + b"\n")
+            with s.makefile("rb") as f:
+                linha = f.readline()
+    except OSError:
+        return None
+
+    try:
+        resposta = json.loads(linha)
+    except ValueError:
+        return None
+    if not isinstance(resposta, dict) or resposta.get("protocolo") != PROTOCOLO:
+        return None
+    saida = resposta.get("saida")
+    return saida if isinstance(saida, str) else None
+
+
+def calcular_pedido(pedido: dict[str, Any]) -> str:
+    """Calcula os profiles do pedido e retorna a saída renderizada."""
+    from .controller import obter_profile, obter_profiles
+    from .view import renderizar_profiles
+
+    symbols = pedido["symbols"]
+    parametros = pedido["parametros"]
+
+    if len(symbols) == 1:
+        itens = [(symbols[0], obter_profile(symbol=symbols[0], **parametros))]
+    else:
+        # Os pedidos já são atendidos em sequência; o pool não compensaria
+        resultados = obter_profiles(symbols, workers=1, **parametros)
+        itens = list(resultados.items())
+
+    return renderizar_profiles(itens, pedido["formato"], pedido["verbose"])
+
+
+class _Atendimento(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        for linha in self.rfile:
+            try:
+                pedido = json.loads(linha)
+            except ValueError:
+                resposta = {"erro": "Pedido invalido."}
+            else:
+                resposta = self.server.responder(pedido)
+            resposta["protocolo"] = PROTOCOLO
+            self.wfile.write(json.dumps(resposta).encode() + b"\n")
+
+
+class ProfileServer(socketserver.ThreadingTCPServer):
+    """
+    Servidor TCP local de profiles.
+
+    Args:
+        porta (int): Porta local; 0 escolhe uma porta livre.
+        fonte (str): Fonte de dados em uso (ver `descrever_fonte`); pedidos
+            de outra fonte são recusados.
+        max_pendentes (int): Cálculos distintos aceitos ao mesmo tempo, em
+            andamento ou aguardando; pedidos idênticos contam uma só vez.
+        calcular: Função que atende um pedido (padrão: `calcular_pedido`).
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 64
+
+    def __init__(
+        self,
+        porta: int,
+        fonte: str,
+        max_pendentes: int = 16,
+        calcular=calcular_pedido,
+    ) -> None:
+        super().__init__((HOST, porta), _Atendimento)
+        self.fonte = fonte
+        self.calcular = calcular
+        self.max_pendentes = max_pendentes
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._em_andamento: dict[str, Future] = {}
+        self._trava = threading.RLock()
+        self.atendidos = 0
+        self.compartilhados = 0
+
+    def responder(self, pedido: dict[str, Any]) -> dict[str, str]:
+        """Atende o pedido, compartilhando o cálculo de pedidos idênticos."""
+        if not isinstance(pedido, dict) or pedido.get("protocolo") != PROTOCOLO:
+            return {"erro": "Protocolo incompativel."}
+        if pedido.get("fonte") != self.fonte:
+            return {"erro": f"Servidor usando outra fonte de dados ({self.fonte})."}
+
+        chave = json.dumps(pedido, sort_keys=True)
+        with self._trava:
+            futuro = self._em_andamento.get(chave)
+            if futuro is not None:
+                self.compartilhados += 1
+            elif len(self._em_andamento) >= self.max_pendentes:
+                return {"erro": "Servidor ocupado."}
+            else:
+                futuro = self._executor.submit(self.calcular, pedido)
+                self._em_andamento[chave] = futuro
+                futuro.add_done_callback(lambda _, c=chave: self._concluir(c))
+
+        try:
+            saida = futuro.result()
+        except Exception as e:
+            return {"erro": f"{type(e).__name__}: {e}"}
+
+        self.atendidos += 1
+        return {"saida": saida}
+
+    def _concluir(self, chave: str) -> None:
+        with self._trava:
+            self._em_andamento.pop(chave, None)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def servir(porta: int, fonte: str, max_pendentes: int = 16) -> None:
+    """
+    Executa o servidor até ser interrompido, com a conexão à fonte de dados
+    aberta durante todo o tempo.
+    """
+    from .model import sessao_mt5
+
+    with sessao_mt5(), ProfileServer(porta, fonte, max_pendentes) as servidor:
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,173 @@
+"""
+Profiles por sessão de negociação.
+
+Os rates são divididos em sessões por busca binária na coluna `time`, já
+ordenada. Cada sessão começa no horário de início do pregão do mercado
+(`market_config.MARKETS`, convertido como no Initial Balance) e vai até o
+início da seguinte; em mercados cujo pregão atravessa a meia-noite, os
+candles após 00:00 continuam na mesma sessão. A data da sessão é a do seu
+último candle, a mesma usada no cálculo do IB.
+
+Todos os profiles são montados em uma única passada vetorizada sobre uma
+grade de preços comum. Profiles
+compostos de qualquer conjunto de sessões são obtidos somando as linhas da
+matriz, sem reprocessar os candles.
+"""
+
+import datetime
+
+import numpy as np
+
+from .model import _binning_vetorizado, _janela_ib
+from .profile import Profile
+
+
+def inicio_sessao(
+    market_start_hour: int = 9,
+    market_start_minute: int = 0,
+    market_timezone_offset: int = -3,
+    referencia: int = 0,
+) -> int:
+    """
+    Segundos após 00:00 (horário do servidor) em que as sessões começam,
+    obtidos da mesma conversão usada na janela do Initial Balance.
+
+    Args:
+        referencia (int): Timestamp de um dia dos dados, para a conversão.
+    """
+    dia = int(referencia) // 86400 * 86400
+    inicio, _ = _janela_ib(
+        dia, 0, market_start_hour, market_start_minute, market_timezone_offset
+    )
+    return (inicio - dia) % 86400
+
+
+def separar_sessoes(
+    tempos: np.ndarray, inicio: int = 0
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Localiza o início de cada sessão na coluna `time` ordenada.
+
+    Args:
+        inicio (int): Segundos após 00:00 em que as sessões começam (ver
+            `inicio_sessao`); com 0, as sessões são os dias do servidor.
+
+    Returns:
+        tuple: (aberturas, inicios) com o timestamp de início de cada
+        sessão e o índice do primeiro candle dela.
+    """
+    if len(tempos) == 0:
+        vazio = np.empty(0, dtype=np.int64)
+        return vazio, vazio
+
+    primeiro = (int(tempos[0]) - inicio) // 86400
+    ultimo = (int(tempos[-1]) - inicio) // 86400
+    candidatos = np.arange(primeiro, ultimo + 1, dtype=np.int64) * 86400 + inicio
+
+    inicios = np.searchsorted(tempos, candidatos, side="left")
+    fins = np.searchsorted(tempos, candidatos + 86400, side="left")
+
+    # Dias sem candles (fins de semana, feriados) são descartados
+    com_dados = fins > inicios
+    return candidatos[com_dados], inicios[com_dados]
+
+
+def datas_sessoes(tempos: np.ndarray, inicios: np.ndarray) -> np.ndarray:
+    """Timestamp de 00:00 da data de cada sessão (a do seu último candle)."""
+    if len(inicios) == 0:
+        return np.empty(0, dtype=np.int64)
+    ultimos = np.append(inicios[1:], len(tempos)) - 1
+    return tempos[ultimos].astype(np.int64) // 86400 * 86400
+
+
+class ProfilesPorSessao:
+    """
+    Histogramas de várias sessões sobre a mesma grade de preços.
+
+    A linha `i` das matrizes corresponde à sessão da data `dias[i]` (00:00)
+    e a coluna `j` ao bloco de índice `base + j`.
+    """
+
+    __slots__ = ("base", "block", "dias", "inicios", "volume", "tpo")
+
+    def __init__(
+        self,
+        base: int,
+        block: float,
+        dias: np.ndarray,
+        inicios: np.ndarray,
+        volume: np.ndarray,
+        tpo: np.ndarray,
+    ) -> None:
+        self.base = base
+        self.block = block
+        self.dias = dias
+        self.inicios = inicios
+        self.volume = volume
+        self.tpo = tpo
+
+    def __len__(self) -> int:
+        return len(self.dias)
+
+    def data(self, i: int) -> datetime.date:
+        """Data da sessão `i`."""
+        return datetime.datetime.utcfromtimestamp(int(self.dias[i])).date()
+
+    def sessao(self, i: int) -> Profile:
+        """Profile da sessão `i` (aceita índices negativos), sem cópia."""
+        return Profile(self.base, self.block, self.volume[i], self.tpo[i])
+
+    def composto(self, inicio: int = 0, fim: int | None = None) -> Profile:
+        """
+        Profile composto das sessões `inicio` até `fim` (exclusivo), obtido
+        pela soma dos histogramas já calculados.
+        """
+        return Profile(
+            self.base,
+            self.block,
+            self.volume[inicio:fim].sum(axis=0),
+            self.tpo[inicio:fim].sum(axis=0),
+        )
+
+
+def profiles_por_sessao(
+    rates, block: float, by: str = "tpo", inicio: int = 0
+) -> ProfilesPorSessao:
+    """
+    Monta o profile de cada sessão presente nos rates em uma única passada.
+
+    Args:
+        inicio (int): Segundos após 00:00 em que as sessões começam (ver
+            `inicio_sessao`).
+    """
+    tempos = rates["time"]
+    _, inicios = separar_sessoes(tempos, inicio)
+    dias = datas_sessoes(tempos, inicios)
+
+    barra, indice, peso = _binning_vetorizado(rates, block, by)
+    if len(indice) == 0:
+        vazio = np.zeros((len(dias), 0))
+        return ProfilesPorSessao(0, block, dias, inicios, vazio, vazio.astype(np.int64))
+
+    # Sessão de cada candle a partir dos índices de início
+    sessao_barra = np.repeat(
+        np.arange(len(dias)), np.diff(np.append(inicios, len(tempos)))
+    )
+    sessao = sessao_barra[barra]
+
+    base = int(indice.min())
+    largura = int(indice.max()) - base + 1
+    chave = sessao * largura + (indice - base)
+    tamanho = len(dias) * largura
+
+    volume = np.bincount(chave, weights=peso, minlength=tamanho)
+    tpo = np.bincount(chave, minlength=tamanho)
+
+    return ProfilesPorSessao(
+        base,
+        block,
+        dias,
+        inicios,
+        volume.reshape(len(dias), largura),
+        tpo.reshape(len(dias), largura),
+    )
@@ -0,0 +1,106 @@
+"""
+Gerador de rates sintéticos no formato do MetaTrader 5.
+
+Produz arrays estruturados com o mesmo dtype de `copy_rates_from_pos`,
+permitindo medir e testar o cálculo do profile sem um terminal. Os candles
+seguem um passeio aleatório em múltiplos do tick, apenas em dias úteis e no
+horário do pregão, com volatilidade e volume maiores na abertura e no
+fechamento, como no intraday real.
+"""
+
+import numpy as np
+
+from .cache import RATES_DTYPE
+
+
+def gerar_rates(
+    n: int,
+    inicio: int = 1735725600,
+    timeframe_segundos: int = 60,
+    preco_inicial: float = 120000.0,
+    tick: float = 5.0,
+    volatilidade: float = 0.0004,
+    pregao: tuple[int, int] = (9 * 3600, 18 * 3600 + 30 * 60),
+    seed: int | None = 0,
+) -> np.ndarray:
+    """
+    Gera `n` candles sintéticos.
+
+    Args:
+        n (int): Quantidade de candles.
+        inicio (int): Timestamp (horário do servidor) do primeiro dia; o
+            primeiro candle é o da abertura do pregão nesse dia ou no
+            próximo dia útil.
+        timeframe_segundos (int): Duração de cada candle.
+        preco_inicial (float): Preço de abertura do primeiro candle.
+        tick (float): Variação mínima de preço.
+        volatilidade (float): Desvio relativo médio por candle de 1 minuto.
+        pregao (tuple[int, int]): Abertura e fechamento, em segundos desde
+            00:00.
+        seed (int | None): Semente do gerador aleatório.
+
+    Returns:
+        np.ndarray: Rates com os campos `time`, `open`, `high`, `low`,
+        `close`, `tick_volume`, `spread` e `real_volume`.
+    """
+    rng = np.random.default_rng(seed)
+    rates = np.zeros(n, dtype=RATES_DTYPE)
+    if n == 0:
+        return rates
+
+    # ===== HORÁRIOS: apenas dias úteis, dentro do pregão =====
+    abertura, fechamento = pregao
+    por_dia = max((fechamento - abertura) // timeframe_segundos, 1)
+    primeiro = int(inicio) // 86400
+    dias_uteis = np.arange(primeiro, primeiro + (n // por_dia + 2) * 7 // 5 + 7)
+    # 01/01/1970 foi quinta-feira: (dia + 3) % 7 >= 5 é sábado ou domingo
+    dias_uteis = dias_uteis[(dias_uteis + 3) % 7 < 5]
+
+    pos = np.arange(n)
+    dia, no_dia = np.divmod(pos, por_dia)
+    rates["time"] = dias_uteis[dia] * 86400 + abertura + no_dia * timeframe_segundos
+
+    # ===== VOLATILIDADE INTRADAY EM "U" =====
+    fase = no_dia / por_dia
+    forma = 0.6 + 1.6 * (fase - 0.5) ** 2 * 4
+    escala = volatilidade * np.sqrt(timeframe_segundos / 60) * forma
+
+    retornos = rng.standard_normal(n) * escala
+    fechamentos = preco_inicial * np.exp(np.cumsum(retornos))
+    aberturas = np.concatenate(([preco_inicial], fechamentos[:-1]))
+
+    # Gap entre o fechamento de um dia e a abertura do seguinte
+    novos_dias = np.flatnonzero(no_dia == 0)[1:]
+    gaps = rng.standard_normal(len(novos_dias)) * volatilidade * 5
+    fator = np.ones(n)
+    fator[novos_dias] = np.exp(gaps)
+    fator = np.cumprod(fator)
+    aberturas *= fator
+    fechamentos *= fator
+
+    # Sombras proporcionais à volatilidade do horário
+    sombra_alta = np.abs(rng.standard_normal(n)) * escala * fechamentos * 0.7
+    sombra_baixa = np.abs(rng.standard_normal(n)) * escala * fechamentos * 0.7
+    maximas = np.maximum(aberturas, fechamentos) + sombra_alta
+    minimas = np.minimum(aberturas, fechamentos) - sombra_baixa
+
+    def arredondar(precos):
+        return np.round(precos / tick) * tick
+
+    rates["open"] = arredondar(aberturas)
+    rates["close"] = arredondar(fechamentos)
+    rates["high"] = np.maximum(
+        arredondar(maximas), np.maximum(rates["open"], rates["close"])
+    )
+    rates["low"] = np.minimum(
+        arredondar(minimas), np.minimum(rates["open"], rates["close"])
+    )
+
+    # ===== VOLUME: acompanha a amplitude do candle =====
+    amplitude = (rates["high"] - rates["low"]) / tick
+    ticks = rng.poisson(20 * forma * np.sqrt(timeframe_segundos / 60)) + amplitude
+    rates["tick_volume"] = np.maximum(ticks, 1).astype(np.uint64)
+    rates["real_volume"] = rates["tick_volume"] * rng.integers(1, 6, n, dtype=np.uint64)
+    rates["spread"] = 1
+
+    return rates
@@ -0,0 +1,135 @@
+"""
+Market Profile a partir de ticks.
+
+Os ticks são lidos em janelas de tempo (`model.obter_ticks_em_blocos`) e
+cada janela é distribuída nos blocos de preço e somada à grade do
+`ProfileAccumulator` antes da leitura da seguinte. O consumo de memória fica
+limitado ao tamanho de uma janela, qualquer que seja o período analisado.
+
+Cada tick cai em um único bloco, pelo preço do último negócio (`last`) ou,
+quando este não é informado, pelo `bid`. O TPO de cada nível é a quantidade
+de ticks nele.
+"""
+
+from collections.abc import Iterable
+
+import numpy as np
+
+from .accumulator import ProfileAccumulator
+from .model import _janela_ib
+from .timings import etapa
+
+#: Modos de distribuição suportados pela fonte de ticks
+MODOS_TICKS = ("tick", "volume")
+
+
+def precos_ticks(ticks) -> np.ndarray:
+    """Preço de cada tick: `last`, ou `bid` quando `last` é zero."""
+    last = ticks["last"]
+    return np.where(last > 0, last, ticks["bid"])
+
+
+def binning_ticks(ticks, block: float, by: str = "tick"):
+    """
+    Distribui os ticks nos blocos de preço.
+
+    Args:
+        ticks: Array estruturado retornado por `copy_ticks_range`.
+        block (float): Tamanho do bloco de preço.
+        by (str): "tick" (peso 1 por tick) ou "volume" (volume do negócio).
+
+    Returns:
+        tuple: (indice, peso) com o bloco e o peso de cada tick.
+    """
+    if by not in MODOS_TICKS:
+        raise ValueError("Com ticks, use by=tick ou by=volume.")
+
+    precos = precos_ticks(ticks)
+    validos = precos > 0
+    # O bloco de preço p cobre (p - block, p]
+    indice = np.ceil(np.round(precos[validos] / block, 9)).astype(np.int64)
+
+    if by == "tick":
+        peso = np.ones(len(indice))
+    else:
+        nomes = ticks.dtype.names
+        peso = ticks["volume"][validos].astype(np.float64)
+        if "volume_real" in nomes:
+            real = ticks["volume_real"][validos]
+            peso = np.where(real > 0, real, peso)
+
+    return indice, peso
+
+
+class TickAccumulator(ProfileAccumulator):
+    """
+    Histograma de Market Profile alimentado por janelas de ticks.
+
+    Os ticks devem chegar em ordem cronológica e sem repetição; o IB é
+    calculado pelos preços dos ticks dentro da janela do Initial Balance.
+    """
+
+    def __init__(self, block: float, by: str = "tick", **kwargs) -> None:
+        if by not in MODOS_TICKS:
+            raise ValueError("Com ticks, use by=tick ou by=volume.")
+        super().__init__(block, by, **kwargs)
+
+    def adicionar(self, ticks) -> int:
+        """
+        Ingere uma janela de ticks.
+
+        Returns:
+            int: Quantidade de ticks ingeridos.
+        """
+        if ticks is None or len(ticks) == 0:
+            return 0
+
+        with etapa("binning", ticks=len(ticks)):
+            indice, peso = binning_ticks(ticks, self.block, self.by)
+            self.somar_blocos(indice, peso)
+        self._atualizar_ib_ticks(ticks)
+
+        self.rates_count += len(ticks)
+        self.ultimo_tempo = int(ticks["time"][-1])
+        return len(ticks)
+
+    def _atualizar_ib_ticks(self, ticks) -> None:
+        dia = int(ticks["time"][-1]) // 86400
+        if dia != self._ib_dia:
+            self._ib_dia = dia
+            self._ib = None
+
+        inicio, limite = _janela_ib(
+            int(ticks["time"][-1]),
+            self.ib_minutes,
+            self.market_start_hour,
+            self.market_start_minute,
+            self.market_timezone_offset,
+        )
+        tempos = ticks["time"]
+        precos = precos_ticks(ticks)
+        na_janela = (tempos >= inicio) & (tempos <= limite) & (precos > 0)
+        if not na_janela.any():
+            return
+
+        high = float(precos[na_janela].max())
+        low = float(precos[na_janela].min())
+        if self._ib is not None:
+            high = max(high, self._ib["high"])
+            low = min(low, self._ib["low"])
+
+        self._ib = {"high": high, "low": low}
+
+
+def acumular_ticks(blocos: Iterable, block: float, by: str = "tick", **kwargs):
+    """
+    Consome as janelas de ticks e retorna o acumulador preenchido.
+
+    Args:
+        blocos (Iterable): Janelas de ticks em ordem cronológica.
+        **kwargs: Parâmetros de IB e pregão repassados ao acumulador.
+    """
+    acumulador = TickAccumulator(block, by, **kwargs)
+    for ticks in blocos:
+        acumulador.adicionar(ticks)
+    return acumulador
@@ -0,0 +1,197 @@
+"""
+Medição de tempo e contadores por etapa da execução.
+
+As etapas (conexão, transferência, binning, métricas, exibição...) são
+marcadas com `etapa(nome)` e podem acumular contadores (candles, blocos,
+níveis, linhas). Desativada, `etapa` retorna sempre o mesmo objeto sem
+efeito, de modo que a instrumentação custa apenas uma chamada de função.
+
+Etapas medidas em várias threads (pools de cálculo, servidor, API
+assíncrona) são registradas juntas; cada thread tem a própria pilha de
+etapas em andamento, de modo que `contar` soma na etapa da própria thread.
+"""
+
+from collections.abc import Callable, Iterable
+import datetime
+import functools
+import json
+import threading
+import time
+
+#: Instrumentação ligada
+_ativo = False
+
+#: Etapas concluídas, na ordem de término (de todas as threads)
+_registros: list[dict] = []
+_trava_registros = threading.Lock()
+
+#: Etapas em andamento em cada thread
+_local = threading.local()
+
+
+def _pilha() -> list["_Etapa"]:
+    """Etapas em andamento na thread atual (a última é a mais interna)."""
+    try:
+        return _local.pilha
+    except AttributeError:
+        _local.pilha = []
+        return _local.pilha
+
+
+class _Etapa:
+    __slots__ = ("nome", "contadores", "inicio")
+
+    def __init__(self, nome: str, contadores: dict[str, int]) -> None:
+        self.nome = nome
+        self.contadores = contadores
+        self.inicio = 0.0
+
+    def __enter__(self) -> "_Etapa":
+        self.inicio = time.perf_counter()
+        _pilha().append(self)
+        return self
+
+    def __exit__(self, *_) -> bool:
+        segundos = time.perf_counter() - self.inicio
+        pilha = _pilha()
+        if self in pilha:
+            pilha.remove(self)
+        registro = {"etapa": self.nome, "segundos": segundos, **self.contadores}
+        with _trava_registros:
+            _registros.append(registro)
+        return False
+
+    def contar(self, **contadores: int) -> None:
+        """Soma valores aos contadores da etapa."""
+        for nome, valor in contadores.items():
+            self.contadores[nome] = self.contadores.get(nome, 0) + int(valor)
+
+
+class _EtapaNula:
+    __slots__ = ()
+
+    def __enter__(self) -> "_EtapaNula":
+        return self
+
+    def __exit__(self, *_) -> bool:
+        return False
+
+    def contar(self, **contadores: int) -> None:
+        pass
+
+
+_NULA = _EtapaNula()
+
+
+def etapa(nome: str, **contadores: int):
+    """
+    Contexto que mede a etapa `nome`.
+
+    Exemplo:
+        with etapa("binning", barras=len(rates)) as e:
+            ...
+            e.contar(blocos=len(indice))
+    """
+    if not _ativo:
+        return _NULA
+    return _Etapa(nome, dict(contadores))
+
+
+def medir(nome: str) -> Callable:
+    """Decorador que mede cada chamada da função como a etapa `nome`."""
+
+    def decorador(funcao: Callable) -> Callable:
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            if not _ativo:
+                return funcao(*args, **kwargs)
+            with _Etapa(nome, {}):
+                return funcao(*args, **kwargs)
+
+        return medida
+
+    return decorador
+
+
+def contar(**contadores: int) -> None:
+    """Soma valores aos contadores da etapa mais interna em andamento."""
+    if _ativo:
+        pilha = _pilha()
+        if pilha:
+            pilha[-1].contar(**contadores)
+
+
+def ativar(ativo: bool = True) -> None:
+    """Liga ou desliga a instrumentação, descartando medições anteriores."""
+    global _ativo
+    _ativo = ativo
+    limpar()
+
+
+def ativo() -> bool:
+    return _ativo
+
+
+def limpar() -> None:
+    with _trava_registros:
+        _registros.clear()
+    _pilha().clear()
+
+
+def registros() -> list[dict]:
+    """Etapas concluídas, na ordem de término."""
+    with _trava_registros:
+        return list(_registros)
+
+
+def resumo() -> list[dict]:
+    """
+    Totais por nome de etapa, na ordem da primeira ocorrência.
+
+    Returns:
+        list[dict]: Para cada etapa, `etapa`, `chamadas`, `segundos` e a
+        soma de cada contador.
+    """
+    totais: dict[str, dict] = {}
+    for registro in registros():
+        total = totais.setdefault(
+            registro["etapa"],
+            {"etapa": registro["etapa"], "chamadas": 0, "segundos": 0.0},
+        )
+        total["chamadas"] += 1
+        for chave, valor in registro.items():
+            if chave == "etapa":
+                continue
+            total[chave] = total.get(chave, 0) + valor
+    return list(totais.values())
+
+
+def formatar_resumo(linhas: Iterable[dict] | None = None) -> list[str]:
+    """Linhas de texto com o resumo das etapas."""
+    linhas = resumo() if linhas is None else linhas
+    texto = ["TEMPOS POR ETAPA"]
+    for total in linhas:
+        contadores = ", ".join(
+            f"{chave} {valor}"
+            for chave, valor in total.items()
+            if chave not in ("etapa", "chamadas", "segundos")
+        )
+        texto.append(
+            f"{total['etapa']:<14} {total['segundos'] * 1000:10.2f} ms "
+            f"{total['chamadas']:>4}x" + (f"  {contadores}" if contadores else "")
+        )
+    return texto
+
+
+def gravar_jsonl(caminho: str, **contexto) -> None:
+    """
+    Acrescenta ao arquivo uma linha JSON com as etapas desta execução e o
+    `contexto` informado (ativo, parâmetros...).
+    """
+    linha = {
+        "data": datetime.datetime.now().isoformat(timespec="seconds"),
+        **contexto,
+        "etapas": resumo(),
+    }
+    with open(caminho, "a", encoding="utf-8") as f:
+        f.write(json.dumps(linha, default=str) + "\n")
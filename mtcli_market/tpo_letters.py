@@ -0,0 +1,128 @@
+"""
+Profile de TPO por letras (períodos) da sessão mais recente.
+
+Cada período de `periodo_minutos`, contado a partir do início do pregão
+definido em `market_config.MARKETS`, recebe uma letra (A, B, C...). O índice
+do período de cada candle é calculado de uma só vez sobre a coluna `time` e
+os períodos que tocaram cada bloco de preço são marcados em uma matriz
+booleana (bloco × período), sem trabalho com datetime por candle.
+"""
+
+import datetime
+from math import ceil
+import string
+from typing import Any
+
+import numpy as np
+
+from .model import _binning_vetorizado, _janela_ib
+
+#: Sequência de letras dos períodos; após a última, recomeça com sufixo
+LETRAS = string.ascii_uppercase + string.ascii_lowercase
+
+
+def letra(periodo: int) -> str:
+    """Retorna a letra do período (A, B, ..., z, A1, B1, ...)."""
+    volta, pos = divmod(int(periodo), len(LETRAS))
+    return LETRAS[pos] + (str(volta) if volta else "")
+
+
+def calcular_letras(
+    rates,
+    block: float,
+    periodo_minutos: int = 30,
+    ib_minutes: int = 30,
+    market_start_hour: int = 9,
+    market_start_minute: int = 0,
+    market_timezone_offset: int = -3,
+) -> dict[str, Any]:
+    """
+    Calcula o profile de letras da sessão do último candle.
+
+    Candles anteriores ao início do pregão não pertencem a nenhum período e
+    são ignorados. Os primeiros períodos que cobrem `ib_minutes` formam o
+    Initial Balance; os períodos seguintes que negociam acima ou abaixo dele
+    são reportados como extensões.
+
+    Returns:
+        dict: Estrutura com `niveis` (preço, letras) do preço mais alto ao
+        mais baixo, `poc`, `single_prints`, `ib` e `extensoes`.
+    """
+    vazio = {
+        "niveis": [],
+        "poc": None,
+        "single_prints": [],
+        "ib": None,
+        "ib_letras": "",
+        "extensoes": [],
+        "periodo_minutos": periodo_minutos,
+        "block": block,
+        "sessao": None,
+    }
+    if rates is None or len(rates) == 0:
+        return vazio
+
+    tempos = rates["time"]
+    inicio_pregao, _ = _janela_ib(
+        int(tempos[-1]),
+        ib_minutes,
+        market_start_hour,
+        market_start_minute,
+        market_timezone_offset,
+    )
+    sessao = rates[np.searchsorted(tempos, inicio_pregao, side="left") :]
+    if len(sessao) == 0:
+        return vazio
+
+    # Índice do período de cada candle
+    periodo = (sessao["time"] - inicio_pregao) // (periodo_minutos * 60)
+
+    barra, indice, _ = _binning_vetorizado(sessao, block, "tpo")
+    base = int(indice.min())
+    n_niveis = int(indice.max()) - base + 1
+    n_periodos = int(periodo.max()) + 1
+
+    tocou = np.zeros((n_niveis, n_periodos), dtype=bool)
+    tocou[indice - base, periodo[barra]] = True
+
+    contagem = tocou.sum(axis=1)
+    niveis = np.flatnonzero(contagem)[::-1]
+    precos = np.round((np.arange(n_niveis) + base) * block, 8)
+    letras = np.array([letra(p) for p in range(n_periodos)])
+
+    # ===== POC (maior quantidade de letras; empate: preço mais alto) =====
+    poc = float(precos[niveis[int(np.argmax(contagem[niveis]))]])
+
+    # ===== INITIAL BALANCE E EXTENSÕES =====
+    n_ib = min(max(1, ceil(ib_minutes / periodo_minutos)), n_periodos)
+    no_ib = np.flatnonzero(tocou[:, :n_ib].any(axis=1))
+
+    ib = None
+    extensoes = []
+    if len(no_ib):
+        ib_low, ib_high = int(no_ib[0]), int(no_ib[-1])
+        ib = {"high": float(precos[ib_high]), "low": float(precos[ib_low])}
+
+        acima = tocou[ib_high + 1 :, n_ib:].any(axis=0)
+        abaixo = tocou[:ib_low, n_ib:].any(axis=0)
+        for p in np.flatnonzero(acima | abaixo):
+            direcoes = [d for d, f in (("acima", acima), ("abaixo", abaixo)) if f[p]]
+            extensoes.append(
+                {"letra": letra(n_ib + p), "direcao": " e ".join(direcoes)}
+            )
+
+    return {
+        "niveis": [
+            (float(precos[i]), "".join(letras[tocou[i]])) for i in niveis.tolist()
+        ],
+        "poc": poc,
+        "single_prints": precos[niveis[contagem[niveis] == 1]].tolist(),
+        "ib": ib,
+        "ib_letras": "".join(letras[:n_ib]),
+        "extensoes": extensoes,
+        "periodo_minutos": periodo_minutos,
+        "block": block,
+        "sessao": str(
+            datetime.datetime.utcfromtimestamp(int(sessao["time"][0])).date()
+        ),
+    }
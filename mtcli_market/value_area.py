@@ -0,0 +1,151 @@
+"""
+Cálculo da Value Area sobre o histograma ordenado por preço.
+
+Dois modos estão disponíveis:
+
+- expansao: método clássico; parte do POC e, a cada passo, compara a soma
+  dos dois níveis acima com a dos dois níveis abaixo, incorporando o par de
+  maior volume. A área resultante é sempre contígua; os passos são
+  calculados de forma vetorizada, sem um laço por nível.
+- gulosa: método anterior; escolhe os níveis de maior volume, em qualquer
+  posição, até atingir o percentual. VAH/VAL são o maior e o menor preço
+  escolhidos.
+
+Ambos respondem a vários percentuais em uma única passada.
+"""
+
+from collections.abc import Sequence
+
+import numpy as np
+
+from .profile import Profile
+
+#: Modos de cálculo da Value Area
+MODOS_VA = ("expansao", "gulosa")
+
+ValueArea = tuple[float | None, float | None, list[float]]
+
+
+def _pares(volume: np.ndarray) -> np.ndarray:
+    """Soma de cada par de níveis consecutivos (o último pode ser único)."""
+    if len(volume) % 2:
+        volume = np.append(volume, 0.0)
+    return volume[0::2] + volume[1::2]
+
+
+def _expansao(
+    volume: np.ndarray, poc: int, alvos: Sequence[float]
+) -> list[tuple[int, int]]:
+    """
+    Expande a partir do POC até atingir cada alvo, em ordem crescente.
+
+    Cada passo incorpora o próximo par acima ou o próximo par abaixo, o de
+    maior soma (empate: acima). Um par só entra depois dos anteriores do seu
+    lado, então a ordem dos passos é a intercalação dos dois lados pelo
+    mínimo acumulado das somas de cada um, calculada de forma vetorizada.
+
+    Returns:
+        list: Posições (inferior, superior) da área para cada alvo.
+    """
+    n = len(volume)
+    acima = _pares(volume[poc + 1 :])
+    abaixo = _pares(volume[:poc][::-1])
+    chave_acima = -np.minimum.accumulate(acima)
+    chave_abaixo = -np.minimum.accumulate(abaixo)
+
+    # Passo em que cada par é incorporado
+    passo_acima = np.arange(len(acima)) + np.searchsorted(
+        chave_abaixo, chave_acima, side="left"
+    )
+    passo_abaixo = np.arange(len(abaixo)) + np.searchsorted(
+        chave_acima, chave_abaixo, side="right"
+    )
+    incorporado = np.empty(len(acima) + len(abaixo))
+    incorporado[passo_acima] = acima
+    incorporado[passo_abaixo] = abaixo
+    subiu = np.zeros(len(incorporado), dtype=np.int64)
+    subiu[passo_acima] = 1
+
+    # Soma da área e pares acima incorporados após cada passo
+    somas = np.cumsum(np.concatenate(([volume[poc]], incorporado)))
+    pares_acima = np.concatenate(([0], np.cumsum(subiu)))
+
+    faixas = []
+    for alvo in alvos:
+        # Arredondamentos podem impedir atingir o alvo: usa a grade toda
+        k = min(int(np.searchsorted(somas, alvo, side="left")), len(somas) - 1)
+        lo = max(poc - 2 * (k - int(pares_acima[k])), 0)
+        hi = min(poc + 2 * int(pares_acima[k]), n - 1)
+        faixas.append((lo, hi))
+    return faixas
+
+
+def _gulosa(
+    volume: np.ndarray, posicoes: np.ndarray, alvos: Sequence[float]
+) -> list[np.ndarray]:
+    """
+    Seleciona os níveis de maior volume até atingir cada alvo.
+
+    Empates mantêm a ordem de `posicoes` (do preço mais alto ao mais baixo).
+
+    Returns:
+        list: Posições escolhidas para cada alvo, em ordem de volume.
+    """
+    ordem = posicoes[np.argsort(-volume[posicoes], kind="stable")]
+    acum = np.cumsum(volume[ordem])
+    escolhidos = []
+    for alvo in alvos:
+        n = min(int(np.searchsorted(acum, alvo, side="left")) + 1, len(ordem))
+        escolhidos.append(ordem[:n])
+    return escolhidos
+
+
+def calcular_value_areas(
+    profile: Profile, percents: Sequence[float], modo: str = "expansao"
+) -> dict[float, ValueArea]:
+    """
+    Calcula a Value Area do profile para cada percentual informado.
+
+    Args:
+        profile (Profile): Histograma do Market Profile.
+        percents (Sequence[float]): Percentuais no intervalo (0, 1].
+        modo (str): "expansao" ou "gulosa".
+
+    Returns:
+        dict[float, ValueArea]: Para cada percentual, (VAH, VAL, preços da
+        área). Na expansão os preços seguem do mais alto ao mais baixo; no
+        modo guloso seguem a ordem de volume.
+    """
+    if modo not in MODOS_VA:
+        raise ValueError("Modo de Value Area inválido. Use: expansao ou gulosa.")
+
+    tocados = profile.tocados
+    if len(tocados) == 0:
+        return {p: (None, None, []) for p in percents}
+
+    ordenados = sorted(set(percents))
+    # Soma sequencial do preço mais alto ao mais baixo
+    total = float(np.cumsum(profile.volume[tocados[::-1]])[-1])
+    alvos = [total * p for p in ordenados]
+    precos = profile.precos
+
+    areas = {}
+    if modo == "gulosa":
+        for p, pos in zip(
+            ordenados, _gulosa(profile.volume, tocados[::-1], alvos), strict=True
+        ):
+            escolhidos = precos[pos].tolist()
+            areas[p] = (max(escolhidos), min(escolhidos), escolhidos)
+    else:
+        poc = profile.posicao(profile.poc)
+        for p, (lo, hi) in zip(
+            ordenados, _expansao(profile.volume, poc, alvos), strict=True
+        ):
+            pos = tocados[(tocados >= lo) & (tocados <= hi)][::-1]
+            escolhidos = precos[pos].tolist()
+            if escolhidos:
+                areas[p] = (escolhidos[0], escolhidos[-1], escolhidos)
+            else:
+                areas[p] = (None, None, [])
+
+    return {p: areas[p] for p in percents}
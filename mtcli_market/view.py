@@ -5,15 +5,32 @@ Este módulo é responsável por:
 - Formatar os valores numéricos
 - Exibir o Market Profile no terminal
 - Trabalhar em dois modos de exibição: simples e verboso
+- Gerar saídas para outros programas: json, csv e ndjson
 
-Utiliza a biblioteca `click` para saída formatada no terminal.
+Toda a saída de uma exibição é montada em memória e escrita de uma só vez
+com `click.echo`.
 """
 
+import csv
+import datetime
+import io
+import json
+import math
 from typing import Any
 
 import click
 
 from .conf import DIGITOS
+from .timings import contar, medir
+
+#: Formatos de saída suportados
+FORMATOS = ("text", "json", "csv", "ndjson")
+
+
+def _escrever(texto: str) -> None:
+    """Escreve o texto no terminal em uma única chamada."""
+    click.echo(texto, nl=False)
+    contar(linhas=texto.count("\n"))
 
 
 def _format_num(v, digitos):
@@ -51,27 +68,22 @@ def _format_num(v, digitos):
         return str(v)
 
 
-def exibir_profile(
+def _linhas_profile(
     resultado: dict[str, Any], symbol: str, verbose: bool = False
-) -> None:
+) -> list[str]:
     """
-    Exibe o Market Profile no terminal.
+    Linhas do Market Profile em texto.
 
     O formato de saída depende do modo:
     - verbose=False: saída resumida e compacta
     - verbose=True: saída detalhada com métricas completas
-
-    Args:
-        resultado (dict[str, Any]): Estrutura retornada pelo cálculo do profile.
-        symbol (str): Código do ativo.
-        verbose (bool, opcional): Ativa o modo detalhado. Padrão: False.
-
-    Returns:
-        None
     """
+    linhas: list[str] = []
+    add = linhas.append
+
     if not resultado:
-        click.echo(f"Nenhum dado para exibir para o ativo {symbol}.")
-        return
+        add(f"Nenhum dado para exibir para o ativo {symbol}.")
+        return linhas
 
     profile = resultado.get("profile", {})
     tpo = resultado.get("tpo", {})
@@ -82,100 +94,423 @@ def exibir_profile(
     hvn = resultado.get("hvn", [])
     lvn = resultado.get("lvn", [])
     ib = resultado.get("ib")
+    value_areas = resultado.get("value_areas", [])
     estat = resultado.get("estatisticas_dia", {})
     total_vol = resultado.get("total_volume")
     total_tpo = resultado.get("total_tpo", sum(tpo.values()) if tpo else None)
 
-    click.echo("")
-    click.echo("-" * 60)
-    click.echo(
+    add("")
+    add("-" * 60)
+    add(
         f"Market Profile para {symbol} — by {resultado.get('by')} — bloco {resultado.get('block')}"
     )
-    click.echo("-" * 60)
-    click.echo("")
+    add("-" * 60)
+    add("")
 
     # ======================================================================
     # MODO VERBOSO
     # ======================================================================
     if verbose:
         if estat:
-            # click.echo("INFORMACOES DO DIA d0")
-            click.echo(f"Abertura   {_format_num(estat['abertura'], DIGITOS)}")
-            click.echo(f"Fechamento {_format_num(estat['fechamento'], DIGITOS)}")
-            # click.echo(f"Maxima     {_format_num(estat['maxima'], DIGITOS)}")
-            # click.echo(f"Minima     {_format_num(estat['minima'], DIGITOS)}")
-            click.echo("")
-
-        click.echo(
+            # add("INFORMACOES DO DIA d0")
+            add(f"Abertura   {_format_num(estat['abertura'], DIGITOS)}")
+            add(f"Fechamento {_format_num(estat['fechamento'], DIGITOS)}")
+            # add(f"Maxima     {_format_num(estat['maxima'], DIGITOS)}")
+            # add(f"Minima     {_format_num(estat['minima'], DIGITOS)}")
+            add("")
+
+        add(
             "DISTRIBUICAO DE PERFIL (preco : volume) — do preco mais alto para o mais baixo"
         )
 
-        prices = list(profile.keys())
+        # Cada preço é formatado uma única vez
+        prices = [_format_num(p, DIGITOS) for p in profile.keys()]
         if prices:
-            max_price_len = max(len(_format_num(p, DIGITOS)) for p in prices)
-            click.echo(f"{'PRECO'.ljust(max_price_len)}   VOLUME")
-            click.echo(f"{'-' * max_price_len}   -----")
+            max_price_len = max(len(p) for p in prices)
+            add(f"{'PRECO'.ljust(max_price_len)}   VOLUME")
+            add(f"{'-' * max_price_len}   -----")
 
-        for price, vol in profile.items():
-            click.echo(
-                f"{_format_num(price, DIGITOS).ljust(max_price_len)} : {_format_num(vol, DIGITOS)}"
-            )
+        linhas.extend(
+            f"{price.ljust(max_price_len)} : {_format_num(vol, DIGITOS)}"
+            for price, vol in zip(prices, profile.values(), strict=True)
+        )
 
         if total_vol is not None:
-            click.echo(f"Total acumulado {_format_num(total_vol, DIGITOS)}.")
+            add(f"Total acumulado {_format_num(total_vol, DIGITOS)}.")
 
         if total_tpo is not None and resultado.get("by") == "tpo":
-            click.echo(f"Total de TPOs {total_tpo}.")
+            add(f"Total de TPOs {total_tpo}.")
 
         if poc is not None:
-            click.echo(f"POC {_format_num(poc, DIGITOS)}.")
+            add(f"POC {_format_num(poc, DIGITOS)}.")
 
         if val is not None and vah is not None:
-            click.echo(
+            add(
                 f"Value Area {_format_num(vah, DIGITOS)} alto — {_format_num(val, DIGITOS)} baixo"
             )
 
+        if len(value_areas) > 1:
+            for va in value_areas:
+                add(
+                    f"Value Area {va['percent']:.0%} {_format_num(va['vah'], DIGITOS)} alto — {_format_num(va['val'], DIGITOS)} baixo"
+                )
+
         if hvn:
-            click.echo(f"HVNs {', '.join(_format_num(p, DIGITOS) for p in hvn)}.")
+            add(f"HVNs {', '.join(_format_num(p, DIGITOS) for p in hvn)}.")
 
         if lvn:
-            click.echo(f"LVNs {', '.join(_format_num(p, DIGITOS) for p in lvn)}.")
+            add(f"LVNs {', '.join(_format_num(p, DIGITOS) for p in lvn)}.")
 
         if ib:
-            click.echo(
+            add(
                 f"IB {_format_num(ib['high'], DIGITOS)} — {_format_num(ib['low'], DIGITOS)}."
             )
 
         if tpo:
-            click.echo("")
-            click.echo("TPOs por bloco")
-            for price, cnt in tpo.items():
-                click.echo(f"{_format_num(price, DIGITOS)} : {cnt}")
+            add("")
+            add("TPOs por bloco")
+            linhas.extend(
+                f"{_format_num(price, DIGITOS)} : {cnt}" for price, cnt in tpo.items()
+            )
 
     # ======================================================================
     # MODO SIMPLES
     # ======================================================================
     else:
-        click.echo("DISTRIBUICAO:")
+        add("DISTRIBUICAO:")
 
-        for price, vol in profile.items():
-            click.echo(f"{_format_num(price, DIGITOS)} {_format_num(vol, DIGITOS)}")
+        linhas.extend(
+            f"{_format_num(price, DIGITOS)} {_format_num(vol, DIGITOS)}"
+            for price, vol in profile.items()
+        )
 
         if poc:
-            click.echo(f"POC {_format_num(poc, DIGITOS)}")
+            add(f"POC {_format_num(poc, DIGITOS)}")
 
         if val and vah:
-            click.echo(f"VA {_format_num(vah, DIGITOS)}:{_format_num(val, DIGITOS)}")
+            add(f"VA {_format_num(vah, DIGITOS)}:{_format_num(val, DIGITOS)}")
+
+        if len(value_areas) > 1:
+            for va in value_areas:
+                add(
+                    f"VA{va['percent']:.0%} {_format_num(va['vah'], DIGITOS)}:{_format_num(va['val'], DIGITOS)}"
+                )
 
         if hvn:
-            click.echo(f"HVNs {', '.join(_format_num(p, DIGITOS) for p in hvn)}")
+            add(f"HVNs {', '.join(_format_num(p, DIGITOS) for p in hvn)}")
 
         if lvn:
-            click.echo(f"LVNs {', '.join(_format_num(p, DIGITOS) for p in lvn)}")
+            add(f"LVNs {', '.join(_format_num(p, DIGITOS) for p in lvn)}")
 
         if ib:
-            click.echo(
+            add(
                 f"IB {_format_num(ib['high'], DIGITOS)}:{_format_num(ib['low'], DIGITOS)}"
             )
 
-    click.echo("")
+    add("")
+    return linhas
+
+
+def _linhas_letras(resultado: dict[str, Any], symbol: str) -> list[str]:
+    """
+    Linhas do profile de letras (TPO por período) em texto.
+
+    Cada linha traz o preço seguido das letras dos períodos que o tocaram,
+    do preço mais alto para o mais baixo.
+    """
+    linhas: list[str] = []
+    add = linhas.append
+
+    niveis = resultado.get("niveis", [])
+    if not niveis:
+        add(f"Nenhum dado para exibir para o ativo {symbol}.")
+        return linhas
+
+    add("")
+    add("-" * 60)
+    add(
+        f"Profile de letras para {symbol} — sessao {resultado.get('sessao')} — "
+        f"{resultado.get('periodo_minutos')} minutos por letra — bloco {resultado.get('block')}"
+    )
+    add("-" * 60)
+    add("")
+
+    linhas.extend(f"{_format_num(price, DIGITOS)} {letras}" for price, letras in niveis)
+
+    poc = resultado.get("poc")
+    if poc is not None:
+        add(f"POC {_format_num(poc, DIGITOS)}")
+
+    singles = resultado.get("single_prints", [])
+    if singles:
+        add(f"Single prints {', '.join(_format_num(p, DIGITOS) for p in singles)}")
+
+    ib = resultado.get("ib")
+    if ib:
+        add(
+            f"IB {resultado.get('ib_letras')} {_format_num(ib['high'], DIGITOS)}:{_format_num(ib['low'], DIGITOS)}"
+        )
+
+    extensoes = resultado.get("extensoes", [])
+    if extensoes:
+        add(
+            "Extensoes do IB "
+            + ", ".join(f"{e['letra']} {e['direcao']}" for e in extensoes)
+        )
+
+    add("")
+    return linhas
+
+
+# ======================================================================
+# SAÍDAS ESTRUTURADAS
+# ======================================================================
+
+
+def _numero(v):
+    """Converte escalares numpy em tipos nativos para serialização."""
+    if v is None:
+        return None
+    if isinstance(v, int | float | str | bool):
+        return v
+    try:
+        return v.item()
+    except AttributeError:
+        return v
+
+
+def serializar_profile(resultado: dict[str, Any], symbol: str) -> dict[str, Any]:
+    """
+    Converte o resultado do profile em um dicionário serializável.
+
+    Os níveis vêm em três listas paralelas (`precos`, `volume`, `tpo`), do
+    preço mais alto para o mais baixo.
+    """
+    profile = resultado.get("profile") or {}
+    tpo = resultado.get("tpo") or {}
+    ib = resultado.get("ib")
+
+    dados = {
+        "symbol": symbol,
+        "sessao": resultado.get("sessao"),
+        "timeframe": resultado.get("timeframe"),
+        "by": resultado.get("by"),
+        "block": _numero(resultado.get("block")),
+        "rates_count": _numero(resultado.get("rates_count")),
+        "precos": [_numero(p) for p in profile.keys()],
+        "volume": [_numero(v) for v in profile.values()],
+        "tpo": [_numero(t) for t in tpo.values()],
+        "total_volume": _numero(resultado.get("total_volume")),
+        "total_tpo": _numero(resultado.get("total_tpo")),
+        "poc": _numero(resultado.get("poc")),
+        "vah": _numero(resultado.get("vah")),
+        "val": _numero(resultado.get("val")),
+        "va_percent": resultado.get("va_percent"),
+        "value_areas": [
+            {k: _numero(v) for k, v in va.items()}
+            for va in resultado.get("value_areas", [])
+        ],
+        "hvn": [_numero(p) for p in resultado.get("hvn", [])],
+        "lvn": [_numero(p) for p in resultado.get("lvn", [])],
+        "ib": {k: _numero(v) for k, v in ib.items()} if ib else None,
+        "estatisticas_dia": resultado.get("estatisticas_dia"),
+    }
+    if dados["sessao"] is None:
+        del dados["sessao"]
+    return dados
+
+
+def _csv_profile(itens: list[tuple[str, dict[str, Any]]]) -> str:
+    """
+    Uma linha por nível de preço, com marcações de POC, Value Area, HVN e
+    LVN.
+    """
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator="\n")
+    escritor.writerow(
+        ["symbol", "sessao", "preco", "volume", "tpo", "poc", "va", "hvn", "lvn"]
+    )
+    for symbol, resultado in itens:
+        dados = serializar_profile(resultado, symbol)
+        vah, val = dados["vah"], dados["val"]
+        hvn, lvn = set(dados["hvn"]), set(dados["lvn"])
+        for preco, volume, tpo in zip(
+            dados["precos"], dados["volume"], dados["tpo"], strict=True
+        ):
+            escritor.writerow(
+                [
+                    symbol,
+                    dados.get("sessao", ""),
+                    preco,
+                    volume,
+                    tpo,
+                    int(preco == dados["poc"]),
+                    int(vah is not None and val <= preco <= vah),
+                    int(preco in hvn),
+                    int(preco in lvn),
+                ]
+            )
+    return buffer.getvalue()
+
+
+def renderizar_profiles(
+    itens: list[tuple[str, dict[str, Any]]],
+    formato: str = "text",
+    verbose: bool = False,
+) -> str:
+    """
+    Monta a saída de um ou mais profiles.
+
+    Args:
+        itens: Pares (rótulo do ativo, resultado do profile).
+        formato (str): "text", "json" (um objeto, ou uma lista quando há
+            vários profiles), "csv" (uma linha por nível) ou "ndjson" (um
+            objeto por linha).
+
+    Returns:
+        str: Texto completo, terminado em quebra de linha.
+    """
+    if formato == "text":
+        linhas = []
+        for symbol, resultado in itens:
+            linhas.extend(_linhas_profile(resultado, symbol, verbose))
+        return "\n".join(linhas) + "\n"
+
+    if formato == "csv":
+        return _csv_profile(itens)
+
+    dados = [serializar_profile(resultado, symbol) for symbol, resultado in itens]
+    if formato == "ndjson":
+        return "".join(json.dumps(d, ensure_ascii=False) + "\n" for d in dados)
+    if formato == "json":
+        documento = dados[0] if len(dados) == 1 else dados
+        return json.dumps(documento, ensure_ascii=False) + "\n"
+
+    raise ValueError(f"Formato invalido ({formato}). Use: {', '.join(FORMATOS)}.")
+
+
+@medir("exibicao")
+def exibir_profiles(
+    itens: list[tuple[str, dict[str, Any]]],
+    formato: str = "text",
+    verbose: bool = False,
+) -> None:
+    """Exibe um ou mais profiles no formato escolhido, em uma única escrita."""
+    _escrever(renderizar_profiles(itens, formato, verbose))
+
+
+def exibir_profile(
+    resultado: dict[str, Any],
+    symbol: str,
+    verbose: bool = False,
+    formato: str = "text",
+) -> None:
+    """
+    Exibe o Market Profile no terminal.
+
+    Args:
+        resultado (dict[str, Any]): Estrutura retornada pelo cálculo do profile.
+        symbol (str): Código do ativo.
+        verbose (bool, opcional): Ativa o modo detalhado. Padrão: False.
+        formato (str, opcional): text, json, csv ou ndjson. Padrão: text.
+
+    Returns:
+        None
+    """
+    exibir_profiles([(symbol, resultado)], formato, verbose)
+
+
+@medir("exibicao")
+def exibir_letras(
+    resultado: dict[str, Any], symbol: str, formato: str = "text"
+) -> None:
+    """
+    Exibe o profile de letras (TPO por período).
+
+    Em json/ndjson o resultado é escrito como um objeto; em csv, uma linha
+    por nível com o preço e as letras.
+    """
+    if formato == "text":
+        texto = "\n".join(_linhas_letras(resultado, symbol)) + "\n"
+    elif formato == "csv":
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer, lineterminator="\n")
+        escritor.writerow(["symbol", "sessao", "preco", "letras"])
+        sessao = resultado.get("sessao") or ""
+        escritor.writerows(
+            [symbol, sessao, preco, letras]
+            for preco, letras in resultado.get("niveis", [])
+        )
+        texto = buffer.getvalue()
+    elif formato in ("json", "ndjson"):
+        texto = json.dumps({"symbol": symbol, **resultado}, ensure_ascii=False) + "\n"
+    else:
+        raise ValueError(f"Formato invalido ({formato}). Use: {', '.join(FORMATOS)}.")
+
+    _escrever(texto)
+
+
+@medir("exibicao")
+def exibir_desenvolvimento(
+    resultado: dict[str, Any], symbol: str, formato: str = "text"
+) -> None:
+    """
+    Exibe POC, VAH e VAL após cada candle (profile em desenvolvimento).
+
+    Em texto, uma linha por candle com o horário; em csv, uma linha por
+    candle com o timestamp; em json/ndjson, listas paralelas.
+    """
+    serie = resultado.get("serie")
+    tempos = serie["time"].tolist()
+    colunas = {
+        # NaN (antes do primeiro nível) vira None, como nos demais formatos
+        campo: [None if math.isnan(v) else v for v in serie[campo].tolist()]
+        for campo in ("poc", "vah", "val")
+    }
+    linhas_serie = list(
+        zip(tempos, colunas["poc"], colunas["vah"], colunas["val"], strict=True)
+    )
+
+    if formato == "text":
+        if not linhas_serie:
+            texto = f"Nenhum dado para exibir para o ativo {symbol}.\n"
+        else:
+            linhas = [
+                "",
+                "-" * 60,
+                f"Profile em desenvolvimento para {symbol} — sessao "
+                f"{resultado.get('sessao')} — {resultado.get('by')} — bloco "
+                f"{resultado.get('block')}",
+                "-" * 60,
+                "",
+            ]
+            linhas.extend(
+                f"{datetime.datetime.utcfromtimestamp(t):%H:%M} "
+                f"POC {_format_num(poc, DIGITOS)} "
+                f"VAH {_format_num(vah, DIGITOS)} "
+                f"VAL {_format_num(val, DIGITOS)}"
+                for t, poc, vah, val in linhas_serie
+            )
+            linhas.append("")
+            texto = "\n".join(linhas) + "\n"
+    elif formato == "csv":
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer, lineterminator="\n")
+        escritor.writerow(["symbol", "sessao", "time", "poc", "vah", "val"])
+        sessao = resultado.get("sessao") or ""
+        escritor.writerows(
+            [symbol, sessao, t, poc, vah, val] for t, poc, vah, val in linhas_serie
+        )
+        texto = buffer.getvalue()
+    elif formato in ("json", "ndjson"):
+        dados = {
+            "symbol": symbol,
+            **{k: v for k, v in resultado.items() if k != "serie"},
+            "time": tempos,
+            **colunas,
+        }
+        texto = json.dumps(dados, ensure_ascii=False) + "\n"
+    else:
+        raise ValueError(f"Formato invalido ({formato}). Use: {', '.join(FORMATOS)}.")
+
+    _escrever(texto)
@@ -0,0 +1,254 @@
+"""
+Benchmark do cálculo do Market Profile com rates sintéticos.
+
+Mede `model.calcular_profile` para cada combinação de quantidade de
+candles, modo `by`, critério de HVN/LVN e tamanho de bloco, sem depender de
+um terminal MetaTrader 5. Mede também o tempo de importação do plugin e do
+comando (`python -X importtime`) e verifica que o registro do plugin não
+importa o cálculo nem o MetaTrader5. Os resultados são gravados em JSON e,
+se um baseline for informado, o processo termina com código 1 quando algum
+caso ficar mais lento que o baseline além do limite.
+
+Uso:
+    python -m tests.benchmark --saida atual.json
+    python -m tests.benchmark --baseline base.json --limite 0.25
+    python -m tests.benchmark --barras 1000,10000 --repeticoes 5
+"""
+
+import argparse
+import datetime
+import itertools
+import json
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from mtcli_market.model import calcular_profile
+from mtcli_market.synthetic import gerar_rates
+
+BARRAS = (1_000, 10_000, 100_000, 1_000_000)
+MODOS_BY = ("tpo", "tick", "volume")
+CRITERIOS_HVN = ("mult", "std", "percentil", "picos")
+BLOCOS = (5.0, 25.0, 100.0)
+
+#: Diferenças abaixo deste tempo (s) não contam como regressão
+TOLERANCIA_ABSOLUTA = 0.002
+
+#: Módulos cujo tempo de importação é medido
+MODULOS_IMPORTACAO = ("mtcli_market.plugin", "mtcli_market.cli")
+
+#: Módulos que o registro do plugin não pode importar
+PROIBIDOS_NO_PLUGIN = (
+    "numpy",
+    "MetaTrader5",
+    "mtcli_market.model",
+    "mtcli_market.conf",
+    "mtcli_market.cli",
+)
+
+
+def _lista(tipo):
+    def converter(valor: str):
+        return tuple(tipo(v) for v in valor.split(",") if v.strip())
+
+    return converter
+
+
+def _medir(rates, block: float, by: str, criterio: str, repeticoes: int) -> float:
+    """Menor tempo de `repeticoes` execuções, em segundos."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        calcular_profile(rates, block=block, by=by, criterio_hvn=criterio)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def _importtime(modulo: str) -> tuple[float, set[str]]:
+    """
+    Importa `modulo` em um novo interpretador com `-X importtime`.
+
+    Returns:
+        tuple: (segundos acumulados da importação do módulo, nomes de todos
+        os módulos importados).
+    """
+    saida = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+
+    segundos = 0.0
+    importados = set()
+    for linha in saida.splitlines():
+        if not linha.startswith("import time:") or "|" not in linha:
+            continue
+        _, acumulado, nome = linha.split("|")
+        nome = nome.strip()
+        importados.add(nome)
+        if nome == modulo:
+            segundos = int(acumulado) / 1e6
+    return segundos, importados
+
+
+def medir_importacao(repeticoes: int = 3) -> tuple[dict, list[str]]:
+    """
+    Mede a importação de `MODULOS_IMPORTACAO` (menor de `repeticoes`
+    execuções, após uma de aquecimento).
+
+    Returns:
+        tuple: (resultados por chave "importacao/<modulo>", módulos
+        proibidos importados pelo plugin).
+    """
+    resultados = {}
+    proibidos = []
+    for modulo in MODULOS_IMPORTACAO:
+        _importtime(modulo)
+        medicoes = [_importtime(modulo) for _ in range(repeticoes)]
+        segundos = min(m[0] for m in medicoes)
+
+        if modulo == "mtcli_market.plugin":
+            importados = medicoes[0][1]
+            proibidos = [m for m in PROIBIDOS_NO_PLUGIN if m in importados]
+
+        chave = f"importacao/{modulo}"
+        resultados[chave] = {"modulo": modulo, "segundos": segundos}
+        print(f"{chave:<32} {segundos * 1000:10.2f} ms", file=sys.stderr)
+
+    return resultados, proibidos
+
+
+def executar(
+    barras=BARRAS,
+    modos=MODOS_BY,
+    criterios=CRITERIOS_HVN,
+    blocos=BLOCOS,
+    repeticoes: int = 3,
+    seed: int = 0,
+    importacao: bool = True,
+) -> dict:
+    """
+    Executa todos os casos e retorna os resultados por chave
+    "barras/by/criterio/bloco" (e "importacao/<modulo>").
+    """
+    resultados = {}
+    proibidos = []
+    if importacao:
+        resultados, proibidos = medir_importacao(repeticoes)
+
+    for n in barras:
+        rates = gerar_rates(n, seed=seed)
+        # Casos grandes repetem menos para manter a duração total aceitável
+        rep = repeticoes if n < 1_000_000 else 1
+        for by, criterio, block in itertools.product(modos, criterios, blocos):
+            segundos = _medir(rates, block, by, criterio, rep)
+            chave = f"{n}/{by}/{criterio}/{block:g}"
+            resultados[chave] = {
+                "barras": n,
+                "by": by,
+                "criterio_hvn": criterio,
+                "block": block,
+                "segundos": segundos,
+                "barras_por_segundo": n / segundos if segundos > 0 else None,
+            }
+            print(f"{chave:<32} {segundos * 1000:10.2f} ms", file=sys.stderr)
+
+    return {
+        "data": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "plataforma": platform.platform(),
+        "repeticoes": repeticoes,
+        "seed": seed,
+        "proibidos_no_plugin": proibidos,
+        "resultados": resultados,
+    }
+
+
+def comparar(atual: dict, baseline: dict, limite: float) -> list[str]:
+    """
+    Lista os casos presentes nos dois resultados que ficaram mais lentos
+    que o baseline por mais de `limite` (fração) e da tolerância absoluta.
+    """
+    regressoes = []
+    base = baseline.get("resultados", {})
+    for chave, caso in atual["resultados"].items():
+        if chave not in base:
+            continue
+        antes = base[chave]["segundos"]
+        depois = caso["segundos"]
+        if depois > antes * (1 + limite) and depois - antes > TOLERANCIA_ABSOLUTA:
+            regressoes.append(
+                f"{chave}: {antes * 1000:.2f} ms -> {depois * 1000:.2f} ms "
+                f"(+{(depois / antes - 1) * 100:.0f}%)"
+            )
+    return regressoes
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--barras", type=_lista(int), default=BARRAS)
+    parser.add_argument("--by", dest="modos", type=_lista(str), default=MODOS_BY)
+    parser.add_argument("--criterios", type=_lista(str), default=CRITERIOS_HVN)
+    parser.add_argument("--blocos", type=_lista(float), default=BLOCOS)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--sem-importacao",
+        action="store_true",
+        help="Não mede o tempo de importação do plugin.",
+    )
+    parser.add_argument("--saida", help="Arquivo JSON para gravar os resultados.")
+    parser.add_argument("--baseline", help="Resultados JSON de referência.")
+    parser.add_argument(
+        "--limite",
+        type=float,
+        default=0.2,
+        help="Regressão tolerada em relação ao baseline (0.2 = 20%%).",
+    )
+    args = parser.parse_args(argv)
+
+    atual = executar(
+        barras=args.barras,
+        modos=args.modos,
+        criterios=args.criterios,
+        blocos=args.blocos,
+        repeticoes=args.repeticoes,
+        seed=args.seed,
+        importacao=not args.sem_importacao,
+    )
+
+    texto = json.dumps(atual, indent=2)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(texto)
+    else:
+        print(texto)
+
+    falhou = False
+    if atual["proibidos_no_plugin"]:
+        print(
+            "O registro do plugin importou: " + ", ".join(atual["proibidos_no_plugin"]),
+            file=sys.stderr,
+        )
+        falhou = True
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressoes = comparar(atual, baseline, args.limite)
+        if regressoes:
+            print("Regressões em relação ao baseline:", file=sys.stderr)
+            for linha in regressoes:
+                print(f"  {linha}", file=sys.stderr)
+            falhou = True
+
+    return 1 if falhou else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
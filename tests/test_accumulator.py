@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from mtcli_market.accumulator import ProfileAccumulator
+from mtcli_market.model import calcular_profile
+from mtcli_market.synthetic import gerar_rates
+
+BLOCO = 25.0
+JANELA = 300
+
+
+def _em_formacao(candle):
+    """Versão parcial do candle: máxima, fechamento e volumes menores."""
+    parcial = candle.copy()
+    parcial["high"] = parcial["open"] + (parcial["high"] - parcial["open"]) // 2
+    parcial["close"] = parcial["open"]
+    parcial["tick_volume"] //= 2
+    parcial["real_volume"] //= 2
+    return parcial
+
+
+def _comparar(resultado, esperado):
+    perfil, referencia = resultado["profile"], esperado["profile"]
+    assert perfil.base == referencia.base
+    np.testing.assert_array_equal(perfil.tpo, referencia.tpo)
+    np.testing.assert_allclose(perfil.volume, referencia.volume, atol=1e-6)
+    for campo in ("poc", "vah", "val", "hvn", "lvn", "ib", "rates_count"):
+        assert resultado[campo] == esperado[campo], campo
+
+
+@pytest.mark.parametrize("by", ["tpo", "tick", "volume"])
+def test_janela_igual_ao_profile_dos_ultimos_candles(by):
+    rates = gerar_rates(2000, seed=7)
+    acumulador = ProfileAccumulator(BLOCO, by=by, janela=JANELA)
+
+    rng = np.random.default_rng(3)
+    fim = JANELA
+    visiveis = rates[:fim].copy()
+    visiveis[-1:] = _em_formacao(rates[fim - 1 : fim])
+    acumulador.adicionar(visiveis)
+
+    while fim < len(rates):
+        # Cada consulta traz de 0 a 40 candles novos; o último ainda em formação
+        fim = min(fim + int(rng.integers(0, 40)), len(rates))
+        visiveis = rates[:fim].copy()
+        if fim < len(rates):
+            visiveis[-1:] = _em_formacao(rates[fim - 1 : fim])
+
+        acumulador.adicionar(visiveis[visiveis["time"] >= acumulador.ultimo_tempo])
+        _comparar(
+            acumulador.resultado(criterio_hvn="mult"),
+            calcular_profile(
+                visiveis[-JANELA:], block=BLOCO, by=by, criterio_hvn="mult"
+            ),
+        )
+
+
+def test_sem_janela_acumula_todos_os_candles():
+    rates = gerar_rates(1000, seed=1)
+    acumulador = ProfileAccumulator(BLOCO, by="tpo")
+    for ini in range(0, len(rates), 100):
+        acumulador.adicionar(rates[ini : ini + 100])
+
+    _comparar(
+        acumulador.resultado(criterio_hvn="mult"),
+        calcular_profile(rates, block=BLOCO, by="tpo", criterio_hvn="mult"),
+    )
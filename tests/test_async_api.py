@@ -0,0 +1,96 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from mtcli_market import async_api
+from mtcli_market.async_api import (
+    AsyncProfiler,
+    aclose,
+    obter_profile_async,
+    profiler_padrao,
+)
+from mtcli_market.controller import obter_profile
+from mtcli_market.datasource import (
+    TIMEFRAMES,
+    ReplayDataSource,
+    definir_fonte,
+    gravar_replay,
+)
+from mtcli_market.synthetic import gerar_rates
+
+SYMBOLS = ("WIN$N", "WDO$N", "IND$N", "DOL$N", "BIT$N", "PETR4")
+
+
+@pytest.fixture(autouse=True)
+def fonte(tmp_path):
+    for i, symbol in enumerate(SYMBOLS):
+        gravar_replay(str(tmp_path), symbol, gerar_rates(800, seed=i), TIMEFRAMES["M1"])
+    definir_fonte(ReplayDataSource(str(tmp_path)))
+    yield
+    definir_fonte(None)
+
+
+def _niveis(resultado: dict) -> tuple:
+    return resultado["poc"], resultado["vah"], resultado["val"]
+
+
+def test_profiles_concorrentes_respeitam_o_limite(monkeypatch):
+    calcular = async_api._calcular_com_histograma
+    trava = threading.Lock()
+    em_andamento = maximo = 0
+
+    def contar(*args, **kwargs):
+        nonlocal em_andamento, maximo
+        with trava:
+            em_andamento += 1
+            maximo = max(maximo, em_andamento)
+        try:
+            time.sleep(0.02)
+            return calcular(*args, **kwargs)
+        finally:
+            with trava:
+                em_andamento -= 1
+
+    monkeypatch.setattr(async_api, "_calcular_com_histograma", contar)
+
+    async def consultar():
+        async with AsyncProfiler(max_concorrentes=2, workers=4) as profiler:
+            return await profiler.obter_profiles(SYMBOLS, "M1", 500, 25.0, "tpo")
+
+    resultados = asyncio.run(consultar())
+    assert 1 < maximo <= 2
+    assert list(resultados) == list(SYMBOLS)
+    for symbol in SYMBOLS:
+        esperado = obter_profile(symbol, "M1", 500, 25.0, "tpo")
+        assert _niveis(resultados[symbol]) == _niveis(esperado)
+
+
+def test_instancia_padrao_em_dois_lacos():
+    async def consultar():
+        # Mais consultas que o limite padrão (8): o semáforo é disputado
+        return await asyncio.gather(
+            *(obter_profile_async(s, "M1", 500, 25.0, "tpo") for s in SYMBOLS * 3)
+        )
+
+    try:
+        primeiro = asyncio.run(consultar())
+        # Outro laço de eventos: o limite de concorrência é recriado
+        segundo = asyncio.run(consultar())
+    finally:
+        asyncio.run(aclose())
+
+    assert [_niveis(r) for r in primeiro] == [_niveis(r) for r in segundo]
+    assert async_api._padrao is None
+
+
+def test_instancia_padrao_como_contexto():
+    async def consultar():
+        async with profiler_padrao() as profiler:
+            return await profiler.obter_profile("WIN$N", "M1", 500, 25.0, "tpo")
+
+    resultado = asyncio.run(consultar())
+    assert profiler_padrao() is not None and not profiler_padrao().fechado
+    assert _niveis(resultado) == _niveis(obter_profile("WIN$N", "M1", 500, 25.0, "tpo"))
+    asyncio.run(aclose())
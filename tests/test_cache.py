@@ -0,0 +1,138 @@
+import multiprocessing
+import os
+import threading
+import time
+
+import numpy as np
+
+from mtcli_market.cache import RATES_DTYPE, RatesCache, _travar
+from mtcli_market.synthetic import gerar_rates
+
+
+class Fonte:
+    """Terminal simulado: expõe os `visiveis` primeiros candles."""
+
+    def __init__(self, rates: np.ndarray, visiveis: int) -> None:
+        self.rates = rates
+        self.visiveis = visiveis
+        self.consultas = []
+
+    def ultimos(self, n: int) -> np.ndarray:
+        self.consultas.append(("ultimos", n))
+        return self.rates[: self.visiveis][-n:].copy()
+
+    def desde(self, tempo: int) -> np.ndarray:
+        self.consultas.append(("desde", tempo))
+        atuais = self.rates[: self.visiveis]
+        return atuais[atuais["time"] >= tempo].copy()
+
+
+def _obter(cache: RatesCache, fonte: Fonte, limit: int) -> np.ndarray:
+    return np.array(cache.obter("WIN$N", "M1", limit, fonte.ultimos, fonte.desde))
+
+
+def test_completa_apenas_com_os_candles_novos(tmp_path):
+    rates = gerar_rates(1000)
+    cache = RatesCache(str(tmp_path), max_barras=10000, max_dias=30)
+    fonte = Fonte(rates, 500)
+
+    np.testing.assert_array_equal(_obter(cache, fonte, 300), rates[200:500])
+    assert fonte.consultas == [("ultimos", 300)]
+
+    fonte.visiveis = 620
+    fonte.consultas.clear()
+    np.testing.assert_array_equal(_obter(cache, fonte, 300), rates[320:620])
+    assert fonte.consultas == [("desde", int(rates[499]["time"]))]
+    assert RatesCache._contar(cache.caminho("WIN$N", "M1")) == 420
+
+
+def test_regrava_o_candle_em_formacao(tmp_path):
+    rates = gerar_rates(400)
+    parcial = rates.copy()
+    parcial["close"][-1] = parcial["open"][-1]
+    parcial["tick_volume"][-1] = 1
+
+    cache = RatesCache(str(tmp_path), max_barras=10000, max_dias=30)
+    fonte = Fonte(parcial, 400)
+    assert _obter(cache, fonte, 200)[-1]["tick_volume"] == 1
+
+    # Mesmo horário, candle concluído: substitui o registro sem acrescentar
+    fonte.rates = rates
+    np.testing.assert_array_equal(_obter(cache, fonte, 200), rates[200:])
+    assert RatesCache._contar(cache.caminho("WIN$N", "M1")) == 200
+
+
+def test_descarte_de_arquivos_antigos_e_compactacao(tmp_path):
+    rates = gerar_rates(1000)
+    cache = RatesCache(str(tmp_path), max_barras=100, max_dias=1)
+
+    antigo = cache.caminho("WDO$N", "M1")
+    rates[:10].tofile(antigo)
+    dois_dias = time.time() - 2 * 86400
+    os.utime(antigo, (dois_dias, dois_dias))
+
+    fonte = Fonte(rates, 150)
+    _obter(cache, fonte, 150)
+    assert not os.path.exists(antigo)
+
+    # Acima do dobro de max(max_barras, limit), mantém os mais recentes
+    fonte.visiveis = 301
+    np.testing.assert_array_equal(_obter(cache, fonte, 120), rates[181:301])
+    arquivo = cache.caminho("WIN$N", "M1")
+    assert RatesCache._contar(arquivo) == 120
+    np.testing.assert_array_equal(
+        np.fromfile(arquivo, dtype=RATES_DTYPE), rates[181:301]
+    )
+
+
+def test_escrita_aguarda_a_trava(tmp_path):
+    rates = gerar_rates(300)
+    cache = RatesCache(str(tmp_path), max_barras=10000, max_dias=30)
+    fonte = Fonte(rates, 300)
+    resultado = []
+
+    arquivo = cache.caminho("WIN$N", "M1")
+    with _travar(arquivo + ".lock"):
+        escritor = threading.Thread(
+            target=lambda: resultado.append(_obter(cache, fonte, 100))
+        )
+        escritor.start()
+        escritor.join(0.3)
+        assert escritor.is_alive()
+        assert not os.path.exists(arquivo)
+
+    escritor.join(5)
+    assert not escritor.is_alive()
+    np.testing.assert_array_equal(resultado[0], rates[200:])
+
+
+def _atualizar_em_outro_processo(diretorio: str, visiveis: list[int]) -> None:
+    rates = gerar_rates(1000)
+    cache = RatesCache(diretorio, max_barras=10000, max_dias=30)
+    fonte = Fonte(rates, 0)
+    for n in visiveis:
+        fonte.visiveis = n
+        _obter(cache, fonte, 100)
+
+
+def test_escritores_concorrentes(tmp_path):
+    rates = gerar_rates(1000)
+    cache = RatesCache(str(tmp_path), max_barras=10000, max_dias=30)
+    _obter(cache, Fonte(rates, 200), 200)
+
+    processos = [
+        multiprocessing.Process(
+            target=_atualizar_em_outro_processo,
+            args=(str(tmp_path), [*range(200 + k, 1000, 7), 1000]),
+        )
+        for k in range(4)
+    ]
+    for p in processos:
+        p.start()
+    for p in processos:
+        p.join(60)
+        assert p.exitcode == 0
+
+    np.testing.assert_array_equal(
+        np.fromfile(cache.caminho("WIN$N", "M1"), dtype=RATES_DTYPE), rates
+    )
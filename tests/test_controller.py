@@ -0,0 +1,54 @@
+from contextlib import contextmanager
+
+import pytest
+
+from mtcli_market.controller import acompanhar_profile
+from mtcli_market.datasource import (
+    TIMEFRAMES,
+    ReplayDataSource,
+    definir_fonte,
+    gravar_replay,
+)
+from mtcli_market.synthetic import gerar_rates
+
+
+class FonteContada(ReplayDataSource):
+    """Replay que conta as conexões e pode falhar as próximas consultas."""
+
+    def __init__(self, diretorio: str) -> None:
+        super().__init__(diretorio)
+        self.conexoes = 0
+        self.falhas = 0
+
+    @contextmanager
+    def conexao(self):
+        self.conexoes += 1
+        yield
+
+    def copy_rates_range(self, symbol, timeframe, de, ate):
+        if self.falhas:
+            self.falhas -= 1
+            return None
+        return super().copy_rates_range(symbol, timeframe, de, ate)
+
+
+@pytest.fixture
+def fonte(tmp_path):
+    gravar_replay(str(tmp_path), "WIN$N", gerar_rates(1000), TIMEFRAMES["M1"])
+    fonte = FonteContada(str(tmp_path))
+    definir_fonte(fonte)
+    yield fonte
+    definir_fonte(None)
+
+
+def test_acompanhamento_usa_uma_conexao(fonte):
+    resultados = acompanhar_profile("WIN$N", "M1", 300, 25.0, "tpo", intervalo=0)
+    for _ in range(5):
+        assert next(resultados)["rates_count"] == 300
+    assert fonte.conexoes == 1
+
+    # Consulta sem candles: reconecta e continua do mesmo ponto
+    fonte.falhas = 1
+    assert next(resultados)["rates_count"] == 300
+    assert fonte.conexoes == 2
+    resultados.close()
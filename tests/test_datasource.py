@@ -0,0 +1,143 @@
+import numpy as np
+import pytest
+
+from mtcli_market import datasource
+from mtcli_market.datasource import (
+    COPY_TICKS_ALL,
+    COPY_TICKS_TRADE,
+    TIMEFRAMES,
+    ReplayDataSource,
+    gravar_replay,
+)
+from mtcli_market.synthetic import gerar_rates
+
+TICKS_DTYPE = np.dtype(
+    [("time", "<i8"), ("bid", "<f8"), ("last", "<f8"), ("flags", "<u4")]
+)
+
+
+class Relogio:
+    """Substitui `time.monotonic` e `time.sleep` do módulo da fonte."""
+
+    def __init__(self) -> None:
+        self.agora = 1000.0
+        self.esperas: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.agora
+
+    def sleep(self, segundos: float) -> None:
+        self.esperas.append(segundos)
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(datasource.time, "monotonic", relogio.monotonic)
+    monkeypatch.setattr(datasource.time, "sleep", relogio.sleep)
+    return relogio
+
+
+@pytest.fixture
+def replay(tmp_path):
+    rates = gerar_rates(3 * 570, seed=4)
+    gravar_replay(str(tmp_path), "WIN$N", rates, TIMEFRAMES["M1"])
+
+    rng = np.random.default_rng(4)
+    ticks = np.zeros(5000, dtype=TICKS_DTYPE)
+    ticks["time"] = np.sort(
+        rng.integers(int(rates["time"][0]), int(rates["time"][-1]) + 60, 5000)
+    )
+    ticks["bid"] = 5000.0
+    negocio = rng.random(5000) < 0.6
+    ticks["last"] = np.where(negocio, 5000.0, 0.0)
+    ticks["flags"] = np.where(negocio, 8 | 16, 2 | 4)
+    gravar_replay(str(tmp_path), "WIN$N", ticks)
+    return str(tmp_path), rates, ticks
+
+
+def _liberados(dados, agora):
+    """Registros com horário até `agora`, um a um."""
+    return np.array([d for d in dados if agora is None or d["time"] <= agora])
+
+
+def _inicio_ultimo_dia(tempos) -> int:
+    dia = int(tempos[-1]) // 86400
+    return int(min(t for t in tempos if int(t) // 86400 == dia))
+
+
+def test_latencia_em_cada_requisicao(relogio, replay):
+    diretorio, rates, ticks = replay
+    fonte = ReplayDataSource(diretorio, latencia=0.05)
+    m1 = TIMEFRAMES["M1"]
+
+    fonte.copy_rates_from_pos("WIN$N", m1, 0, 10)
+    fonte.copy_rates_range("WIN$N", m1, int(rates["time"][0]), int(rates["time"][9]))
+    fonte.copy_ticks_range("WIN$N", 0, int(ticks["time"][-1]), COPY_TICKS_ALL)
+    fonte.tempo_ultimo_tick("WIN$N")
+    # Ativo sem arquivo também paga a latência da requisição
+    assert fonte.copy_rates_from_pos("WDO$N", m1, 0, 10) is None
+
+    assert relogio.esperas == [0.05] * 5
+
+
+def test_sem_relogio_todos_os_dados(relogio, replay):
+    diretorio, rates, ticks = replay
+    fonte = ReplayDataSource(diretorio)
+    m1 = TIMEFRAMES["M1"]
+
+    np.testing.assert_array_equal(
+        fonte.copy_rates_from_pos("WIN$N", m1, 5, 100), rates[-105:-5]
+    )
+    assert fonte.tempo_ultimo_tick("WIN$N") == int(ticks["time"][-1])
+    assert relogio.esperas == []
+
+
+@pytest.mark.parametrize("velocidade", [1.0, 60.0, 600.0])
+def test_relogio_libera_como_a_referencia(relogio, replay, velocidade):
+    diretorio, rates, ticks = replay
+    fonte = ReplayDataSource(diretorio, velocidade=velocidade)
+    m1 = TIMEFRAMES["M1"]
+    base = _inicio_ultimo_dia(rates["time"])
+
+    for decorrido in [0.0, 0.5, 30.0, 90.0, 300.0, 5000.0]:
+        relogio.agora = 1000.0 + decorrido
+        agora = int(base + decorrido * velocidade)
+        esperados = _liberados(rates, agora)
+
+        np.testing.assert_array_equal(
+            fonte.copy_rates_from_pos("WIN$N", m1, 0, 50), esperados[-50:]
+        )
+        np.testing.assert_array_equal(
+            fonte.copy_rates_from_pos("WIN$N", m1, 3, 20), esperados[-23:-3]
+        )
+
+        de = base - 86400
+        faixa = [r for r in esperados if de <= r["time"]]
+        np.testing.assert_array_equal(
+            fonte.copy_rates_range("WIN$N", m1, de, agora + 3600), np.array(faixa)
+        )
+
+        ticks_esperados = _liberados(ticks, agora)
+        negocios = [t for t in ticks_esperados if t["flags"] & (8 | 16)]
+        np.testing.assert_array_equal(
+            fonte.copy_ticks_range("WIN$N", 0, agora + 3600, COPY_TICKS_TRADE),
+            np.array(negocios, dtype=TICKS_DTYPE),
+        )
+        assert fonte.tempo_ultimo_tick("WIN$N") == int(ticks_esperados["time"][-1])
+
+
+def test_relogio_com_inicio_informado(relogio, replay):
+    diretorio, rates, _ = replay
+    inicio = int(rates["time"][100])
+    fonte = ReplayDataSource(diretorio, velocidade=60.0, inicio=inicio)
+    m1 = TIMEFRAMES["M1"]
+
+    relogio.agora = 1000.0
+    assert fonte.copy_rates_from_pos("WIN$N", m1, 0, 1)["time"][0] == inicio
+
+    # Dez segundos reais a 60x: mais dez candles de M1
+    relogio.agora = 1010.0
+    assert fonte.copy_rates_from_pos("WIN$N", m1, 0, 1)["time"][0] == int(
+        rates["time"][110]
+    )
@@ -0,0 +1,34 @@
+import time
+
+import pytest
+
+from mtcli_market.developing import calcular_desenvolvimento
+from mtcli_market.model import calcular_profile
+from mtcli_market.synthetic import gerar_rates
+
+BLOCO = 5.0
+
+
+@pytest.mark.parametrize("va_modo", ["expansao", "gulosa"])
+@pytest.mark.parametrize("by", ["tpo", "tick", "volume"])
+def test_cada_candle_igual_ao_profile_do_prefixo(by, va_modo):
+    rates = gerar_rates(240, seed=5)
+    serie = calcular_desenvolvimento(rates, BLOCO, by, 0.7, va_modo)
+
+    for i in range(len(rates)):
+        esperado = calcular_profile(rates[: i + 1], block=BLOCO, by=by, va_modo=va_modo)
+        assert serie["time"][i] == rates["time"][i]
+        for campo in ("poc", "vah", "val"):
+            assert serie[campo][i] == esperado[campo], (i, campo)
+
+
+def test_sessao_de_600_candles_em_grade_fina():
+    # ~4500 níveis: o laço passo a passo da expansão levava ~1 s aqui
+    rates = gerar_rates(600, seed=5)
+    inicio = time.perf_counter()
+    serie = calcular_desenvolvimento(rates, 0.5, "tpo")
+    assert time.perf_counter() - inicio < 0.5
+
+    esperado = calcular_profile(rates, block=0.5, by="tpo")
+    for campo in ("poc", "vah", "val"):
+        assert serie[campo][-1] == esperado[campo]
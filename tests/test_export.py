@@ -0,0 +1,112 @@
+import json
+
+import pytest
+
+from mtcli_market import export
+from mtcli_market.controller import exportar_profiles
+from mtcli_market.datasource import (
+    TIMEFRAMES,
+    ReplayDataSource,
+    definir_fonte,
+    gravar_replay,
+)
+from mtcli_market.synthetic import gerar_rates
+
+#: Dez pregões de 570 candles de 1 minuto
+RATES = gerar_rates(5700, seed=4)
+INICIO = int(RATES["time"][0])
+FIM = int(RATES["time"][-1]) + 60
+
+
+class InterrupcaoError(Exception):
+    pass
+
+
+@pytest.fixture(autouse=True)
+def fonte(tmp_path, monkeypatch):
+    gravar_replay(str(tmp_path), "WIN$N", RATES, TIMEFRAMES["M1"])
+    definir_fonte(ReplayDataSource(str(tmp_path)))
+    # Um checkpoint após cada lote gravado
+    monkeypatch.setattr(export, "INTERVALO_CHECKPOINT", 0.0)
+    yield
+    definir_fonte(None)
+
+
+def _exportar(arquivo, workers, progresso=None) -> dict:
+    return exportar_profiles(
+        "WIN$N",
+        "M1",
+        INICIO,
+        FIM,
+        str(arquivo),
+        block=25.0,
+        by="tpo",
+        workers=workers,
+        pool="thread",
+        barras_por_bloco=1000,
+        sessoes_por_lote=2,
+        progresso=progresso,
+    )
+
+
+def _interromper_apos(lotes: int):
+    gravados = []
+
+    def progresso(sessoes, ultima, segundos):
+        gravados.append(ultima)
+        if len(gravados) == lotes:
+            raise InterrupcaoError
+
+    return progresso
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_retomada_igual_a_exportacao_sem_interrupcao(tmp_path, workers):
+    completo = tmp_path / "completo.csv"
+    resultado = _exportar(completo, workers)
+    assert resultado["total"] == 10
+    assert not resultado["retomada"]
+
+    arquivo = tmp_path / "retomado.csv"
+    with pytest.raises(InterrupcaoError):
+        _exportar(arquivo, workers, _interromper_apos(2))
+    checkpoint = json.loads((tmp_path / "retomado.csv.checkpoint").read_text())
+    assert 0 < checkpoint["sessoes"] < 10
+
+    resultado = _exportar(arquivo, workers)
+    assert resultado["retomada"]
+    assert resultado["sessoes"] == 10 - checkpoint["sessoes"]
+    assert resultado["total"] == 10
+    assert arquivo.read_bytes() == completo.read_bytes()
+    assert not (tmp_path / "retomado.csv.checkpoint").exists()
+
+
+def test_retomada_descarta_linhas_apos_o_checkpoint(tmp_path):
+    completo = tmp_path / "completo.csv"
+    _exportar(completo, 1)
+
+    arquivo = tmp_path / "retomado.csv"
+    with pytest.raises(InterrupcaoError):
+        _exportar(arquivo, 1, _interromper_apos(3))
+    # Linha parcial gravada depois do último checkpoint
+    with open(arquivo, "ab") as f:
+        f.write(b"WIN$N,2025-01-")
+
+    _exportar(arquivo, 1)
+    assert arquivo.read_bytes() == completo.read_bytes()
+
+
+def test_checkpoint_de_outro_pedido_e_ignorado(tmp_path):
+    completo = tmp_path / "completo.csv"
+    _exportar(completo, 1)
+
+    arquivo = tmp_path / "retomado.csv"
+    with pytest.raises(InterrupcaoError):
+        _exportar(arquivo, 1, _interromper_apos(1))
+
+    resultado = exportar_profiles(
+        "WIN$N", "M1", INICIO, FIM, str(arquivo), block=50.0, by="tpo", workers=1
+    )
+    assert not resultado["retomada"]
+    assert resultado["total"] == 10
+    assert arquivo.read_bytes() != completo.read_bytes()
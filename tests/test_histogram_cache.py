@@ -0,0 +1,64 @@
+import numpy as np
+
+from mtcli_market.histogram_cache import HistogramCache, chave_histograma
+from mtcli_market.model import calcular_profile
+from mtcli_market.synthetic import gerar_rates
+
+BLOCO = 25.0
+
+METRICAS = ("poc", "vah", "val", "hvn", "lvn", "ib", "total_volume", "total_tpo")
+
+
+def _consultar(cache: HistogramCache, rates, by: str, **parametros) -> dict:
+    """Consulta com memo, como `controller.obter_profile`."""
+    chave = chave_histograma("WIN$N", "M1", BLOCO, by, rates)
+    resultado = calcular_profile(
+        rates, block=BLOCO, by=by, histograma=cache.obter(chave), **parametros
+    )
+    cache.guardar(chave, resultado["profile"])
+    return resultado
+
+
+def _comparar(resultado: dict, esperado: dict) -> None:
+    for campo in METRICAS:
+        assert resultado[campo] == esperado[campo], campo
+    np.testing.assert_array_equal(
+        resultado["profile"].volume, esperado["profile"].volume
+    )
+
+
+def test_candle_em_formacao_com_o_mesmo_horario():
+    rates = gerar_rates(600)
+    parcial = rates.copy()
+    parcial["high"][-1] = parcial["open"][-1]
+    parcial["low"][-1] = parcial["open"][-1]
+    parcial["real_volume"][-1] = 3
+
+    cache = HistogramCache(max_itens=8)
+    _consultar(cache, parcial, "volume")
+
+    # Mesmo horário e quantidade de candles, mas o último mudou
+    assert chave_histograma("WIN$N", "M1", BLOCO, "volume", rates) != (
+        chave_histograma("WIN$N", "M1", BLOCO, "volume", parcial)
+    )
+    _comparar(
+        _consultar(cache, rates, "volume"),
+        calcular_profile(rates, block=BLOCO, by="volume"),
+    )
+
+
+def test_acerto_recalcula_apenas_as_metricas(tmp_path):
+    rates = gerar_rates(600)
+    cache = HistogramCache(max_itens=8, diretorio=str(tmp_path))
+    _consultar(cache, rates, "tick")
+
+    parametros = {"va_percent": 0.8, "criterio_hvn": "picos"}
+    chave = chave_histograma("WIN$N", "M1", BLOCO, "tick", rates)
+    assert cache.obter(chave) is not None
+    esperado = calcular_profile(rates, block=BLOCO, by="tick", **parametros)
+    _comparar(_consultar(cache, rates, "tick", **parametros), esperado)
+
+    # Em disco, outro processo encontra o mesmo histograma
+    outro = HistogramCache(max_itens=8, diretorio=str(tmp_path))
+    assert outro.obter(chave) is not None
+    _comparar(_consultar(outro, rates, "tick", **parametros), esperado)
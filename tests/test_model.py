@@ -0,0 +1,77 @@
+from math import ceil, floor
+
+import pytest
+
+from mtcli_market.model import calcular_profile
+from mtcli_market.synthetic import gerar_rates
+
+
+def _profile_referencia(rates, block: float, by: str) -> dict:
+    """
+    Profile, POC e Value Area calculados candle a candle, como na
+    implementação original (antes do binning vetorizado).
+    """
+    profile: dict[float, float] = {}
+    tpo: dict[float, int] = {}
+    for r in rates:
+        low, high = float(r["low"]), float(r["high"])
+        volume = float(r["tick_volume"] if by == "tick" else r["real_volume"])
+
+        blocos = []
+        b = ceil(high / block) * block
+        while b >= floor(low / block) * block:
+            blocos.append(round(b, 8))
+            b -= block
+
+        sobreposicao = {b: max(0.0, min(high, b) - max(low, b - block)) for b in blocos}
+        soma = sum(sobreposicao.values())
+        for b in blocos:
+            if by == "tpo":
+                peso = 1.0
+            elif soma <= 0:
+                peso = volume / len(blocos)
+            else:
+                peso = sobreposicao[b] / soma * volume
+            profile[b] = profile.get(b, 0.0) + peso
+            tpo[b] = tpo.get(b, 0) + 1
+
+    profile = dict(sorted(profile.items(), reverse=True))
+    tpo = dict(sorted(tpo.items(), reverse=True))
+    poc = max(profile.items(), key=lambda x: x[1])[0]
+
+    # Value Area gulosa: níveis de maior volume até 70% do total
+    alvo = sum(profile.values()) * 0.7
+    acumulado = 0.0
+    escolhidos = []
+    for preco, volume in sorted(profile.items(), key=lambda x: x[1], reverse=True):
+        escolhidos.append(preco)
+        acumulado += volume
+        if acumulado >= alvo:
+            break
+
+    return {
+        "profile": profile,
+        "tpo": tpo,
+        "poc": poc,
+        "vah": max(escolhidos),
+        "val": min(escolhidos),
+    }
+
+
+@pytest.mark.parametrize("by", ["tpo", "tick", "volume"])
+@pytest.mark.parametrize("block", [5.0, 25.0, 100.0])
+def test_binning_vetorizado_igual_ao_calculo_por_candle(by, block):
+    rates = gerar_rates(3000, seed=11)
+    # Candles sem range repartem o volume igualmente
+    rates["high"][::50] = rates["low"][::50]
+
+    resultado = calcular_profile(rates, block=block, by=by, va_modo="gulosa")
+    esperado = _profile_referencia(rates, block, by)
+
+    assert list(resultado["profile"].keys()) == list(esperado["profile"])
+    assert resultado["profile"].values() == pytest.approx(
+        list(esperado["profile"].values())
+    )
+    assert dict(resultado["tpo"].items()) == esperado["tpo"]
+    for campo in ("poc", "vah", "val"):
+        assert resultado[campo] == esperado[campo], campo
@@ -0,0 +1,170 @@
+import math
+
+import numpy as np
+import pytest
+
+from mtcli_market.model import calcular_profile
+from mtcli_market.nodes import detectar_nos, suavizar
+from mtcli_market.profile import Profile
+from mtcli_market.synthetic import gerar_rates
+
+
+def _nos_referencia(profile_map: dict, criterio, mult_hvn, mult_lvn, p_hvn, p_lvn):
+    """Critérios globais nível a nível, como na implementação original."""
+    volumes = list(profile_map.values())
+    media = sum(volumes) / len(volumes)
+
+    if criterio == "std":
+        variancia = sum((v - media) ** 2 for v in volumes) / len(volumes)
+        desvio = variancia**0.5
+        limite_hvn = media + desvio
+        limite_lvn = max(0.0, media - desvio)
+    elif criterio == "mult":
+        limite_hvn = media * mult_hvn
+        limite_lvn = max(0.0, media * mult_lvn)
+    else:
+        vols_ord = sorted(volumes)
+        limite_hvn = vols_ord[min(int(len(vols_ord) * (p_hvn / 100)), len(volumes) - 1)]
+        limite_lvn = vols_ord[max(int(len(vols_ord) * (p_lvn / 100)), 0)]
+
+    hvn = [p for p, v in profile_map.items() if v >= limite_hvn]
+    lvn = [p for p, v in profile_map.items() if v <= limite_lvn]
+    return hvn, lvn
+
+
+def _suavizar_referencia(volumes, suavizacao: int) -> list[float]:
+    """Média ponderada gaussiana por soma direta, repetindo as bordas."""
+    n = len(volumes)
+    raio = suavizacao // 2
+    desvio = max(suavizacao / 4, 0.5)
+    pesos = [math.exp(-0.5 * (x / desvio) ** 2) for x in range(-raio, raio + 1)]
+    curva = []
+    for i in range(n):
+        soma = 0.0
+        for k, peso in enumerate(pesos):
+            soma += peso * float(volumes[min(max(i + k - raio, 0), n - 1)])
+        curva.append(soma / sum(pesos))
+    return curva
+
+
+def _picos_referencia(profile: Profile, curva: list[float], proeminencia: float):
+    """
+    Critério picos ponto a ponto sobre a curva suavizada: extremos locais por
+    varredura (centro dos platôs) e proeminência pela busca, para cada lado,
+    do primeiro ponto mais extremo que o nó.
+    """
+    n = len(curva)
+    if n < 3:
+        return [], []
+
+    def extremos(c):
+        nos = []
+        i = 1
+        while i < n - 1:
+            if c[i] > c[i - 1]:
+                fim = i
+                while fim + 1 < n and c[fim + 1] == c[i]:
+                    fim += 1
+                if fim + 1 < n and c[fim + 1] < c[i]:
+                    nos.append((i + fim) // 2)
+                i = fim + 1
+            else:
+                i += 1
+        return nos
+
+    def proeminencia_de(c, i):
+        bases = []
+        for passo in (-1, 1):
+            j, base = i, c[i]
+            while 0 <= j + passo < n and c[j + passo] <= c[i]:
+                j += passo
+                base = min(base, c[j])
+            bases.append(base)
+        return c[i] - max(bases)
+
+    minimo = proeminencia * max(curva)
+    negativa = [-v for v in curva]
+    picos = [i for i in extremos(curva) if proeminencia_de(curva, i) >= minimo]
+    vales = [i for i in extremos(negativa) if proeminencia_de(negativa, i) >= minimo]
+
+    def precos(nos):
+        return [profile.preco(i) for i in sorted(nos, reverse=True) if profile.tpo[i]]
+
+    return precos(picos), precos(vales)
+
+
+def _profile_aleatorio(seed: int, n: int = 300) -> Profile:
+    """Volumes inteiros com platôs e níveis não negociados no meio."""
+    rng = np.random.default_rng(seed)
+    volume = np.repeat(rng.integers(0, 40, n // 3), 3)[:n].astype(np.float64)
+    volume += rng.integers(0, 3, len(volume)) * (rng.random(len(volume)) < 0.3)
+    volume[rng.random(len(volume)) < 0.05] = 0.0
+    tpo = np.where(volume > 0, rng.integers(1, 9, len(volume)), 0)
+    return Profile(int(rng.integers(1000, 2000)), 5.0, volume, tpo)
+
+
+@pytest.mark.parametrize("criterio", ["mult", "std", "percentil"])
+@pytest.mark.parametrize("by", ["tpo", "tick", "volume"])
+def test_criterios_globais_iguais_ao_laco_original(criterio, by):
+    parametros = (1.5, 0.5, 90, 10)
+    for seed in range(3):
+        resultado = calcular_profile(
+            gerar_rates(1200, seed=seed), block=5.0, by=by, criterio_hvn=criterio
+        )
+        hvn, lvn = _nos_referencia(dict(resultado["profile"]), criterio, *parametros)
+        assert resultado["hvn"] == hvn
+        assert resultado["lvn"] == lvn
+
+
+@pytest.mark.parametrize("criterio", ["mult", "std", "percentil"])
+def test_criterios_globais_com_empates(criterio):
+    for seed in range(20):
+        profile = _profile_aleatorio(seed)
+        parametros = (1.2, 0.8, 75, 25)
+        esperado = _nos_referencia(dict(profile.items()), criterio, *parametros)
+        assert detectar_nos(profile, criterio, *parametros) == esperado
+
+
+@pytest.mark.parametrize("suavizacao", [2, 3, 5, 8, 11])
+def test_suavizacao_igual_a_soma_direta(suavizacao):
+    for seed in range(5):
+        volumes = _profile_aleatorio(seed).volume
+        np.testing.assert_allclose(
+            suavizar(volumes, suavizacao),
+            _suavizar_referencia(volumes, suavizacao),
+            rtol=1e-12,
+        )
+    np.testing.assert_array_equal(suavizar(volumes, 1), volumes)
+
+
+@pytest.mark.parametrize("suavizacao", [1, 3, 5, 8])
+@pytest.mark.parametrize("proeminencia", [0.0, 0.05, 0.2])
+def test_picos_iguais_a_referencia(suavizacao, proeminencia):
+    for seed in range(15):
+        profile = _profile_aleatorio(seed)
+        hvn, lvn = detectar_nos(
+            profile, "picos", suavizacao=suavizacao, proeminencia=proeminencia
+        )
+        # A curva é a mesma; a referência da suavização é conferida à parte,
+        # pois diferenças de arredondamento criam ou desfazem platôs
+        curva = suavizar(profile.volume, suavizacao).tolist()
+        hvn_ref, lvn_ref = _picos_referencia(profile, curva, proeminencia)
+        assert hvn == hvn_ref
+        assert lvn == lvn_ref
+
+
+def test_picos_no_profile_calculado():
+    resultado = calcular_profile(
+        gerar_rates(1500, seed=8),
+        block=5.0,
+        by="volume",
+        criterio_hvn="picos",
+        suavizacao_hvn=5,
+        proeminencia_hvn=0.1,
+    )
+    profile = resultado["profile"]
+    curva = suavizar(profile.volume, 5).tolist()
+    hvn, lvn = _picos_referencia(profile, curva, 0.1)
+    assert resultado["hvn"] == hvn
+    assert resultado["lvn"] == lvn
+    assert hvn
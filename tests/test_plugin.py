@@ -0,0 +1,33 @@
+import subprocess
+import sys
+
+#: Módulos que o registro do plugin não pode importar
+PROIBIDOS = (
+    "MetaTrader5",
+    "numpy",
+    "mtcli_market.model",
+    "mtcli_market.conf",
+    "mtcli_market.cli",
+)
+
+
+def _importados(modulo: str) -> set[str]:
+    """Módulos importados por `modulo` em um novo interpretador."""
+    saida = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+
+    importados = set()
+    for linha in saida.splitlines():
+        if linha.startswith("import time:") and "|" in linha:
+            importados.add(linha.rsplit("|", 1)[1].strip())
+    return importados
+
+
+def test_registro_nao_importa_o_calculo():
+    importados = _importados("mtcli_market.plugin")
+    assert "mtcli_market.plugin" in importados
+    assert [m for m in PROIBIDOS if m in importados] == []
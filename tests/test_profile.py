@@ -0,0 +1,83 @@
+from math import ceil
+
+import numpy as np
+import pytest
+
+from mtcli_market.model import calcular_profile, calcular_profiles_blocos
+from mtcli_market.profile import Profile
+from mtcli_market.synthetic import gerar_rates
+
+
+def _reagrupar_referencia(profile: Profile, fator: int) -> dict[float, tuple]:
+    """
+    Soma, nível a nível, o volume e o TPO dos blocos finos de índice i no
+    bloco grosso de índice ceil(i / fator).
+    """
+    block = profile.block * fator
+    niveis: dict[float, tuple[float, int]] = {}
+    for i, (volume, tpo) in enumerate(zip(profile.volume, profile.tpo, strict=True)):
+        if tpo == 0:
+            continue
+        grosso = round(ceil((profile.base + i) / fator) * block, 8)
+        soma_volume, soma_tpo = niveis.get(grosso, (0.0, 0))
+        niveis[grosso] = (soma_volume + float(volume), soma_tpo + int(tpo))
+    return niveis
+
+
+@pytest.mark.parametrize("by", ["tpo", "tick", "volume"])
+@pytest.mark.parametrize("fator", [1, 2, 3, 4, 7, 10])
+def test_reagrupar_igual_a_referencia(by, fator):
+    rates = gerar_rates(1500, seed=fator)
+    fino = calcular_profile(rates, block=5.0, by=by)["profile"]
+    grosso = fino.reagrupar(fator)
+    esperado = _reagrupar_referencia(fino, fator)
+
+    assert grosso.block == fino.block * fator
+    volumes = dict(grosso.items())
+    tpos = dict(grosso.tpos.items())
+    assert sorted(volumes) == sorted(esperado)
+    for preco, (volume, tpo) in esperado.items():
+        assert volumes[preco] == pytest.approx(volume)
+        assert tpos[preco] == tpo
+    assert grosso.total_volume == pytest.approx(fino.total_volume)
+    assert grosso.total_tpo == fino.total_tpo
+
+
+@pytest.mark.parametrize("by", ["tick", "volume"])
+@pytest.mark.parametrize("fator", [2, 5, 10])
+def test_volume_igual_ao_binning_direto(by, fator):
+    rates = gerar_rates(1500, seed=11)
+    # Candles sem range em uma fronteira grossa são divididos pelo binning
+    # direto e não pelo reagrupamento (ver `Profile.reagrupar`)
+    rates = rates[rates["high"] > rates["low"]]
+
+    grosso = calcular_profile(rates, block=5.0, by=by)["profile"].reagrupar(fator)
+    direto = calcular_profile(rates, block=5.0 * fator, by=by)["profile"]
+
+    com_volume = {p: v for p, v in direto.items() if v > 0}
+    reagrupado = {p: v for p, v in grosso.items() if v > 0}
+    assert sorted(reagrupado) == sorted(com_volume)
+    for preco, volume in com_volume.items():
+        assert reagrupado[preco] == pytest.approx(volume)
+
+
+def test_reagrupar_profile_vazio_e_fator_invalido():
+    vazio = Profile.vazio(5.0).reagrupar(4)
+    assert vazio.block == 20.0
+    assert len(vazio) == 0
+    with pytest.raises(ValueError):
+        Profile.vazio(5.0).reagrupar(0)
+
+
+def test_blocos_com_um_binning_iguais_ao_histograma_da_referencia():
+    rates = gerar_rates(1500, seed=3)
+    resultados = calcular_profiles_blocos(rates, [5.0, 25.0, 50.0], by="volume")
+    fino = resultados[0]["profile"]
+
+    for resultado, fator in zip(resultados[1:], [5, 10], strict=True):
+        esperado = _reagrupar_referencia(fino, fator)
+        grade = np.array(sorted(esperado, reverse=True))
+        volumes = np.array([esperado[p][0] for p in grade])
+        assert resultado["block"] == 5.0 * fator
+        assert resultado["poc"] == grade[np.argmax(volumes)]
+        np.testing.assert_allclose(list(resultado["profile"].values()), volumes)
@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+
+from mtcli_market.model import calcular_profile
+from mtcli_market.publisher import ProfilePublisher, ProfileReader
+from mtcli_market.synthetic import gerar_rates
+
+
+def _resultado(n: int, seed: int, block: float = 25.0) -> dict:
+    return calcular_profile(gerar_rates(n, seed=seed), block=block, by="tpo")
+
+
+def _conferir(instantaneo: dict, resultado: dict) -> None:
+    profile = resultado["profile"]
+    np.testing.assert_array_equal(instantaneo["precos"], profile.precos)
+    np.testing.assert_array_equal(instantaneo["volume"], profile.volume)
+    np.testing.assert_array_equal(instantaneo["tpo"], profile.tpo)
+    for campo in ("poc", "vah", "val"):
+        assert instantaneo[campo] == resultado[campo]
+
+
+def test_reinicio_do_publicador_com_leitor_aberto(tmp_path):
+    caminho = str(tmp_path / "WIN.mmap")
+    primeiro = _resultado(300, seed=1)
+    segundo = _resultado(300, seed=2)
+
+    publicador = ProfilePublisher(caminho, capacidade=1024)
+    seq = publicador.publicar(primeiro, "WIN$N")
+    leitor = ProfileReader(caminho)
+    _conferir(leitor.ler(), primeiro)
+    instantaneo = leitor.ler(copiar=False)
+    publicador.fechar()
+
+    # Reinício: o mesmo arquivo é reaproveitado, sem substituí-lo
+    inode = os.stat(caminho).st_ino
+    publicador = ProfilePublisher(caminho, capacidade=1024)
+    assert os.stat(caminho).st_ino == inode
+    assert os.listdir(tmp_path) == ["WIN.mmap"]
+    assert not leitor.valido(instantaneo)
+    vazio = leitor.ler()
+    assert vazio["seq"] > seq and vazio["poc"] is None and len(vazio["precos"]) == 0
+
+    assert publicador.publicar(segundo, "WIN$N") > vazio["seq"]
+    _conferir(leitor.ler(), segundo)
+    publicador.fechar()
+    leitor.fechar()
+
+
+def test_leitores_seguem_a_geracao_maior(tmp_path):
+    caminho = str(tmp_path / "WIN.mmap")
+    pequeno = _resultado(100, seed=3)
+    grande = _resultado(2000, seed=4, block=5.0)
+    maior = _resultado(4000, seed=5, block=1.0)
+    assert len(pequeno["profile"].volume) < 64 < len(grande["profile"].volume)
+
+    publicador = ProfilePublisher(caminho, capacidade=64)
+    publicador.publicar(pequeno, "WIN$N")
+    leitor = ProfileReader(caminho)
+    _conferir(leitor.ler(), pequeno)
+
+    # Não cabe: nova geração, indicada no arquivo anterior e no caminho
+    publicador.publicar(grande, "WIN$N")
+    _conferir(leitor.ler(), grande)
+    with ProfileReader(caminho) as novo:
+        _conferir(novo.ler(), grande)
+
+    # Outra geração: a anterior é removida
+    publicador.publicar(maior, "WIN$N")
+    _conferir(leitor.ler(), maior)
+    assert sorted(os.listdir(tmp_path)) == ["WIN.mmap", "WIN.mmap.2"]
+
+    # Reinício: continua na geração atual, com o leitor aberto
+    publicador.fechar()
+    publicador = ProfilePublisher(caminho, capacidade=64)
+    assert publicador.geracao == 2
+    publicador.publicar(pequeno, "WIN$N")
+    _conferir(leitor.ler(), pequeno)
+    publicador.fechar()
+    leitor.fechar()
@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+from mtcli_market import model
+from mtcli_market.datasource import (
+    TIMEFRAMES,
+    ReplayDataSource,
+    definir_fonte,
+    gravar_replay,
+)
+from mtcli_market.model import obter_rates
+from mtcli_market.resample import reamostrar, reamostrar_blocos
+from mtcli_market.synthetic import gerar_rates
+
+
+def _reamostrar_referencia(rates, segundos: int) -> list[tuple]:
+    """Agrupamento candle a candle por início do período customizado."""
+    grupos: dict[int, list] = {}
+    for r in rates:
+        t = int(r["time"])
+        if segundos < 86400:
+            dia = t // 86400 * 86400
+            inicio = dia + (t - dia) // segundos * segundos
+        else:
+            inicio = t // segundos * segundos
+        grupos.setdefault(inicio, []).append(r)
+
+    return [
+        (
+            inicio,
+            float(g[0]["open"]),
+            max(float(r["high"]) for r in g),
+            min(float(r["low"]) for r in g),
+            float(g[-1]["close"]),
+            sum(int(r["tick_volume"]) for r in g),
+            sum(int(r["real_volume"]) for r in g),
+        )
+        for inicio, g in grupos.items()
+    ]
+
+
+def _tuplas(rates) -> list[tuple]:
+    campos = ("time", "open", "high", "low", "close", "tick_volume", "real_volume")
+    return [tuple(r[c].item() for c in campos) for r in rates]
+
+
+@pytest.fixture
+def rates():
+    rates = gerar_rates(3000, seed=8)
+    # Lacuna no meio do pregão: períodos sem nenhum candle nativo
+    return np.concatenate((rates[:400], rates[520:]))
+
+
+@pytest.mark.parametrize("segundos", [2 * 60, 7 * 60, 45 * 60, 50 * 60, 3 * 86400])
+def test_reamostrar_igual_ao_agrupamento(rates, segundos):
+    esperado = _reamostrar_referencia(rates, segundos)
+    assert _tuplas(reamostrar(rates, segundos)) == esperado
+
+    # Blocos vazios no início e no fim, como em um intervalo sem candles
+    blocos = [rates[:0], *(rates[i : i + 700] for i in range(0, len(rates), 700))]
+    blocos.append(rates[:0])
+    juntos = np.concatenate(list(reamostrar_blocos(blocos, segundos)))
+    assert _tuplas(juntos) == esperado
+
+
+def test_ultimo_periodo_do_dia_termina_a_meia_noite():
+    # 50m não divide o dia: o último período começa às 23:20 e tem 40 min
+    dia = 1735689600
+    tempos = dia + np.array([23 * 3600 + 19 * 60, 23 * 3600 + 59 * 60, 86400])
+    rates = gerar_rates(3, seed=1)
+    rates["time"] = tempos
+
+    saida = reamostrar(rates, 50 * 60)
+    np.testing.assert_array_equal(
+        saida["time"],
+        [dia + 22 * 3600 + 30 * 60, dia + 23 * 3600 + 20 * 60, dia + 86400],
+    )
+    # Nenhum período vazio é gerado entre os candles
+    assert len(reamostrar(rates[[0, 2]], 50 * 60)) == 2
+    assert len(reamostrar(rates[:0], 50 * 60)) == 0
+    assert list(reamostrar_blocos([rates[:0]], 50 * 60)) == []
+
+
+class FonteContada(ReplayDataSource):
+    """Replay que conta as consultas de cada tipo."""
+
+    def __init__(self, diretorio: str) -> None:
+        super().__init__(diretorio)
+        self.ultimos = 0
+        self.intervalos = 0
+
+    def copy_rates_from_pos(self, symbol, timeframe, inicio, quantidade):
+        self.ultimos += 1
+        return super().copy_rates_from_pos(symbol, timeframe, inicio, quantidade)
+
+    def copy_rates_range(self, symbol, timeframe, de, ate):
+        self.intervalos += 1
+        return super().copy_rates_range(symbol, timeframe, de, ate)
+
+
+def test_serie_base_compartilhada_entre_periodos(tmp_path, monkeypatch):
+    base = gerar_rates(3000, timeframe_segundos=15 * 60, seed=3)
+    gravar_replay(str(tmp_path), "WIN$N", base, TIMEFRAMES["M15"])
+    fonte = FonteContada(str(tmp_path))
+    definir_fonte(fonte)
+    monkeypatch.setattr(model, "_series_base", {})
+    try:
+        r45 = obter_rates("WIN$N", "45m", 200)
+        r75 = obter_rates("WIN$N", "75m", 100)
+        de_novo = obter_rates("WIN$N", "45m", 200)
+    finally:
+        definir_fonte(None)
+
+    # Só a primeira consulta busca a série inteira; as demais, o último candle
+    assert fonte.ultimos == 1
+    assert fonte.intervalos == 2
+    assert _tuplas(r45) == _reamostrar_referencia(base, 45 * 60)[-200:]
+    assert _tuplas(r75) == _reamostrar_referencia(base, 75 * 60)[-100:]
+    assert _tuplas(de_novo) == _tuplas(r45)
@@ -0,0 +1,208 @@
+import json
+import socket
+import socketserver
+import threading
+import time
+
+from click.testing import CliRunner
+import pytest
+
+from mtcli_market.cli import profile
+from mtcli_market.controller import obter_profile, obter_profiles
+from mtcli_market.datasource import (
+    TIMEFRAMES,
+    ReplayDataSource,
+    definir_fonte,
+    gravar_replay,
+)
+from mtcli_market.server import (
+    HOST,
+    PROTOCOLO,
+    ProfileServer,
+    consultar,
+    descrever_fonte,
+)
+from mtcli_market.synthetic import gerar_rates
+from mtcli_market.view import renderizar_profiles
+
+PARAMETROS = {"period": "M1", "limit": 400, "block": 5.0, "by": "volume"}
+
+
+@pytest.fixture
+def replay_dir(tmp_path):
+    for symbol, seed in (("WIN$N", 1), ("WDO$N", 2)):
+        gravar_replay(
+            str(tmp_path), symbol, gerar_rates(800, seed=seed), TIMEFRAMES["M1"]
+        )
+    definir_fonte(ReplayDataSource(str(tmp_path)))
+    yield str(tmp_path)
+    definir_fonte(None)
+
+
+@pytest.fixture
+def iniciar():
+    """Inicia servidores em threads e os encerra ao final do teste."""
+    servidores = []
+
+    def iniciar(servidor: socketserver.BaseServer):
+        threading.Thread(
+            target=servidor.serve_forever, args=(0.05,), daemon=True
+        ).start()
+        servidores.append(servidor)
+        return servidor.server_address[1]
+
+    yield iniciar
+    for servidor in servidores:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+def _pedido(fonte: str, symbols: list[str], **parametros) -> dict:
+    return {
+        "fonte": fonte,
+        "symbols": symbols,
+        "parametros": {**PARAMETROS, **parametros},
+        "formato": "json",
+        "verbose": False,
+    }
+
+
+def _porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind((HOST, 0))
+        return s.getsockname()[1]
+
+
+def _aguardar(condicao, limite: float = 5.0) -> None:
+    fim = time.monotonic() + limite
+    while not condicao():
+        assert time.monotonic() < fim, "tempo esgotado"
+        time.sleep(0.005)
+
+
+@pytest.mark.parametrize("symbols", [["WIN$N"], ["WIN$N", "WDO$N"]])
+def test_saida_igual_ao_calculo_local(replay_dir, iniciar, symbols):
+    fonte = descrever_fonte("replay", replay_dir)
+    porta = iniciar(ProfileServer(0, fonte))
+
+    if len(symbols) == 1:
+        itens = [(symbols[0], obter_profile(symbols[0], **PARAMETROS))]
+    else:
+        itens = list(obter_profiles(symbols, workers=1, **PARAMETROS).items())
+    esperada = renderizar_profiles(itens, "json")
+
+    assert consultar(_pedido(fonte, symbols), porta) == esperada
+
+
+def test_pedidos_identicos_compartilham_o_calculo(iniciar):
+    liberar = threading.Event()
+    chamadas = []
+
+    def calcular(pedido):
+        chamadas.append(pedido["parametros"]["limit"])
+        liberar.wait(5)
+        return f"limit {pedido['parametros']['limit']}\n"
+
+    servidor = ProfileServer(0, "mt5", max_pendentes=2, calcular=calcular)
+    porta = iniciar(servidor)
+
+    respostas: dict[int, str | None] = {}
+
+    def cliente(i: int, limit: int) -> None:
+        respostas[i] = consultar(_pedido("mt5", ["WIN$N"], limit=limit), porta)
+
+    threads = [
+        threading.Thread(target=cliente, args=(i, 100 if i < 5 else 200))
+        for i in range(6)
+    ]
+    for t in threads:
+        t.start()
+    _aguardar(lambda: servidor.compartilhados == 4 and len(servidor._em_andamento) == 2)
+
+    # Fila cheia: um terceiro cálculo distinto é recusado e o cliente recebe
+    # None (calcula por conta própria)
+    assert consultar(_pedido("mt5", ["WIN$N"], limit=300), porta) is None
+
+    liberar.set()
+    for t in threads:
+        t.join(5)
+
+    assert sorted(chamadas) == [100, 200]
+    assert [respostas[i] for i in range(6)] == ["limit 100\n"] * 5 + ["limit 200\n"]
+    assert servidor.atendidos == 6
+    assert servidor._em_andamento == {}
+
+
+def test_pedido_de_outra_fonte_ou_protocolo_recusado(iniciar):
+    servidor = ProfileServer(0, "mt5", calcular=lambda pedido: "saida\n")
+    porta = iniciar(servidor)
+
+    assert consultar(_pedido("mt5", ["WIN$N"]), porta) == "saida\n"
+    assert consultar(_pedido("replay:/tmp", ["WIN$N"]), porta) is None
+    assert "erro" in servidor.responder(_pedido("mt5", ["WIN$N"]))
+    assert "erro" in servidor.responder(
+        {**_pedido("mt5", ["WIN$N"]), "protocolo": "outro/1"}
+    )
+    assert servidor.atendidos == 1
+
+
+class _OutroPrograma(socketserver.StreamRequestHandler):
+    """Responde a qualquer linha com uma saída, com ou sem o protocolo."""
+
+    def handle(self) -> None:
+        self.rfile.readline()
+        resposta = {"saida": "de outro programa\n"}
+        if self.server.protocolo:
+            resposta["protocolo"] = self.server.protocolo
+        self.wfile.write(json.dumps(resposta).encode() + b"\n")
+
+
+@pytest.mark.parametrize(
+    "protocolo, esperada",
+    [(None, None), ("outro/1", None), (PROTOCOLO, "de outro programa\n")],
+)
+def test_resposta_sem_protocolo_descartada(iniciar, protocolo, esperada):
+    servidor = socketserver.ThreadingTCPServer((HOST, 0), _OutroPrograma)
+    servidor.protocolo = protocolo
+    porta = iniciar(servidor)
+    assert consultar(_pedido("mt5", ["WIN$N"]), porta) == esperada
+
+
+def test_cli_calcula_localmente_sem_servidor(replay_dir, iniciar):
+    argumentos = [
+        "--symbol",
+        "WIN$N",
+        "--period",
+        "M1",
+        "--limit",
+        "400",
+        "--block",
+        "5",
+        "--by",
+        "volume",
+        "--format",
+        "json",
+        "--backend",
+        "replay",
+        "--replay-dir",
+        replay_dir,
+    ]
+    runner = CliRunner()
+    local = runner.invoke(profile, [*argumentos, "--sem-servidor"])
+    assert local.exit_code == 0, local.output
+
+    # Nenhum servidor na porta: cai no cálculo local com a mesma saída
+    porta = _porta_livre()
+    sem_servidor = runner.invoke(
+        profile, [*argumentos, "--servidor", "--porta", str(porta)]
+    )
+    assert sem_servidor.output == local.output
+
+    # Com o servidor em execução, a saída vem dele e é a mesma
+    servidor = ProfileServer(0, descrever_fonte("replay", replay_dir))
+    porta = iniciar(servidor)
+    com_servidor = runner.invoke(
+        profile, [*argumentos, "--servidor", "--porta", str(porta)]
+    )
+    assert com_servidor.output == local.output
+    assert servidor.atendidos == 1
@@ -0,0 +1,64 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from mtcli_market.model import calcular_profile
+from mtcli_market.sessions import inicio_sessao, profiles_por_sessao, separar_sessoes
+from mtcli_market.synthetic import gerar_rates
+
+#: Pregão que começa às 01:00 local (UTC-3), atravessando a meia-noite
+MERCADO = (1, 0, -3)
+
+#: Candles de 1 minuto por sessão (22 horas de pregão)
+POR_SESSAO = 22 * 60
+
+DIA = 1735689600  # 2025-01-01 00:00
+
+
+def _rates_com_sessoes(inicio: int, sessoes: int = 3) -> np.ndarray:
+    rates = gerar_rates(sessoes * POR_SESSAO, seed=2)
+    k, minuto = np.divmod(np.arange(len(rates)), POR_SESSAO)
+    rates["time"] = DIA + inicio + k * 86400 + minuto * 60
+    return rates
+
+
+def _assert_mesmo_profile(profile, esperado) -> None:
+    """Compara volume e TPO dos níveis tocados."""
+    tpos = {p: t for p, t in profile.tpos.items() if t}
+    assert tpos == {p: t for p, t in esperado.tpos.items() if t}
+    assert [profile[p] for p in tpos] == pytest.approx([esperado[p] for p in tpos])
+
+
+def test_sessao_que_atravessa_a_meia_noite():
+    inicio = inicio_sessao(*MERCADO, referencia=DIA)
+    rates = _rates_com_sessoes(inicio)
+
+    aberturas, inicios = separar_sessoes(rates["time"], inicio)
+    np.testing.assert_array_equal(aberturas, DIA + inicio + np.arange(3) * 86400)
+    np.testing.assert_array_equal(inicios, np.arange(3) * POR_SESSAO)
+
+    # Cortar à meia-noite dividiria as sessões que passam de 00:00
+    if inicio + POR_SESSAO * 60 > 86400:
+        assert len(separar_sessoes(rates["time"])[0]) > 3
+
+
+@pytest.mark.parametrize("by", ["tpo", "tick", "volume"])
+def test_composto_igual_a_soma_das_sessoes(by):
+    inicio = inicio_sessao(*MERCADO, referencia=DIA)
+    rates = _rates_com_sessoes(inicio)
+    por_sessao = profiles_por_sessao(rates, 25.0, by, inicio)
+
+    assert len(por_sessao) == 3
+    for i in range(3):
+        sessao = rates[i * POR_SESSAO : (i + 1) * POR_SESSAO]
+        esperado = calcular_profile(sessao, block=25.0, by=by)["profile"]
+        _assert_mesmo_profile(por_sessao.sessao(i), esperado)
+        # Data da sessão: a do último candle
+        assert (
+            por_sessao.data(i)
+            == datetime.datetime.utcfromtimestamp(int(sessao["time"][-1])).date()
+        )
+
+    esperado = calcular_profile(rates, block=25.0, by=by)["profile"]
+    _assert_mesmo_profile(por_sessao.composto(), esperado)
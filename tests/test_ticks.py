@@ -0,0 +1,133 @@
+from decimal import ROUND_CEILING, Decimal
+
+import numpy as np
+import pytest
+
+from mtcli_market.ticks import acumular_ticks, binning_ticks
+
+TICKS_DTYPE = np.dtype(
+    [
+        ("time", "<i8"),
+        ("bid", "<f8"),
+        ("ask", "<f8"),
+        ("last", "<f8"),
+        ("volume", "<u8"),
+        ("time_msc", "<i8"),
+        ("flags", "<u4"),
+        ("volume_real", "<f8"),
+    ]
+)
+
+
+def _gerar_ticks(n: int, block: float, seed: int = 0) -> np.ndarray:
+    """
+    Ticks com preços em múltiplos de um quarto do bloco, de modo que boa
+    parte cai exatamente na fronteira entre dois blocos. Parte dos ticks
+    não tem `last` (só `bid`) e parte não tem `volume_real`.
+    """
+    rng = np.random.default_rng(seed)
+    passo = block / 4
+    niveis = 4000 + np.cumsum(rng.integers(-3, 4, n))
+    precos = np.round(niveis * passo, 6)
+
+    ticks = np.zeros(n, dtype=TICKS_DTYPE)
+    ticks["time"] = 1735736400 + np.arange(n)
+    ticks["time_msc"] = ticks["time"] * 1000
+    ticks["bid"] = precos
+    ticks["ask"] = np.round(precos + passo, 6)
+    ticks["last"] = np.where(rng.random(n) < 0.8, precos, 0.0)
+    ticks["volume"] = rng.integers(1, 20, n)
+    ticks["volume_real"] = np.where(
+        rng.random(n) < 0.5, ticks["volume"] * rng.integers(1, 5, n), 0.0
+    )
+    # Ticks sem preço algum são descartados
+    sem_preco = rng.random(n) < 0.02
+    ticks["last"][sem_preco] = 0.0
+    ticks["bid"][sem_preco] = 0.0
+    return ticks
+
+
+def _binning_referencia(ticks, block: float, by: str) -> dict[int, list[float]]:
+    """
+    Bloco e peso de cada tick, um a um e em aritmética decimal: o bloco p
+    cobre (p - block, p], ou seja, o índice é o teto de preço / block.
+    """
+    tamanho = Decimal(repr(block))
+    blocos: dict[int, list[float]] = {}
+    for t in ticks:
+        preco = float(t["last"]) if t["last"] > 0 else float(t["bid"])
+        if preco <= 0:
+            continue
+        indice = int(
+            (Decimal(repr(preco)) / tamanho).to_integral_value(rounding=ROUND_CEILING)
+        )
+        if by == "tick":
+            peso = 1.0
+        elif t["volume_real"] > 0:
+            peso = float(t["volume_real"])
+        else:
+            peso = float(t["volume"])
+        blocos.setdefault(indice, []).append(peso)
+    return blocos
+
+
+@pytest.mark.parametrize("block", [0.5, 5.0, 0.1, 0.01, 0.2, 0.25])
+@pytest.mark.parametrize("by", ["tick", "volume"])
+def test_binning_igual_a_referencia(block, by):
+    ticks = _gerar_ticks(3000, block, seed=int(block * 100))
+    indice, peso = binning_ticks(ticks, block, by)
+    esperado = _binning_referencia(ticks, block, by)
+
+    validos = np.where(ticks["last"] > 0, ticks["last"], ticks["bid"]) > 0
+    assert len(indice) == validos.sum()
+    assert sorted(set(indice.tolist())) == sorted(esperado)
+    for bloco, pesos in esperado.items():
+        assert peso[indice == bloco].tolist() == pesos
+
+
+@pytest.mark.parametrize(
+    "preco, block, esperado",
+    [
+        # Fronteiras exatas ficam no bloco de baixo (p - block, p]
+        (5000.0, 5.0, 1000),
+        (5000.5, 0.5, 10001),
+        # Preço / block dá um pouco acima do inteiro em ponto flutuante
+        (0.07, 0.01, 7),
+        (1.11, 0.01, 111),
+        (2.24, 0.01, 224),
+        (0.3, 0.1, 3),
+        # Logo acima da fronteira vai para o bloco seguinte
+        (5000.01, 5.0, 1001),
+        (0.30000001, 0.1, 4),
+    ],
+)
+def test_fronteira_do_bloco(preco, block, esperado):
+    ticks = np.zeros(1, dtype=TICKS_DTYPE)
+    ticks["last"] = preco
+    ticks["volume"] = 1
+    indice, _ = binning_ticks(ticks, block)
+    assert indice.tolist() == [esperado]
+
+
+def test_acumulador_em_janelas_igual_a_referencia():
+    block = 0.5
+    ticks = _gerar_ticks(5000, block, seed=3)
+    acumulador = acumular_ticks(
+        (ticks[i : i + 700] for i in range(0, len(ticks), 700)), block, "volume"
+    )
+    esperado = _binning_referencia(ticks, block, "volume")
+
+    profile = acumulador.profile
+    volumes = dict(profile.items())
+    tpos = dict(profile.tpos.items())
+    assert sorted(volumes) == sorted(round(b * block, 8) for b in esperado)
+    for bloco, pesos in esperado.items():
+        preco = round(bloco * block, 8)
+        assert volumes[preco] == pytest.approx(sum(pesos))
+        assert tpos[preco] == len(pesos)
+    assert acumulador.rates_count == len(ticks)
+
+
+def test_by_invalido():
+    with pytest.raises(ValueError):
+        binning_ticks(np.zeros(1, dtype=TICKS_DTYPE), 5.0, "tpo")
@@ -0,0 +1,40 @@
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+import pytest
+
+from mtcli_market import timings
+
+
+@pytest.fixture(autouse=True)
+def instrumentacao():
+    timings.ativar()
+    yield
+    timings.ativar(False)
+
+
+def _medir(indice: int, repeticoes: int) -> None:
+    for _ in range(repeticoes):
+        with timings.etapa(f"t{indice}"):
+            time.sleep(0)  # cede a vez às outras threads
+            with timings.etapa("interna"):
+                time.sleep(0)
+                timings.contar(linhas=1)
+            timings.contar(blocos=indice + 1)
+
+
+def test_etapas_em_varias_threads():
+    threads, repeticoes = 8, 200
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(_medir, range(threads), [repeticoes] * threads))
+
+    totais = {t["etapa"]: t for t in timings.resumo()}
+    assert len(timings.registros()) == 2 * threads * repeticoes
+    # Cada contador foi somado na etapa da própria thread
+    assert totais["interna"]["chamadas"] == threads * repeticoes
+    assert totais["interna"]["linhas"] == threads * repeticoes
+    assert "blocos" not in totais["interna"]
+    for i in range(threads):
+        assert totais[f"t{i}"]["chamadas"] == repeticoes
+        assert totais[f"t{i}"]["blocos"] == (i + 1) * repeticoes
+        assert "linhas" not in totais[f"t{i}"]
@@ -0,0 +1,87 @@
+from math import ceil, floor
+
+import pytest
+
+from mtcli_market.model import _janela_ib
+from mtcli_market.synthetic import gerar_rates
+from mtcli_market.tpo_letters import calcular_letras, letra
+
+
+def _letras_referencia(rates, block: float, periodo_minutos: int, ib_minutes: int):
+    """
+    Letras calculadas candle a candle: período pelo horário de cada candle
+    e blocos pelo laço de preços, como no profile original.
+    """
+    inicio, _ = _janela_ib(int(rates["time"][-1]), ib_minutes, 9, 0, 0)
+    periodos: dict[float, set[int]] = {}
+    for r in rates:
+        if r["time"] < inicio:
+            continue
+        p = (int(r["time"]) - inicio) // (periodo_minutos * 60)
+        low, high = float(r["low"]), float(r["high"])
+        b = ceil(high / block) * block
+        while b >= floor(low / block) * block:
+            periodos.setdefault(round(b, 8), set()).add(p)
+            b -= block
+
+    precos = sorted(periodos, reverse=True)
+    contagem = {preco: len(periodos[preco]) for preco in precos}
+    n_periodos = max(max(s) for s in periodos.values()) + 1
+    n_ib = min(max(1, ceil(ib_minutes / periodo_minutos)), n_periodos)
+
+    no_ib = [preco for preco in precos if min(periodos[preco]) < n_ib]
+    ib_high, ib_low = max(no_ib), min(no_ib)
+    extensoes = []
+    for p in range(n_ib, n_periodos):
+        direcoes = []
+        if any(p in periodos[preco] for preco in precos if preco > ib_high):
+            direcoes.append("acima")
+        if any(p in periodos[preco] for preco in precos if preco < ib_low):
+            direcoes.append("abaixo")
+        if direcoes:
+            extensoes.append({"letra": letra(p), "direcao": " e ".join(direcoes)})
+
+    return {
+        "niveis": [
+            (preco, "".join(letra(p) for p in sorted(periodos[preco])))
+            for preco in precos
+        ],
+        "poc": max(precos, key=lambda preco: (contagem[preco], preco)),
+        "single_prints": [preco for preco in precos if contagem[preco] == 1],
+        "ib": {"high": ib_high, "low": ib_low},
+        "ib_letras": "".join(letra(p) for p in range(n_ib)),
+        "extensoes": extensoes,
+    }
+
+
+def test_letra():
+    assert [letra(p) for p in (0, 25, 26, 51, 52, 53)] == [
+        "A",
+        "Z",
+        "a",
+        "z",
+        "A1",
+        "B1",
+    ]
+
+
+@pytest.mark.parametrize(
+    "periodo_minutos, ib_minutes", [(30, 30), (30, 60), (15, 60), (5, 45)]
+)
+def test_letras_iguais_ao_calculo_por_candle(periodo_minutos, ib_minutes):
+    # O último pregão vai até 11:20; o pré-mercado (08:00-09:00) e os
+    # pregões anteriores ficam fora dos períodos
+    rates = gerar_rates(2 * 630 + 200, pregao=(8 * 3600, 18 * 3600 + 30 * 60), seed=6)
+    resultado = calcular_letras(
+        rates,
+        25.0,
+        periodo_minutos,
+        ib_minutes,
+        market_start_hour=9,
+        market_start_minute=0,
+        market_timezone_offset=0,
+    )
+    esperado = _letras_referencia(rates, 25.0, periodo_minutos, ib_minutes)
+
+    for campo, valor in esperado.items():
+        assert resultado[campo] == valor, campo
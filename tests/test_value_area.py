@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from mtcli_market.value_area import _expansao
+
+
+def _expansao_referencia(volume, poc: int, alvo: float) -> tuple[int, int]:
+    """Expansão passo a passo, comparando os dois níveis de cada lado."""
+    n = len(volume)
+    lo = hi = poc
+    soma = volume[poc]
+    while soma < alvo and (lo > 0 or hi < n - 1):
+        acima = sum(volume[hi + 1 : min(hi + 2, n - 1) + 1])
+        abaixo = sum(volume[max(lo - 2, 0) : lo])
+        if hi < n - 1 and (lo == 0 or acima >= abaixo):
+            hi = min(hi + 2, n - 1)
+            soma += acima
+        else:
+            lo = max(lo - 2, 0)
+            soma += abaixo
+    return lo, hi
+
+
+@pytest.mark.parametrize("inteiros", [True, False])
+def test_expansao_vetorizada_igual_ao_laco(inteiros):
+    rng = np.random.default_rng(3)
+    for _ in range(2000):
+        n = int(rng.integers(1, 40))
+        if inteiros:
+            # TPO: muitos empates entre os pares
+            volume = rng.integers(0, 4, n).astype(float)
+        else:
+            volume = rng.random(n) * rng.integers(0, 2, n)
+        poc = int(rng.integers(0, n))
+        alvos = sorted(rng.random(3) * volume.sum() * 1.05)
+
+        esperado = [_expansao_referencia(volume.tolist(), poc, a) for a in alvos]
+        assert _expansao(volume, poc, alvos) == esperado
@@ -0,0 +1,156 @@
+import csv
+import io
+import json
+
+import pytest
+
+from mtcli_market import view
+from mtcli_market.controller import obter_profile
+from mtcli_market.datasource import (
+    TIMEFRAMES,
+    ReplayDataSource,
+    definir_fonte,
+    gravar_replay,
+)
+from mtcli_market.synthetic import gerar_rates
+from mtcli_market.view import _format_num, exibir_profile, renderizar_profiles
+
+
+@pytest.fixture
+def resultados(tmp_path):
+    for symbol, seed in (("WIN$N", 1), ("WDO$N", 2)):
+        gravar_replay(
+            str(tmp_path), symbol, gerar_rates(800, seed=seed), TIMEFRAMES["M1"]
+        )
+    definir_fonte(ReplayDataSource(str(tmp_path)))
+    yield [
+        (symbol, obter_profile(symbol, "M1", 500, 5, "volume", va_percents=(0.5, 0.9)))
+        for symbol in ("WIN$N", "WDO$N")
+    ]
+    definir_fonte(None)
+
+
+@pytest.fixture
+def escritas(monkeypatch):
+    escritas: list[str] = []
+    monkeypatch.setattr(
+        view.click, "echo", lambda texto="", nl=True: escritas.append(texto)
+    )
+    return escritas
+
+
+def _texto_referencia(resultado, symbol) -> str:
+    """Modo simples linha a linha, como na exibição original com um echo por linha."""
+    d = view.DIGITOS
+    linhas = ["", "-" * 60]
+    linhas.append(
+        f"Market Profile para {symbol} — by {resultado['by']} — bloco {resultado['block']}"
+    )
+    linhas += ["-" * 60, "", "DISTRIBUICAO:"]
+    for preco, volume in resultado["profile"].items():
+        linhas.append(f"{_format_num(preco, d)} {_format_num(volume, d)}")
+    linhas.append(f"POC {_format_num(resultado['poc'], d)}")
+    linhas.append(
+        f"VA {_format_num(resultado['vah'], d)}:{_format_num(resultado['val'], d)}"
+    )
+    for va in resultado["value_areas"]:
+        linhas.append(
+            f"VA{va['percent']:.0%} {_format_num(va['vah'], d)}:{_format_num(va['val'], d)}"
+        )
+    if resultado["hvn"]:
+        linhas.append(f"HVNs {', '.join(_format_num(p, d) for p in resultado['hvn'])}")
+    if resultado["lvn"]:
+        linhas.append(f"LVNs {', '.join(_format_num(p, d) for p in resultado['lvn'])}")
+    ib = resultado["ib"]
+    if ib:
+        linhas.append(f"IB {_format_num(ib['high'], d)}:{_format_num(ib['low'], d)}")
+    linhas.append("")
+    return "".join(linha + "\n" for linha in linhas)
+
+
+def _campos_referencia(resultado, symbol) -> dict:
+    return {
+        "symbol": symbol,
+        "by": resultado["by"],
+        "block": float(resultado["block"]),
+        "precos": [float(p) for p in resultado["profile"]],
+        "volume": [float(v) for v in resultado["profile"].values()],
+        "tpo": [int(t) for t in resultado["tpo"].values()],
+        "poc": float(resultado["poc"]),
+        "vah": float(resultado["vah"]),
+        "val": float(resultado["val"]),
+        "hvn": [float(p) for p in resultado["hvn"]],
+        "lvn": [float(p) for p in resultado["lvn"]],
+    }
+
+
+def test_texto_igual_a_referencia_em_uma_escrita(resultados, escritas):
+    symbol, resultado = resultados[0]
+    exibir_profile(resultado, symbol)
+    assert escritas == [_texto_referencia(resultado, symbol)]
+
+
+def test_json_igual_ao_resultado(resultados):
+    symbol, resultado = resultados[0]
+    dados = json.loads(renderizar_profiles(resultados[:1], "json"))
+    for campo, valor in _campos_referencia(resultado, symbol).items():
+        assert dados[campo] == valor, campo
+    assert dados["value_areas"] == [
+        {k: float(v) for k, v in va.items()} for va in resultado["value_areas"]
+    ]
+
+    # Vários profiles: uma lista, na ordem recebida
+    lista = json.loads(renderizar_profiles(resultados, "json"))
+    assert [d["symbol"] for d in lista] == ["WIN$N", "WDO$N"]
+
+
+def test_ndjson_um_objeto_por_linha(resultados):
+    linhas = renderizar_profiles(resultados, "ndjson").splitlines()
+    assert len(linhas) == len(resultados)
+    for linha, (symbol, resultado) in zip(linhas, resultados, strict=True):
+        dados = json.loads(linha)
+        for campo, valor in _campos_referencia(resultado, symbol).items():
+            assert dados[campo] == valor, campo
+
+
+def test_csv_uma_linha_por_nivel(resultados):
+    leitor = csv.DictReader(io.StringIO(renderizar_profiles(resultados, "csv")))
+    linhas = list(leitor)
+
+    esperadas = []
+    for symbol, resultado in resultados:
+        hvn, lvn = set(resultado["hvn"]), set(resultado["lvn"])
+        for preco, volume in resultado["profile"].items():
+            esperadas.append(
+                {
+                    "symbol": symbol,
+                    "preco": float(preco),
+                    "volume": float(volume),
+                    "tpo": int(resultado["tpo"][preco]),
+                    "poc": int(preco == resultado["poc"]),
+                    "va": int(resultado["val"] <= preco <= resultado["vah"]),
+                    "hvn": int(preco in hvn),
+                    "lvn": int(preco in lvn),
+                }
+            )
+
+    obtidas = [
+        {
+            "symbol": linha["symbol"],
+            "preco": float(linha["preco"]),
+            "volume": float(linha["volume"]),
+            "tpo": int(linha["tpo"]),
+            "poc": int(linha["poc"]),
+            "va": int(linha["va"]),
+            "hvn": int(linha["hvn"]),
+            "lvn": int(linha["lvn"]),
+        }
+        for linha in linhas
+    ]
+    assert obtidas == esperadas
+    assert sum(linha["poc"] for linha in obtidas) == len(resultados)
+
+
+def test_formato_invalido(resultados):
+    with pytest.raises(ValueError):
+        renderizar_profiles(resultados, "xml")